@@ -1,6 +1,10 @@
+import signal
+import sys
 from app import create_app, socketio
 
 app = create_app()
 
 if __name__ == '__main__':
+    # Exit normally on SIGTERM (docker stop) so buffered writes are flushed at exit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
@@ -5,6 +5,7 @@ from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import logging
 
@@ -22,6 +23,10 @@ def create_app():
     # Load configuration
     app.config.from_object('app.config.Config')
 
+    # Behind reverse proxies, take the client address from X-Forwarded-For (login limits key on it)
+    if app.config.get('TRUSTED_PROXIES'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
     # Configure logging
     if not app.debug:
         logging.basicConfig(
@@ -31,7 +36,17 @@ def create_app():
     
     # Initialize extensions with app
     db.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    socketio_options = {}
+    if app.config.get('SOCKETIO_SERIALIZER') == 'msgpack':
+        socketio_options['serializer'] = 'msgpack'
+    socketio.init_app(app,
+                      async_mode=app.config.get('SOCKETIO_ASYNC_MODE', 'threading'),
+                      cors_allowed_origins="*",
+                      message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'),
+                      channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio'),
+                      http_compression=app.config.get('SOCKETIO_HTTP_COMPRESSION', True),
+                      compression_threshold=app.config.get('SOCKETIO_COMPRESSION_THRESHOLD', 1024),
+                      **socketio_options)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     login_manager.init_app(app)
@@ -52,10 +67,16 @@ def create_app():
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
 
+    from app.models.user import identity_cache
+    # Cached identities may belong to another app's database
+    identity_cache.clear()
+    identity_cache.ttl = app.config.get('USER_CACHE_TTL', 30)
+    identity_cache.max_size = app.config.get('USER_CACHE_SIZE', 10000)
+
     @login_manager.user_loader
     def load_user(user_id):
         from app.models import User
-        return User.query.get(int(user_id))
+        return User.load_identity(int(user_id))
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -72,6 +93,16 @@ def create_app():
     app.register_blueprint(messages_bp)
     app.register_blueprint(api_bp)
 
+    # Write buffered last_seen timestamps and cache hits even when no further activity triggers a flush
+    from app.models.user import last_seen_tracker
+    from app.models.translation_cache import access_tracker
+    from app.controllers.background_tasks import flush_periodically
+    last_seen_tracker.min_interval = app.config.get('LAST_SEEN_MIN_INTERVAL', 60)
+    last_seen_tracker.flush_interval = app.config.get('LAST_SEEN_FLUSH_INTERVAL', 30)
+    flush_periodically(app, 'last_seen', last_seen_tracker.flush, last_seen_tracker.flush_interval,
+                       final_flush=lambda: last_seen_tracker.flush(force=True))
+    flush_periodically(app, 'translation_cache_hits', access_tracker.flush, access_tracker.flush_interval)
+
     # Import SocketIO event handlers
     from app.controllers import socketio_controller
 
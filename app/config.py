@@ -34,6 +34,49 @@ class Config:
     OLLAMA_HOST = os.environ.get('OLLAMA_HOST') or '10.102.109.66'
     OLLAMA_PORT = int(os.environ.get('OLLAMA_PORT') or 11434)
     OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL') or 'gemma3:1b'
+    OLLAMA_TIMEOUT = int(os.environ.get('OLLAMA_TIMEOUT') or 30)
+    # Comma-separated host[:port] list; overrides OLLAMA_HOST/OLLAMA_PORT when set
+    OLLAMA_HOSTS = os.environ.get('OLLAMA_HOSTS')
+    OLLAMA_HEALTH_INTERVAL = int(os.environ.get('OLLAMA_HEALTH_INTERVAL') or 15)
+
+    # Ollama circuit breaker settings
+    OLLAMA_BREAKER_WINDOW = int(os.environ.get('OLLAMA_BREAKER_WINDOW') or 20)
+    OLLAMA_BREAKER_MIN_REQUESTS = int(os.environ.get('OLLAMA_BREAKER_MIN_REQUESTS') or 5)
+    OLLAMA_BREAKER_ERROR_THRESHOLD = float(os.environ.get('OLLAMA_BREAKER_ERROR_THRESHOLD') or 0.5)
+    OLLAMA_BREAKER_LATENCY_MS = int(os.environ.get('OLLAMA_BREAKER_LATENCY_MS') or 10000)
+    OLLAMA_BREAKER_COOLDOWN = int(os.environ.get('OLLAMA_BREAKER_COOLDOWN') or 30)
+    
+    # Translation executor settings
+    TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS') or 4)
+    TRANSLATION_QUEUE_SIZE = int(os.environ.get('TRANSLATION_QUEUE_SIZE') or 100)
+    TRANSLATION_JOB_TTL = int(os.environ.get('TRANSLATION_JOB_TTL') or 300)
+    
+    # Password hashing runs on a process pool (PASSWORD_HASH_WORKERS=0 hashes on the request thread).
+    # Changing the bcrypt cost re-hashes each password on its owner's next login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 12)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE') or 64)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)  # Seconds
+    
+    # Login attempt limits, checked before the user lookup ('memory' per worker, or 'redis' shared).
+    # Token buckets per client IP and per login identifier (rate 0 disables one); successful logins
+    # refund their tokens. After LOGIN_BACKOFF_AFTER consecutive failures an identifier is locked for
+    # LOGIN_BACKOFF_BASE seconds, doubling with each further failure up to LOGIN_BACKOFF_MAX
+    # Number of reverse proxies in front of the app that set X-Forwarded-For (0 trusts none)
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES') or 0)
+    LOGIN_LIMIT_BACKEND = os.environ.get('LOGIN_LIMIT_BACKEND') or 'memory'
+    LOGIN_LIMIT_REDIS_URL = os.environ.get('LOGIN_LIMIT_REDIS_URL') or 'redis://localhost:6379/0'
+    LOGIN_IP_RATE = float(os.environ.get('LOGIN_IP_RATE') or 0.5)  # Attempts per second
+    LOGIN_IP_BURST = int(os.environ.get('LOGIN_IP_BURST') or 20)
+    LOGIN_ACCOUNT_RATE = float(os.environ.get('LOGIN_ACCOUNT_RATE') or 0.1)  # Attempts per second
+    LOGIN_ACCOUNT_BURST = int(os.environ.get('LOGIN_ACCOUNT_BURST') or 5)
+    LOGIN_BACKOFF_AFTER = int(os.environ.get('LOGIN_BACKOFF_AFTER') or 5)
+    LOGIN_BACKOFF_BASE = float(os.environ.get('LOGIN_BACKOFF_BASE') or 1)  # Seconds
+    LOGIN_BACKOFF_MAX = float(os.environ.get('LOGIN_BACKOFF_MAX') or 900)  # Seconds
+    
+    # Background maintenance jobs (e.g. ephemeral message cleanup after logout when deferred)
+    BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS') or 2)
+    MESSAGE_CLEANUP_DEFERRED = (os.environ.get('MESSAGE_CLEANUP_DEFERRED') or 'false').lower() == 'true'
     
     # Application settings
     POSTS_PER_PAGE = 20
@@ -47,6 +90,48 @@ class Config:
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = 86400  # 24 hours
+    # Session users are served from a per-process cache for this long (0 disables it); other
+    # workers see profile changes and suspensions once their entry expires
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)  # Seconds
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 10000)
+    # last_seen updates are buffered and written every flush interval, at most once per user per min interval
+    LAST_SEEN_MIN_INTERVAL = int(os.environ.get('LAST_SEEN_MIN_INTERVAL') or 60)  # Seconds
+    LAST_SEEN_FLUSH_INTERVAL = int(os.environ.get('LAST_SEEN_FLUSH_INTERVAL') or 30)  # Seconds
     
     # SocketIO settings
+    # Set explicitly so an installed eventlet is not picked up: timers, executors and periodic flushes
+    # emit from OS threads, and eventlet would need a monkey-patched socket library (Redis queue included)
     SOCKETIO_ASYNC_MODE = 'threading'
+    # Message queue shared by all workers (e.g. redis://localhost:6379/0); required for more than one worker
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL') or 'flask-socketio'
+    # Wire format of Socket.IO packets ('default' JSON, or 'msgpack' with REACT_APP_SOCKET_SERIALIZER=msgpack on the client)
+    SOCKETIO_SERIALIZER = os.environ.get('SOCKETIO_SERIALIZER') or 'default'
+    # Gzip long-polling responses above the threshold (websocket frames use permessage-deflate when the client offers it)
+    SOCKETIO_HTTP_COMPRESSION = (os.environ.get('SOCKETIO_HTTP_COMPRESSION') or 'true').lower() == 'true'
+    SOCKETIO_COMPRESSION_THRESHOLD = int(os.environ.get('SOCKETIO_COMPRESSION_THRESHOLD') or 1024)  # Bytes
+    
+    # Presence settings ('memory' for a single process, 'redis' for multiple workers)
+    PRESENCE_BACKEND = os.environ.get('PRESENCE_BACKEND') or 'memory'
+    PRESENCE_REDIS_URL = os.environ.get('PRESENCE_REDIS_URL') or 'redis://localhost:6379/0'
+    PRESENCE_TTL = int(os.environ.get('PRESENCE_TTL') or 90)  # Seconds without heartbeat before a session expires
+    PRESENCE_BROADCAST_WINDOW_MS = int(os.environ.get('PRESENCE_BROADCAST_WINDOW_MS') or 1000)
+    
+    # Connection admission control per worker (SOCKETIO_ACCEPT_RATE=0 disables it)
+    SOCKETIO_ACCEPT_RATE = float(os.environ.get('SOCKETIO_ACCEPT_RATE') or 200)  # Connections per second
+    SOCKETIO_ACCEPT_BURST = int(os.environ.get('SOCKETIO_ACCEPT_BURST') or 400)
+    SOCKETIO_RETRY_MAX_DELAY = float(os.environ.get('SOCKETIO_RETRY_MAX_DELAY') or 30)  # Seconds
+    
+    # Recent per-user events kept for replay after a reconnect ('memory' or 'redis' for multiple workers)
+    REPLAY_BACKEND = os.environ.get('REPLAY_BACKEND') or 'memory'
+    REPLAY_REDIS_URL = os.environ.get('REPLAY_REDIS_URL') or 'redis://localhost:6379/0'
+    REPLAY_CAPACITY = int(os.environ.get('REPLAY_CAPACITY') or 200)  # Events per user
+    REPLAY_TTL = int(os.environ.get('REPLAY_TTL') or 600)  # Seconds
+    
+    # Typing indicators are forwarded at most once per interval and expire without a stop event
+    TYPING_TTL = float(os.environ.get('TYPING_TTL') or 5)  # Seconds
+    TYPING_MIN_INTERVAL = float(os.environ.get('TYPING_MIN_INTERVAL') or 2)  # Seconds
+    
+    # Post engagement updates are collected for this long and emitted as one batched frame
+    ENGAGEMENT_WINDOW_MS = int(os.environ.get('ENGAGEMENT_WINDOW_MS') or 250)
+    ENGAGEMENT_MAX_BATCH = int(os.environ.get('ENGAGEMENT_MAX_BATCH') or 100)
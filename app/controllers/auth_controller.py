@@ -1,9 +1,33 @@
-from flask import request, jsonify, session
+from flask import request, jsonify, session, current_app
 from flask_login import login_user, logout_user, current_user
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 from app import db
-from app.models import User
+from app.models import User, Message
+from app.models.user import last_seen_tracker
+from app.controllers.background_tasks import get_background_tasks
+from app.controllers.password_hasher import PasswordHasherBusy
+from app.controllers.login_limiter import get_login_limiter
+import math
 import re
 
+DUPLICATE_ERRORS = {
+    'handle': 'Handle already exists',
+    'email': 'Email already exists',
+    'phone_number': 'Phone number already exists'
+}
+
+def cleanup_ephemeral_messages(user_id):
+    """Clean up a user's ephemeral messages now, or on a background thread if MESSAGE_CLEANUP_DEFERRED"""
+    # Messages sent after this point belong to a later session, even if the cleanup runs late
+    logged_out_at = datetime.utcnow()
+    if current_app.config.get('MESSAGE_CLEANUP_DEFERRED'):
+        get_background_tasks(current_app.config).submit(
+            current_app._get_current_object(), Message.cleanup_ephemeral_messages, user_id, logged_out_at
+        )
+    else:
+        Message.cleanup_ephemeral_messages(user_id, before=logged_out_at)
+
 class AuthController:
     
     @staticmethod
@@ -39,17 +63,7 @@ class AuthController:
         if len(password) < 8:
             return jsonify({'error': 'Password must be at least 8 characters long'}), 400
         
-        # Check if user already exists
-        if User.query.filter_by(handle=handle).first():
-            return jsonify({'error': 'Handle already exists'}), 400
-        
-        if User.query.filter_by(email=email).first():
-            return jsonify({'error': 'Email already exists'}), 400
-        
-        if phone_number and User.query.filter_by(phone_number=phone_number).first():
-            return jsonify({'error': 'Phone number already exists'}), 400
-        
-        # Create new user
+        # Create new user; the unique constraints reject taken handles, emails and phone numbers
         try:
             user = User(
                 handle=handle,
@@ -72,6 +86,14 @@ class AuthController:
                 'user': user.to_dict()
             }), 201
             
+        except PasswordHasherBusy:
+            return jsonify({'error': 'Server busy, try again later'}), 503
+        except IntegrityError as e:
+            db.session.rollback()
+            field = User.duplicate_field(e)
+            if field:
+                return jsonify({'error': DUPLICATE_ERRORS[field]}), 400
+            return jsonify({'error': 'Registration failed'}), 500
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Registration failed'}), 500
@@ -94,6 +116,17 @@ class AuthController:
 
             if not login_field or not password:
                 return jsonify({'error': 'Login and password are required'}), 400
+
+            # Refuse floods before they cost a lookup and a bcrypt check
+            limiter = get_login_limiter(current_app.config)
+            retry_after = limiter.check(request.remote_addr, login_field)
+            if retry_after is not None:
+                retry_after = math.ceil(retry_after)
+                logging.warning(f"Login rate limited for '{login_field}' from {request.remote_addr}")
+                return jsonify({
+                    'error': 'Too many login attempts, try again later',
+                    'retry_after': retry_after
+                }), 429, {'Retry-After': str(retry_after)}
         
             # Try to find user by email, phone, or handle
             user = None
@@ -114,28 +147,30 @@ class AuthController:
 
             if not user:
                 logging.warning(f"Login failed: User '{login_field}' not found")
+                limiter.record_failure(login_field)
                 return jsonify({'error': 'Invalid credentials'}), 401
 
             # Check password
             password_start = time.time()
             if not user.check_password(password):
                 logging.warning(f"Login failed: Invalid password for user '{login_field}'")
+                limiter.record_failure(login_field)
                 return jsonify({'error': 'Invalid credentials'}), 401
 
             password_time = time.time() - password_start
             logging.info(f"Password check completed in {password_time:.3f}s")
+            limiter.record_success(request.remote_addr, login_field)
 
             if not user.is_active:
                 logging.warning(f"Login failed: Account '{login_field}' is deactivated")
                 return jsonify({'error': 'Account is deactivated'}), 401
 
-            # Update last seen
-            update_start = time.time()
-            from datetime import datetime
-            user.last_seen = datetime.utcnow()
-            db.session.commit()
-            update_time = time.time() - update_start
-            logging.info(f"Database update completed in {update_time:.3f}s")
+            # Upgrade hashes made with an older cost factor while the password is at hand
+            if user.rehash_password(password):
+                db.session.commit()
+
+            # Update last seen (buffered, written in batches)
+            last_seen_tracker.record(user.id)
 
             # Log in the user
             login_user(user, remember=remember_me)
@@ -148,6 +183,9 @@ class AuthController:
                 'user': user.to_dict()
             }), 200
 
+        except PasswordHasherBusy:
+            logging.warning("Login rejected: password hashing queue is full")
+            return jsonify({'error': 'Server busy, try again later'}), 503
         except Exception as e:
             total_time = time.time() - start_time
             logging.error(f"Login error after {total_time:.3f}s: {str(e)}")
@@ -159,8 +197,7 @@ class AuthController:
         """Handle user logout"""
         if current_user.is_authenticated:
             # Clean up ephemeral messages
-            from app.models.message import Message
-            Message.cleanup_ephemeral_messages(current_user.id)
+            cleanup_ephemeral_messages(current_user.id)
             
             logout_user()
             return jsonify({'message': 'Logout successful'}), 200
@@ -188,8 +225,11 @@ class AuthController:
         if not current_password or not new_password:
             return jsonify({'error': 'Current and new passwords are required'}), 400
         
-        if not current_user.check_password(current_password):
-            return jsonify({'error': 'Current password is incorrect'}), 400
+        try:
+            if not current_user.check_password(current_password):
+                return jsonify({'error': 'Current password is incorrect'}), 400
+        except PasswordHasherBusy:
+            return jsonify({'error': 'Server busy, try again later'}), 503
         
         if len(new_password) < 8:
             return jsonify({'error': 'New password must be at least 8 characters long'}), 400
@@ -200,6 +240,8 @@ class AuthController:
             
             return jsonify({'message': 'Password changed successfully'}), 200
             
+        except PasswordHasherBusy:
+            return jsonify({'error': 'Server busy, try again later'}), 503
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to change password'}), 500
@@ -246,13 +288,15 @@ class AuthController:
         if not password:
             return jsonify({'error': 'Password is required to delete account'}), 400
         
-        if not current_user.check_password(password):
-            return jsonify({'error': 'Incorrect password'}), 400
+        try:
+            if not current_user.check_password(password):
+                return jsonify({'error': 'Incorrect password'}), 400
+        except PasswordHasherBusy:
+            return jsonify({'error': 'Server busy, try again later'}), 503
         
         try:
             # Clean up user data
-            from app.models.message import Message
-            Message.cleanup_ephemeral_messages(current_user.id)
+            cleanup_ephemeral_messages(current_user.id)
             
             # Deactivate account instead of deleting to preserve data integrity
             current_user.is_active = False
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundTasks:
+    """
+    Runs short maintenance jobs off the request thread
+
+    Used for work a response doesn't have to wait for, such as cleaning up
+    ephemeral messages after a logout. Failures are logged, not raised.
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='background')
+
+    def submit(self, app, fn, *args):
+        """
+        Queue fn(*args) to run inside an app context
+
+        Returns:
+            Future: Resolves to fn's result, or None if it failed
+        """
+        return self._executor.submit(self._run, app, fn, args)
+
+    def _run(self, app, fn, args):
+        try:
+            with app.app_context():
+                return fn(*args)
+        except Exception as e:
+            logging.error(f"Background task {getattr(fn, '__name__', fn)} failed: {e}")
+            return None
+
+    def shutdown(self, wait=True):
+        """Stop accepting tasks and release the worker threads"""
+        self._executor.shutdown(wait=wait)
+
+
+_tasks = None
+_tasks_lock = threading.Lock()
+
+
+def get_background_tasks(config):
+    """Get the process-wide background task runner, creating it from app config on first use"""
+    global _tasks
+
+    if _tasks is not None:
+        return _tasks
+
+    with _tasks_lock:
+        if _tasks is None:
+            _tasks = BackgroundTasks(max_workers=config.get('BACKGROUND_WORKERS', 2))
+
+    return _tasks
+
+
+class PeriodicFlush:
+    """
+    Flushes an in-memory write buffer on a timer and when the process exits
+
+    Buffers like LastSeenTracker otherwise only write when a later record()
+    finds their interval elapsed, so the last batch would wait for traffic
+    that may never come, or be lost on restart. flush runs every interval
+    seconds and final_flush (default: flush) once at exit, both inside the
+    app context given to start(); starting again switches to the new app.
+    """
+
+    def __init__(self, flush, interval, final_flush=None, name='flush'):
+        self.flush = flush
+        self.final_flush = final_flush or flush
+        self.interval = interval
+        self.name = name
+        self.app = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, app):
+        """Flush in app's context from now on, starting the timer thread on first use"""
+        with self._lock:
+            self.app = app
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.run_once()
+
+    def run_once(self, final=False):
+        """Flush now (with final_flush if final); failures are logged, not raised"""
+        app = self.app
+        if app is None:
+            return None
+        try:
+            with app.app_context():
+                return (self.final_flush if final else self.flush)()
+        except Exception as e:
+            logging.error(f"Periodic {self.name} failed: {e}")
+            return None
+
+    def stop(self):
+        """Stop the timer and write whatever is still buffered"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopped.set()
+        atexit.unregister(self.stop)
+        self.run_once(final=True)
+
+
+_periodic_flushes = {}
+_periodic_flushes_lock = threading.Lock()
+
+
+def flush_periodically(app, name, flush, interval, final_flush=None):
+    """Flush a write buffer every interval seconds and at exit in app's context (the latest app and interval win)"""
+    with _periodic_flushes_lock:
+        periodic = _periodic_flushes.get(name)
+        if periodic is None:
+            periodic = _periodic_flushes[name] = PeriodicFlush(flush, interval, final_flush=final_flush, name=name)
+        periodic.interval = interval
+    periodic.start(app)
+    return periodic
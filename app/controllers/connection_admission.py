@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+
+
+class ConnectionAdmission:
+    """
+    Rate limits how fast one worker accepts Socket.IO connections
+
+    After a deploy every client reconnects at once. Connections are admitted
+    through a token bucket; refused clients are told how long to wait, with
+    delays spread over the backlog and jittered so retries arrive at roughly
+    the accept rate instead of as a second storm.
+    """
+
+    def __init__(self, rate=200, burst=400, max_delay=30, clock=time.monotonic, rng=random.random):
+        """
+        Args:
+            rate (float): Connections accepted per second; 0 disables admission control
+            burst (int): Connections that can be accepted at once after an idle period
+            max_delay (float): Upper bound for suggested retry delays, in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_delay = max_delay
+        self.clock = clock
+        self.rng = rng
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._backlog = 0.0
+        self._updated_at = clock()
+        self.accepted = 0
+        self.refused = 0
+
+    def _refill(self, now):
+        """Add tokens and drain the backlog for the time elapsed (lock held by caller)"""
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._backlog = max(0.0, self._backlog - elapsed * self.rate)
+
+    def admit(self):
+        """
+        Try to accept a connection
+
+        Returns:
+            float or None: None if accepted, otherwise seconds the client should wait before retrying
+        """
+        if self.rate <= 0:
+            return None
+
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.accepted += 1
+                return None
+
+            # Queue the client behind everyone already told to wait, then jitter
+            self._backlog += 1
+            self.refused += 1
+            delay = max(1.0, self._backlog) / self.rate
+            return min(self.max_delay, delay * (0.5 + self.rng()))
+
+    def get_stats(self):
+        """Get admission counters"""
+        with self._lock:
+            self._refill(self.clock())
+            return {
+                'accepted': self.accepted,
+                'refused': self.refused,
+                'backlog': round(self._backlog),
+                'rate': self.rate
+            }
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def get_connection_admission(config):
+    """Get the process-wide connection admission control, creating it from app config on first use"""
+    global _admission
+
+    if _admission is not None:
+        return _admission
+
+    with _admission_lock:
+        if _admission is None:
+            _admission = ConnectionAdmission(
+                rate=config.get('SOCKETIO_ACCEPT_RATE', 200),
+                burst=config.get('SOCKETIO_ACCEPT_BURST', 400),
+                max_delay=config.get('SOCKETIO_RETRY_MAX_DELAY', 30)
+            )
+
+    return _admission
@@ -0,0 +1,89 @@
+import logging
+import threading
+
+
+class EngagementAggregator:
+    """
+    Collapses post engagement updates into batched delta frames
+
+    A hot post can receive dozens of likes per second. Instead of serializing
+    and broadcasting the whole post for each one, the latest counters of every
+    updated post are kept for a short window and then emitted together as
+    compact {id, likes_count, replies_count, shares_count} deltas.
+    """
+
+    def __init__(self, emit, window=0.25, max_batch=100):
+        """
+        Args:
+            emit (callable): Called with a list of deltas for each frame
+            window (float): Seconds to collect updates before emitting; 0 emits immediately
+            max_batch (int): Maximum number of deltas per frame
+        """
+        self.emit = emit
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, post):
+        """Record a post's current engagement counters"""
+        delta = {
+            'id': post.id,
+            'likes_count': post.likes_count,
+            'replies_count': post.replies_count,
+            'shares_count': post.shares_count
+        }
+
+        with self._lock:
+            # Later updates replace earlier ones; only the latest counters matter
+            self._pending[post.id] = delta
+            if self.window > 0 and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if self.window <= 0:
+            self.flush()
+
+    def flush(self):
+        """
+        Emit all pending deltas
+
+        Returns:
+            int: Number of posts whose deltas were emitted
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+
+        deltas = list(pending.values())
+        for start in range(0, len(deltas), self.max_batch):
+            try:
+                self.emit(deltas[start:start + self.max_batch])
+            except Exception as e:
+                logging.error(f"Error emitting engagement updates: {e}")
+
+        return len(deltas)
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_engagement_aggregator(config, emit):
+    """Get the process-wide engagement aggregator, creating it from app config on first use"""
+    global _aggregator
+
+    if _aggregator is not None:
+        return _aggregator
+
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = EngagementAggregator(
+                emit,
+                window=config.get('ENGAGEMENT_WINDOW_MS', 250) / 1000,
+                max_batch=config.get('ENGAGEMENT_MAX_BATCH', 100)
+            )
+
+    return _aggregator
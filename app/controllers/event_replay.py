@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+def is_complete(missed, last_seq, seq):
+    """
+    Check whether the buffered events cover everything after last_seq
+
+    A last_seq ahead of the current sequence means the sequence was reset
+    (e.g. the buffer expired), so the client can't trust its position.
+    """
+    if last_seq == seq:
+        return True
+    return last_seq < seq and bool(missed) and missed[0]['seq'] == last_seq + 1
+
+
+class InMemoryReplayBuffer:
+    """
+    Recent per-user events for a single process
+
+    Every event sent to a user gets the next sequence number of that user and
+    is kept in a bounded ring buffer. A reconnecting client reports the last
+    sequence number it saw and gets only the events it missed. Events of
+    users without new events for ttl seconds are dropped.
+    """
+
+    def __init__(self, capacity=200, ttl=600, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._appends = 0
+
+    def append(self, user_id, event, data):
+        """
+        Store an event for a user
+
+        Returns:
+            int: The event's sequence number
+        """
+        now = self.clock()
+        with self._lock:
+            buffer = self._buffers.get(user_id)
+            if buffer is None:
+                buffer = self._buffers[user_id] = {'seq': 0, 'events': deque(maxlen=self.capacity), 'expires_at': 0}
+            elif buffer['expires_at'] <= now:
+                buffer['events'].clear()
+
+            buffer['seq'] += 1
+            buffer['expires_at'] = now + self.ttl
+            buffer['events'].append({'seq': buffer['seq'], 'event': event, 'data': data})
+
+            self._appends += 1
+            if self._appends % 1000 == 0:
+                self._prune(now)
+            return buffer['seq']
+
+    def _prune(self, now):
+        """Free the events of idle users, keeping their sequence numbers (lock held by caller)"""
+        for buffer in self._buffers.values():
+            if buffer['expires_at'] <= now:
+                buffer['events'].clear()
+
+    def current_seq(self, user_id):
+        """Get the sequence number of a user's latest event"""
+        with self._lock:
+            buffer = self._buffers.get(user_id)
+            return buffer['seq'] if buffer else 0
+
+    def since(self, user_id, last_seq):
+        """
+        Get the events a user missed after last_seq
+
+        Returns:
+            tuple: (events, complete, current_seq); complete is False when
+            some missed events are no longer buffered
+        """
+        with self._lock:
+            buffer = self._buffers.get(user_id)
+            if buffer is None:
+                return [], last_seq == 0, 0
+
+            seq = buffer['seq']
+            events = list(buffer['events']) if buffer['expires_at'] > self.clock() else []
+
+        missed = [event for event in events if event['seq'] > last_seq]
+        return missed, is_complete(missed, last_seq, seq), seq
+
+
+class RedisReplayBuffer:
+    """
+    Recent per-user events shared by every worker through Redis
+
+    Each user has a counter for sequence numbers and a sorted set of events
+    scored by sequence number, trimmed to capacity. Only the events expire:
+    connected clients drop events numbered at or below the last one they
+    saw, so the counter must never restart.
+    """
+
+    def __init__(self, url, capacity=200, ttl=600, prefix='replay', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+
+        self.redis = client
+        self.capacity = capacity
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, user_id):
+        return f"{self.prefix}:seq:{user_id}", f"{self.prefix}:events:{user_id}"
+
+    def append(self, user_id, event, data):
+        """
+        Store an event for a user
+
+        Returns:
+            int: The event's sequence number
+        """
+        seq_key, events_key = self._keys(user_id)
+        seq = self.redis.incr(seq_key)
+
+        pipe = self.redis.pipeline()
+        pipe.zadd(events_key, {json.dumps({'seq': seq, 'event': event, 'data': data}): seq})
+        pipe.zremrangebyrank(events_key, 0, -(self.capacity + 1))
+        pipe.expire(events_key, self.ttl)
+        pipe.execute()
+        return seq
+
+    def current_seq(self, user_id):
+        """Get the sequence number of a user's latest event"""
+        seq_key, _ = self._keys(user_id)
+        return int(self.redis.get(seq_key) or 0)
+
+    def since(self, user_id, last_seq):
+        """
+        Get the events a user missed after last_seq
+
+        Returns:
+            tuple: (events, complete, current_seq); complete is False when
+            some missed events are no longer buffered
+        """
+        seq_key, events_key = self._keys(user_id)
+
+        pipe = self.redis.pipeline()
+        pipe.get(seq_key)
+        pipe.zrangebyscore(events_key, f"({last_seq}", '+inf')
+        seq, raw_events = pipe.execute()
+
+        seq = int(seq or 0)
+        missed = [json.loads(raw_event) for raw_event in raw_events]
+        return missed, is_complete(missed, last_seq, seq), seq
+
+
+_replay_buffer = None
+_replay_buffer_lock = threading.Lock()
+
+
+def get_replay_buffer(config):
+    """Get the process-wide replay buffer, creating it from app config on first use"""
+    global _replay_buffer
+
+    if _replay_buffer is not None:
+        return _replay_buffer
+
+    with _replay_buffer_lock:
+        if _replay_buffer is None:
+            capacity = config.get('REPLAY_CAPACITY', 200)
+            ttl = config.get('REPLAY_TTL', 600)
+            if config.get('REPLAY_BACKEND', 'memory') == 'redis':
+                _replay_buffer = RedisReplayBuffer(config.get('REPLAY_REDIS_URL'), capacity=capacity, ttl=ttl)
+            else:
+                _replay_buffer = InMemoryReplayBuffer(capacity=capacity, ttl=ttl)
+
+    return _replay_buffer
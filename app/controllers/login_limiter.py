@@ -0,0 +1,278 @@
+import threading
+import time
+
+
+def backoff_delay(failures, after, base, maximum):
+    """Seconds an account stays locked after its failures-th consecutive failed login"""
+    if failures < after:
+        return 0
+    return min(maximum, base * 2 ** (failures - after))
+
+
+class InMemoryLoginLimiter:
+    """
+    Login attempt limits for a single process
+
+    Every login attempt costs a bcrypt check, so attempts are limited before
+    the user lookup: a token bucket per client IP, a token bucket per login
+    identifier, and an exponential lockout per identifier after backoff_after
+    consecutive failures. Successful logins refund their tokens, so only
+    failed attempts count against the buckets. Identifiers are limited
+    whether or not the account exists, which keeps lookups from revealing
+    accounts. A rate of 0 disables that bucket.
+    """
+
+    def __init__(self, ip_rate=0.5, ip_burst=20, login_rate=0.1, login_burst=5,
+                 backoff_after=5, backoff_base=1, backoff_max=900, clock=time.monotonic):
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.login_rate = login_rate
+        self.login_burst = login_burst
+        self.backoff_after = backoff_after
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._failures = {}
+        self._checks = 0
+        self.rejected = {'ip': 0, 'login': 0, 'backoff': 0}
+
+    def _take(self, key, rate, burst, now, cost=1):
+        """Take cost tokens from a bucket; returns seconds until they'd be available (lock held by caller)"""
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens < cost:
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+        self._buckets[key] = (min(burst, tokens - cost), now)
+        return 0
+
+    def check(self, ip, login):
+        """
+        Check whether a login attempt may proceed, taking its tokens if so
+
+        Returns:
+            float or None: None if allowed, otherwise seconds to wait before retrying
+        """
+        login = login.lower()
+        now = self.clock()
+        with self._lock:
+            self._checks += 1
+            if self._checks % 1000 == 0:
+                self._prune(now)
+
+            failures = self._failures.get(login)
+            if failures and failures[1] > now:
+                self.rejected['backoff'] += 1
+                return failures[1] - now
+
+            if self.ip_rate > 0:
+                retry_after = self._take(f"ip:{ip}", self.ip_rate, self.ip_burst, now)
+                if retry_after:
+                    self.rejected['ip'] += 1
+                    return retry_after
+
+            if self.login_rate > 0:
+                retry_after = self._take(f"login:{login}", self.login_rate, self.login_burst, now)
+                if retry_after:
+                    self.rejected['login'] += 1
+                    return retry_after
+
+            return None
+
+    def record_failure(self, login):
+        """Count a failed attempt, locking the identifier once failures pile up"""
+        login = login.lower()
+        now = self.clock()
+        with self._lock:
+            count, _, last_failure = self._failures.get(login, (0, 0, now))
+            if now - last_failure > self.backoff_max:
+                count = 0
+            count += 1
+            delay = backoff_delay(count, self.backoff_after, self.backoff_base, self.backoff_max)
+            self._failures[login] = (count, now + delay, now)
+
+    def record_success(self, ip, login):
+        """Forget an identifier's failures and refund the attempt's tokens"""
+        login = login.lower()
+        now = self.clock()
+        with self._lock:
+            self._failures.pop(login, None)
+            if self.ip_rate > 0:
+                self._take(f"ip:{ip}", self.ip_rate, self.ip_burst, now, cost=-1)
+            if self.login_rate > 0:
+                self._take(f"login:{login}", self.login_rate, self.login_burst, now, cost=-1)
+
+    def _prune(self, now):
+        """Drop full buckets and forgotten failures (lock held by caller)"""
+        def is_full(key, tokens, updated_at):
+            rate, burst = (self.ip_rate, self.ip_burst) if key.startswith('ip:') else (self.login_rate, self.login_burst)
+            return tokens + (now - updated_at) * rate >= burst
+
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if not is_full(key, *bucket)
+        }
+        self._failures = {
+            login: failures for login, failures in self._failures.items()
+            if failures[1] > now or now - failures[2] <= self.backoff_max
+        }
+
+    def get_stats(self):
+        """Get limiter counters"""
+        with self._lock:
+            return {
+                'checked': self._checks,
+                'rejected': dict(self.rejected),
+                'tracked_keys': len(self._buckets),
+                'locked_logins': sum(1 for failures in self._failures.values() if failures[1] > self.clock())
+            }
+
+
+# Refill a bucket, then take ARGV[4] tokens (negative to refund); returns seconds to wait or 0
+TOKEN_BUCKET_SCRIPT = """
+local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens < cost then
+    retry_after = (cost - tokens) / rate
+else
+    tokens = math.min(burst, tokens - cost)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisLoginLimiter:
+    """
+    Login attempt limits shared by every worker through Redis
+
+    Same limits as InMemoryLoginLimiter. Buckets are hashes updated by a Lua
+    script; an identifier's failure count and lockout are plain keys that
+    expire on their own. Rejection counters are per worker.
+    """
+
+    def __init__(self, url, ip_rate=0.5, ip_burst=20, login_rate=0.1, login_burst=5,
+                 backoff_after=5, backoff_base=1, backoff_max=900, prefix='login_limit', clock=time.time):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.login_rate = login_rate
+        self.login_burst = login_burst
+        self.backoff_after = backoff_after
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.prefix = prefix
+        self.clock = clock
+        self._take_script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._lock = threading.Lock()
+        self._checks = 0
+        self.rejected = {'ip': 0, 'login': 0, 'backoff': 0}
+
+    def _take(self, key, rate, burst, cost=1):
+        retry_after = self._take_script(keys=[f"{self.prefix}:{key}"], args=[rate, burst, self.clock(), cost])
+        return float(retry_after)
+
+    def _count(self, reason=None):
+        with self._lock:
+            if reason is None:
+                self._checks += 1
+            else:
+                self.rejected[reason] += 1
+
+    def check(self, ip, login):
+        """
+        Check whether a login attempt may proceed, taking its tokens if so
+
+        Returns:
+            float or None: None if allowed, otherwise seconds to wait before retrying
+        """
+        login = login.lower()
+        self._count()
+
+        locked_ms = self.redis.pttl(f"{self.prefix}:lock:{login}")
+        if locked_ms > 0:
+            self._count('backoff')
+            return locked_ms / 1000
+
+        if self.ip_rate > 0:
+            retry_after = self._take(f"ip:{ip}", self.ip_rate, self.ip_burst)
+            if retry_after:
+                self._count('ip')
+                return retry_after
+
+        if self.login_rate > 0:
+            retry_after = self._take(f"login:{login}", self.login_rate, self.login_burst)
+            if retry_after:
+                self._count('login')
+                return retry_after
+
+        return None
+
+    def record_failure(self, login):
+        """Count a failed attempt, locking the identifier once failures pile up"""
+        login = login.lower()
+        failures_key = f"{self.prefix}:failures:{login}"
+
+        pipe = self.redis.pipeline()
+        pipe.incr(failures_key)
+        pipe.expire(failures_key, self.backoff_max)
+        count, _ = pipe.execute()
+
+        delay = backoff_delay(count, self.backoff_after, self.backoff_base, self.backoff_max)
+        if delay:
+            self.redis.set(f"{self.prefix}:lock:{login}", 1, px=int(delay * 1000))
+
+    def record_success(self, ip, login):
+        """Forget an identifier's failures and refund the attempt's tokens"""
+        login = login.lower()
+        self.redis.delete(f"{self.prefix}:failures:{login}", f"{self.prefix}:lock:{login}")
+        if self.ip_rate > 0:
+            self._take(f"ip:{ip}", self.ip_rate, self.ip_burst, cost=-1)
+        if self.login_rate > 0:
+            self._take(f"login:{login}", self.login_rate, self.login_burst, cost=-1)
+
+    def get_stats(self):
+        """Get this worker's limiter counters"""
+        with self._lock:
+            return {
+                'checked': self._checks,
+                'rejected': dict(self.rejected)
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_login_limiter(config):
+    """Get the process-wide login limiter, creating it from app config on first use"""
+    global _limiter
+
+    if _limiter is not None:
+        return _limiter
+
+    with _limiter_lock:
+        if _limiter is None:
+            options = {
+                'ip_rate': config.get('LOGIN_IP_RATE', 0.5),
+                'ip_burst': config.get('LOGIN_IP_BURST', 20),
+                'login_rate': config.get('LOGIN_ACCOUNT_RATE', 0.1),
+                'login_burst': config.get('LOGIN_ACCOUNT_BURST', 5),
+                'backoff_after': config.get('LOGIN_BACKOFF_AFTER', 5),
+                'backoff_base': config.get('LOGIN_BACKOFF_BASE', 1),
+                'backoff_max': config.get('LOGIN_BACKOFF_MAX', 900)
+            }
+            if config.get('LOGIN_LIMIT_BACKEND', 'memory') == 'redis':
+                _limiter = RedisLoginLimiter(config.get('LOGIN_LIMIT_REDIS_URL'), **options)
+            else:
+                _limiter = InMemoryLoginLimiter(**options)
+
+    return _limiter
@@ -1,9 +1,10 @@
 from flask import request, jsonify
 from flask_login import current_user, login_required
 from app import db
-from app.models import Message, Conversation, User
-from app.controllers.socketio_controller import emit_new_notification
-from datetime import datetime
+from app.models import Message, Conversation, MessageStats, User
+from app.controllers.socketio_controller import (
+    emit_new_notification, emit_new_message, message_payload, author_summaries
+)
 
 class MessagesController:
     
@@ -35,34 +36,24 @@ class MessagesController:
             return jsonify({'error': 'Cannot send message to yourself'}), 400
         
         try:
-            # Create message
-            message = Message(
-                sender_id=current_user.id,
-                recipient_id=recipient.id,
-                content=content,
-                original_language=current_user.preferred_language
+            message, conversation_id = Message.send(
+                current_user.id, recipient.id, content, current_user.preferred_language
             )
-            
-            db.session.add(message)
-            
-            # Update or create conversation
-            conversation = Conversation.get_or_create(current_user.id, recipient.id)
-            conversation.last_message_id = message.id
-            conversation.last_activity = datetime.utcnow()
-            
+            # Serialize before the commit expires the loaded objects
+            message_data = message_payload(message, conversation_id, current_user, recipient)
             db.session.commit()
-            
-            # The real-time notification is handled by SocketIO in socketio_controller.py
-            
-            return jsonify({
-                'message': 'Message sent successfully',
-                'message_data': message.to_dict(),
-                'conversation_id': conversation.id
-            }), 201
-            
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to send message'}), 500
+        
+        emit_new_message(message_data)
+        
+        return jsonify({
+            'message': 'Message sent successfully',
+            'message_data': message_data['message'],
+            'authors': message_data['authors'],
+            'conversation_id': conversation_id
+        }), 201
     
     @staticmethod
     @login_required
@@ -72,12 +63,7 @@ class MessagesController:
         per_page = request.args.get('per_page', 20, type=int)
         
         # Get conversations where user is participant
-        conversations = Conversation.query.filter(
-            db.or_(
-                Conversation.user1_id == current_user.id,
-                Conversation.user2_id == current_user.id
-            )
-        ).order_by(Conversation.last_activity.desc()).paginate(
+        conversations = Conversation.get_inbox(current_user.id).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
@@ -96,9 +82,9 @@ class MessagesController:
     @staticmethod
     @login_required
     def get_conversation_messages(conversation_id):
-        """Get messages in a conversation"""
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        """Get messages in a conversation, newest page first; pass before=<message_id> for older pages"""
+        before = request.args.get('before', type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 100)
         
         # Verify user has access to this conversation
         conversation = Conversation.query.filter(
@@ -112,31 +98,17 @@ class MessagesController:
         if not conversation:
             return jsonify({'error': 'Conversation not found'}), 404
         
-        # Get the other user in the conversation
-        other_user = conversation.get_other_user(current_user.id)
-        
-        # Get messages between the two users
-        messages = Message.get_conversation(current_user.id, other_user.id, limit=per_page * page)
-        
-        # Filter messages that are visible to current user
-        visible_messages = [
-            msg for msg in messages 
-            if msg.is_visible_to_user(current_user.id)
-        ]
-        
-        # Paginate manually
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_messages = visible_messages[start:end]
+        messages, has_more = Message.get_page(conversation.id, current_user.id, before=before, limit=per_page)
         
         return jsonify({
             'conversation': conversation.to_dict(current_user.id),
-            'messages': [msg.to_dict() for msg in paginated_messages],
+            'messages': [msg.to_dict(include_users=False) for msg in messages],
+            'authors': author_summaries([current_user, conversation.get_other_user(current_user.id)]),
             'pagination': {
-                'page': page,
-                'total': len(visible_messages),
-                'has_next': end < len(visible_messages),
-                'has_prev': page > 1
+                'per_page': per_page,
+                'has_more': has_more,
+                # Cursor for the next (older) page
+                'before': messages[0].id if has_more else None
             }
         }), 200
     
@@ -158,23 +130,15 @@ class MessagesController:
         
         try:
             # Mark all unread messages from the other user as read
-            other_user = conversation.get_other_user(current_user.id)
-            
-            unread_messages = Message.query.filter_by(
-                sender_id=other_user.id,
-                recipient_id=current_user.id,
-                is_read=False
-            ).all()
-            
-            for message in unread_messages:
-                message.mark_as_read()
+            count = conversation.mark_read(current_user.id)
             
             return jsonify({
-                'message': f'Marked {len(unread_messages)} messages as read',
-                'count': len(unread_messages)
+                'message': f'Marked {count} messages as read',
+                'count': count
             }), 200
             
         except Exception as e:
+            db.session.rollback()
             return jsonify({'error': 'Failed to mark messages as read'}), 500
     
     @staticmethod
@@ -234,35 +198,30 @@ class MessagesController:
         """Search messages"""
         query = request.args.get('q', '').strip()
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
         
-        if not query:
+        if not Message.search_terms(query):
             return jsonify({'error': 'Search query is required'}), 400
         
-        # Search in messages where user is sender or recipient
-        messages = Message.query.filter(
-            db.or_(
-                Message.sender_id == current_user.id,
-                Message.recipient_id == current_user.id
-            ),
-            Message.content.contains(query)
-        ).order_by(Message.created_at.desc()).paginate(
+        # Search in messages the user sent or received and hasn't deleted
+        messages = Message.search(current_user.id, query).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
-        # Filter out messages that are not visible to user
-        visible_messages = [
-            msg for msg in messages.items 
-            if msg.is_visible_to_user(current_user.id)
-        ]
+        user_ids = {msg.sender_id for msg in messages.items} | {msg.recipient_id for msg in messages.items}
+        users = User.query.filter(User.id.in_(user_ids)).all() if user_ids else []
         
         return jsonify({
-            'messages': [msg.to_dict() for msg in visible_messages],
+            'messages': [
+                dict(msg.to_dict(include_users=False), highlights=Message.highlight(msg.content, query))
+                for msg in messages.items
+            ],
+            'authors': author_summaries(users),
             'pagination': {
                 'page': messages.page,
                 'pages': messages.pages,
                 'per_page': messages.per_page,
-                'total': len(visible_messages),
+                'total': messages.total,
                 'has_next': messages.has_next,
                 'has_prev': messages.has_prev
             },
@@ -273,23 +232,13 @@ class MessagesController:
     @login_required
     def get_message_stats():
         """Get user's message statistics"""
-        total_sent = Message.query.filter_by(sender_id=current_user.id).count()
-        total_received = Message.query.filter_by(recipient_id=current_user.id).count()
-        unread_count = current_user.get_unread_message_count()
-        
-        # Get active conversations count
-        active_conversations = Conversation.query.filter(
-            db.or_(
-                Conversation.user1_id == current_user.id,
-                Conversation.user2_id == current_user.id
-            )
-        ).count()
+        stats = MessageStats.get_for_user(current_user.id)
         
         return jsonify({
             'stats': {
-                'total_sent': total_sent,
-                'total_received': total_received,
-                'unread_count': unread_count,
-                'active_conversations': active_conversations
+                'total_sent': stats['sent_count'],
+                'total_received': stats['received_count'],
+                'unread_count': stats['unread_count'],
+                'active_conversations': stats['conversation_count']
             }
         }), 200
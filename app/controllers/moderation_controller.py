@@ -1,7 +1,9 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_login import current_user, login_required
 from app import db
 from app.models import Report, Post, User, Notification
+from app.models.user import identity_cache
+from app.controllers.login_limiter import get_login_limiter
 from datetime import datetime
 
 class ModerationController:
@@ -226,7 +228,9 @@ class ModerationController:
                     'reported_posts': reported_posts,
                     'deleted_posts': deleted_posts,
                     'suspended_users': suspended_users
-                }
+                },
+                'identity_cache': identity_cache.get_stats(),
+                'login_limiter': get_login_limiter(current_app.config).get_stats()
             }
         }), 200
     
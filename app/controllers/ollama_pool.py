@@ -0,0 +1,252 @@
+import threading
+import time
+import logging
+from collections import deque
+import requests
+
+
+class OllamaBackend:
+    """
+    A single Ollama endpoint with its own circuit breaker
+
+    The breaker keeps a sliding window of recent call outcomes. It opens when
+    the error rate or the average latency in the window crosses the configured
+    threshold, rejects calls while open, and lets a single trial call through
+    (half-open) once the cooldown has elapsed.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host, port, window_size=20, min_requests=5, error_threshold=0.5,
+                 latency_threshold_ms=10000, cooldown_seconds=30):
+        self.host = host
+        self.port = port
+        self.base_url = f"http://{host}:{port}"
+
+        self.window_size = window_size
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.latency_threshold_ms = latency_threshold_ms
+        self.cooldown_seconds = cooldown_seconds
+
+        self.state = self.CLOSED
+        self.outstanding = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.outcomes = deque(maxlen=window_size)
+        self.total_requests = 0
+        self.total_failures = 0
+        self.last_error = None
+
+    def is_available(self, now=None):
+        """Check whether a call may be routed to this backend (lock held by caller)"""
+        now = now or time.monotonic()
+
+        if self.state == self.OPEN and now - self.opened_at >= self.cooldown_seconds:
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN:
+            return not self.trial_in_flight
+        return False
+
+    def record(self, success, latency_ms, error=None):
+        """Record a call outcome and update the breaker state (lock held by caller)"""
+        self.total_requests += 1
+        if not success:
+            self.total_failures += 1
+            self.last_error = error
+
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = False
+            if success and latency_ms < self.latency_threshold_ms:
+                self.close()
+            else:
+                self.trip()
+            return
+
+        self.outcomes.append((success, latency_ms))
+        if self.state == self.CLOSED and self._should_trip():
+            self.trip()
+
+    def _should_trip(self):
+        if len(self.outcomes) < self.min_requests:
+            return False
+
+        failures = sum(1 for success, _ in self.outcomes if not success)
+        average_latency = sum(latency for _, latency in self.outcomes) / len(self.outcomes)
+
+        return (failures / len(self.outcomes) >= self.error_threshold
+                or average_latency >= self.latency_threshold_ms)
+
+    def trip(self):
+        """Open the breaker"""
+        if self.state != self.OPEN:
+            logging.warning(f"Circuit breaker opened for Ollama backend {self.base_url}")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trial_in_flight = False
+
+    def close(self):
+        """Close the breaker and forget the failures that opened it"""
+        if self.state != self.CLOSED:
+            logging.info(f"Circuit breaker closed for Ollama backend {self.base_url}")
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.outcomes.clear()
+
+    def to_dict(self):
+        """Convert backend status to dictionary"""
+        return {
+            'url': self.base_url,
+            'state': self.state,
+            'outstanding': self.outstanding,
+            'total_requests': self.total_requests,
+            'total_failures': self.total_failures,
+            'last_error': self.last_error
+        }
+
+
+class OllamaPool:
+    """
+    Routes Ollama calls across several backends
+
+    Calls go to the available backend with the fewest outstanding requests.
+    When every breaker is open, acquire() returns None so callers can fail fast
+    instead of waiting out the request timeout.
+    """
+
+    def __init__(self, endpoints, health_interval=15, health_timeout=3, **breaker_options):
+        self.backends = [OllamaBackend(host, port, **breaker_options) for host, port in endpoints]
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    def acquire(self):
+        """Reserve the least busy available backend, or None if all are unavailable"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [backend for backend in self.backends if backend.is_available(now)]
+            if not candidates:
+                return None
+
+            backend = min(candidates, key=lambda b: b.outstanding)
+            backend.outstanding += 1
+            if backend.state == OllamaBackend.HALF_OPEN:
+                backend.trial_in_flight = True
+            return backend
+
+    def release(self, backend, success, latency_ms, error=None):
+        """Return a backend reserved by acquire() and record the call outcome"""
+        with self._lock:
+            backend.outstanding -= 1
+            backend.record(success, latency_ms, error)
+
+    def probe(self, backend):
+        """Check a backend's health and update its breaker"""
+        start_time = time.time()
+        try:
+            response = requests.get(f"{backend.base_url}/api/tags", timeout=self.health_timeout)
+            response.raise_for_status()
+            healthy = True
+            error = None
+        except requests.exceptions.RequestException as e:
+            healthy = False
+            error = str(e)
+        latency_ms = int((time.time() - start_time) * 1000)
+
+        with self._lock:
+            # A healthy open backend still waits out its cooldown and recovers
+            # through a half-open trial call
+            if not healthy:
+                backend.last_error = error
+                backend.trip()
+            elif backend.state == OllamaBackend.CLOSED and latency_ms >= backend.latency_threshold_ms:
+                backend.trip()
+
+        return healthy
+
+    def probe_all(self):
+        """Probe every backend once"""
+        return {backend.base_url: self.probe(backend) for backend in self.backends}
+
+    def start_health_checks(self):
+        """Start the periodic background health probe thread"""
+        if self._health_thread or not self.health_interval:
+            return
+
+        def run():
+            while not self._stop.wait(self.health_interval):
+                try:
+                    self.probe_all()
+                except Exception as e:
+                    logging.error(f"Ollama health probe error: {e}")
+
+        self._health_thread = threading.Thread(target=run, name='ollama-health', daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        """Stop the background health probe thread"""
+        self._stop.set()
+        if self._health_thread:
+            self._health_thread.join(timeout=self.health_timeout + 1)
+            self._health_thread = None
+
+    def get_status(self):
+        """Get the status of every backend"""
+        with self._lock:
+            return [backend.to_dict() for backend in self.backends]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def parse_endpoints(hosts, default_port=11434):
+    """Parse a comma-separated list of host[:port] entries"""
+    endpoints = []
+    for entry in hosts.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if entry.startswith('http://'):
+            entry = entry[len('http://'):]
+        host, _, port = entry.rstrip('/').partition(':')
+        endpoints.append((host, int(port) if port else default_port))
+    return endpoints
+
+
+def get_ollama_pool(config):
+    """Get the process-wide Ollama pool, creating it from app config on first use"""
+    global _pool
+
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            default_port = config.get('OLLAMA_PORT', 11434)
+            hosts = config.get('OLLAMA_HOSTS')
+            if hosts:
+                endpoints = parse_endpoints(hosts, default_port)
+            else:
+                endpoints = [(config.get('OLLAMA_HOST', '10.102.109.66'), default_port)]
+
+            _pool = OllamaPool(
+                endpoints,
+                health_interval=config.get('OLLAMA_HEALTH_INTERVAL', 15),
+                window_size=config.get('OLLAMA_BREAKER_WINDOW', 20),
+                min_requests=config.get('OLLAMA_BREAKER_MIN_REQUESTS', 5),
+                error_threshold=config.get('OLLAMA_BREAKER_ERROR_THRESHOLD', 0.5),
+                latency_threshold_ms=config.get('OLLAMA_BREAKER_LATENCY_MS', 10000),
+                cooldown_seconds=config.get('OLLAMA_BREAKER_COOLDOWN', 30)
+            )
+            _pool.start_health_checks()
+
+    return _pool
@@ -0,0 +1,185 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full or a call can't finish in time"""
+
+
+def _encode(password):
+    # bcrypt only uses the first 72 bytes; older versions truncated silently
+    return password.encode('utf-8')[:72]
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, password_hash):
+    try:
+        return bcrypt.checkpw(_encode(password), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated bounded process pool
+
+    bcrypt is deliberately CPU bound, so a burst of logins on the WSGI threads
+    starves every other request. Hashes and checks run on max_workers
+    processes instead, and at most max_queue may be pending before callers
+    get PasswordHasherBusy. A call that doesn't finish within timeout seconds
+    raises PasswordHasherBusy too, but keeps its slot until the worker is
+    done with it; a pool broken by a crashed worker is replaced. With
+    max_workers=0 bcrypt runs on the calling thread. New hashes use the
+    given cost factor (rounds); needs_rehash() tells whether a stored hash
+    was made with a different one.
+    """
+
+    def __init__(self, max_workers=2, max_queue=64, rounds=12, timeout=10):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def hash(self, password):
+        """Hash a password with the configured cost factor"""
+        return self._call(_hash_password, password, self.rounds)
+
+    def check(self, password, password_hash):
+        """Check a password against a stored hash"""
+        if not password_hash:
+            return False
+        return self._call(_check_password, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        """Check if a stored hash was made with a different cost factor"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def _call(self, fn, *args):
+        if self.max_workers <= 0:
+            return fn(*args)
+
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+
+        try:
+            future = self._submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the worker finishes, even if the caller gives up waiting
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise PasswordHasherBusy()
+        except BrokenProcessPool:
+            # A worker died while running this call; later calls get a fresh pool
+            self._discard_executor()
+            raise PasswordHasherBusy()
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args):
+        """Submit to the pool, replacing it once if a crashed worker broke it"""
+        executor = self._get_executor()
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            return self._get_executor().submit(fn, *args)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers don't inherit the threads and sockets of the server process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _discard_executor(self, executor=None):
+        """Forget a broken pool (the current one by default) so the next call builds a new one"""
+        with self._lock:
+            if executor is None:
+                executor = self._executor
+            if executor is None or self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch of passwords spread over every worker process
+
+        Meant for bulk tooling such as user imports: it waits for the whole
+        batch and is not subject to the queue limit or timeout.
+        """
+        rounds = [self.rounds] * len(passwords)
+        if self.max_workers <= 0:
+            return list(map(_hash_password, passwords, rounds))
+        chunksize = max(1, len(passwords) // (self.max_workers * 4))
+        return list(self._get_executor().map(_hash_password, passwords, rounds, chunksize=chunksize))
+
+    def get_stats(self):
+        """Get hasher statistics"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'rounds': self.rounds,
+                'pending': self._pending,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out
+            }
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher(config):
+    """Get the process-wide password hasher, creating it from app config on first use"""
+    global _hasher
+
+    if _hasher is not None:
+        return _hasher
+
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = PasswordHasher(
+                max_workers=config.get('PASSWORD_HASH_WORKERS', 2),
+                max_queue=config.get('PASSWORD_HASH_QUEUE_SIZE', 64),
+                rounds=config.get('BCRYPT_LOG_ROUNDS', 12),
+                timeout=config.get('PASSWORD_HASH_TIMEOUT', 10)
+            )
+
+    return _hasher
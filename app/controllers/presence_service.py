@@ -0,0 +1,276 @@
+import logging
+import threading
+import time
+
+
+class InMemoryPresence:
+    """
+    Presence registry for a single process
+
+    Tracks every Socket.IO session id of every connected user, so a user with
+    several tabs stays online until the last one goes away. Sessions that stop
+    sending heartbeats expire after ttl seconds.
+    """
+
+    def __init__(self, ttl=90, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def _prune(self, user_id, now):
+        """Drop expired sessions of a user (lock held by caller)"""
+        sessions = self._sessions.get(user_id)
+        if sessions is None:
+            return
+
+        for sid in [sid for sid, expires_at in sessions.items() if expires_at <= now]:
+            del sessions[sid]
+        if not sessions:
+            del self._sessions[user_id]
+
+    def add(self, user_id, sid):
+        """
+        Register a session for a user
+
+        Returns:
+            bool: True if the user was offline before this session
+        """
+        with self._lock:
+            now = self.clock()
+            self._prune(user_id, now)
+            came_online = user_id not in self._sessions
+            self._sessions.setdefault(user_id, {})[sid] = now + self.ttl
+            return came_online
+
+    def remove(self, user_id, sid):
+        """
+        Unregister a session
+
+        Returns:
+            bool: True if this was the user's last live session
+        """
+        with self._lock:
+            sessions = self._sessions.get(user_id)
+            if not sessions:
+                return False
+
+            sessions.pop(sid, None)
+            self._prune(user_id, self.clock())
+            return user_id not in self._sessions
+
+    def heartbeat(self, user_id, sid):
+        """Extend a session's lifetime"""
+        return self.add(user_id, sid)
+
+    def is_online(self, user_id):
+        """Check whether a user has at least one live session"""
+        with self._lock:
+            self._prune(user_id, self.clock())
+            return user_id in self._sessions
+
+    def get_sids(self, user_id):
+        """Get a user's live session ids"""
+        with self._lock:
+            self._prune(user_id, self.clock())
+            return set(self._sessions.get(user_id, ()))
+
+    def online_user_ids(self):
+        """Get the ids of all online users"""
+        with self._lock:
+            now = self.clock()
+            for user_id in list(self._sessions):
+                self._prune(user_id, now)
+            return set(self._sessions)
+
+
+class RedisPresence:
+    """
+    Presence registry shared by every worker through Redis
+
+    Each user has a sorted set of session ids scored by expiry time, and a
+    global sorted set scores each online user by their latest session expiry.
+    Membership checks are a single ZCOUNT.
+    """
+
+    def __init__(self, url, ttl=90, prefix='presence', clock=time.time):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.clock = clock
+        self.online_key = f"{prefix}:online"
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}:user:{user_id}"
+
+    def _live_count(self, pipe, user_id, now):
+        key = self._user_key(user_id)
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zcard(key)
+
+    def add(self, user_id, sid):
+        """
+        Register a session for a user
+
+        Returns:
+            bool: True if the user was offline before this session
+        """
+        now = self.clock()
+        key = self._user_key(user_id)
+        expires_at = now + self.ttl
+
+        pipe = self.redis.pipeline()
+        self._live_count(pipe, user_id, now)
+        pipe.zadd(key, {sid: expires_at})
+        pipe.expire(key, self.ttl * 2)
+        pipe.zadd(self.online_key, {str(user_id): expires_at}, gt=True)
+        results = pipe.execute()
+
+        return results[1] == 0
+
+    def remove(self, user_id, sid):
+        """
+        Unregister a session
+
+        Returns:
+            bool: True if this was the user's last live session
+        """
+        now = self.clock()
+        key = self._user_key(user_id)
+
+        pipe = self.redis.pipeline()
+        pipe.zrem(key, sid)
+        self._live_count(pipe, user_id, now)
+        removed, _, remaining = pipe.execute()
+
+        if remaining == 0:
+            self.redis.zrem(self.online_key, str(user_id))
+        return bool(removed) and remaining == 0
+
+    def heartbeat(self, user_id, sid):
+        """Extend a session's lifetime"""
+        return self.add(user_id, sid)
+
+    def is_online(self, user_id):
+        """Check whether a user has at least one live session"""
+        return self.redis.zcount(self._user_key(user_id), f"({self.clock()}", '+inf') > 0
+
+    def get_sids(self, user_id):
+        """Get a user's live session ids"""
+        sids = self.redis.zrangebyscore(self._user_key(user_id), f"({self.clock()}", '+inf')
+        return {sid.decode('utf-8') for sid in sids}
+
+    def online_user_ids(self):
+        """Get the ids of all online users"""
+        now = self.clock()
+        self.redis.zremrangebyscore(self.online_key, '-inf', now)
+        return {int(user_id) for user_id in self.redis.zrange(self.online_key, 0, -1)}
+
+
+class PresenceBroadcaster:
+    """
+    Collects online/offline transitions and announces them in batches
+
+    When many clients reconnect together, announcing each one separately to
+    every follower multiplies into a burst of frames. Transitions are held
+    for a short window and handed to emit as one list; a user who went
+    offline and came back within the window is not announced at all.
+    """
+
+    def __init__(self, emit, window=1.0):
+        """
+        Args:
+            emit (callable): Called with a list of {user_id, handle, online, follower_ids} changes
+            window (float): Seconds to collect transitions before emitting; 0 emits immediately
+        """
+        self.emit = emit
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def record(self, user_id, handle, online, follower_ids):
+        """Record that a user came online or went offline, along with who should be told"""
+        with self._lock:
+            change = self._pending.get(user_id)
+            if change is None:
+                self._pending[user_id] = {
+                    'user_id': user_id,
+                    'handle': handle,
+                    'online': online,
+                    'follower_ids': follower_ids,
+                    'was_online': not online
+                }
+            else:
+                change['online'] = online
+                change['follower_ids'] = follower_ids
+
+            if self.window > 0 and self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if self.window <= 0:
+            self.flush()
+
+    def flush(self):
+        """
+        Emit pending transitions
+
+        Returns:
+            int: Number of users whose status change was emitted
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+
+        changes = [
+            {key: value for key, value in change.items() if key != 'was_online'}
+            for change in pending.values() if change['online'] != change['was_online']
+        ]
+        if changes:
+            try:
+                self.emit(changes)
+            except Exception as e:
+                logging.error(f"Error emitting presence changes: {e}")
+
+        return len(changes)
+
+
+_presence = None
+_presence_lock = threading.Lock()
+_broadcaster = None
+
+
+def get_presence(config):
+    """Get the process-wide presence registry, creating it from app config on first use"""
+    global _presence
+
+    if _presence is not None:
+        return _presence
+
+    with _presence_lock:
+        if _presence is None:
+            ttl = config.get('PRESENCE_TTL', 90)
+            if config.get('PRESENCE_BACKEND', 'memory') == 'redis':
+                _presence = RedisPresence(config.get('PRESENCE_REDIS_URL'), ttl=ttl)
+            else:
+                _presence = InMemoryPresence(ttl=ttl)
+
+    return _presence
+
+
+def get_presence_broadcaster(config, emit):
+    """Get the process-wide presence broadcaster, creating it from app config on first use"""
+    global _broadcaster
+
+    if _broadcaster is not None:
+        return _broadcaster
+
+    with _presence_lock:
+        if _broadcaster is None:
+            _broadcaster = PresenceBroadcaster(emit, window=config.get('PRESENCE_BROADCAST_WINDOW_MS', 1000) / 1000)
+
+    return _broadcaster
@@ -1,68 +1,203 @@
-from flask_socketio import emit, join_room, leave_room, disconnect
+from flask_socketio import emit, join_room, leave_room, disconnect, rooms, ConnectionRefusedError
 from flask_login import current_user
-from flask import request
+from flask import request, current_app
 from app import socketio, db
-from app.models import User, Message, Conversation, Notification
-from datetime import datetime
+from app.models import User, Post, Message, Conversation, Notification
+from app.models.user import last_seen_tracker
+from app.controllers.presence_service import get_presence, get_presence_broadcaster
+from app.controllers.connection_admission import get_connection_admission
+from app.controllers.engagement_aggregator import get_engagement_aggregator
+from app.controllers.typing_tracker import get_typing_tracker
+from app.controllers.event_replay import get_replay_buffer
+from app.controllers.translation_executor import get_translation_executor
 import json
 
-# Store active connections
-active_users = {}
+# Upper bound on post rooms a single socket may be subscribed to at once
+MAX_POST_SUBSCRIPTIONS = 200
+
+# Identity of each authenticated socket on this worker, captured at connect so
+# ephemeral events (typing, heartbeats) don't load the user on every event
+_identities = {}
+
+def presence():
+    """Get the presence registry shared by all workers"""
+    return get_presence(current_app.config)
+
+def presence_broadcaster():
+    """Get the broadcaster that batches online/offline announcements"""
+    return get_presence_broadcaster(current_app.config, emit_presence_batch)
+
+def typing_tracker():
+    """Get the tracker that rate-limits and expires typing indicators"""
+    return get_typing_tracker(current_app.config, emit_typing_stopped)
+
+def emit_to_user(user_id, event, data):
+    """
+    Emit an event to all of a user's sessions, keeping it for replay
+
+    The payload carries the user's next sequence number so a client that
+    reconnects can ask for exactly the events it missed.
+    """
+    payload = dict(data, seq=get_replay_buffer(current_app.config).append(user_id, event, data))
+    socketio.emit(event, payload, room=f"user_{user_id}")
+
+def socket_identity():
+    """Get (user_id, handle) of the current socket without touching the database, or None for guests"""
+    return _identities.get(request.sid)
+
+def conversation_room(user_id, other_user_id):
+    """Room shared by the two participants of a conversation"""
+    return f"conversation_{min(user_id, other_user_id)}_{max(user_id, other_user_id)}"
+
+def engagement_aggregator():
+    """Get the aggregator that batches post engagement updates"""
+    return get_engagement_aggregator(current_app.config, emit_engagement_batch)
+
+def follower_rooms(user_id, include_self=False):
+    """Get the personal rooms of a user's followers"""
+    room_names = [f"user_{follower_id}" for follower_id in User.get_follower_ids(user_id)]
+    if include_self:
+        room_names.append(f"user_{user_id}")
+    return room_names
+
+def author_summaries(users):
+    """
+    Compact, de-duplicated user objects for an event payload
+
+    Events reference users by id and carry each user once in 'authors',
+    without the counters of the full user object; clients keep a cache of
+    authors and hydrate the references before rendering.
+    """
+    summaries = {}
+    for user in users:
+        if user is not None and user.id not in summaries:
+            summaries[user.id] = user.to_summary_dict()
+    return list(summaries.values())
+
+def post_room(post_id):
+    """Room of the clients currently viewing a post"""
+    return f"post_{post_id}"
 
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
+    # Refuse connections beyond this worker's accept rate with a jittered retry delay
+    retry_after = get_connection_admission(current_app.config).admit()
+    if retry_after is not None:
+        raise ConnectionRefusedError({
+            'message': 'Server busy, retry later',
+            'retry_after': int(retry_after * 1000)
+        })
+    
     if current_user.is_authenticated:
-        # Update user's last seen
-        current_user.last_seen = datetime.utcnow()
-        db.session.commit()
+        # Update user's last seen (buffered, written in batches)
+        last_seen_tracker.record(current_user.id)
         
-        # Store user's session
-        active_users[current_user.id] = request.sid
+        # Register this session (users may have several tabs open)
+        came_online = presence().add(current_user.id, request.sid)
+        _identities[request.sid] = (current_user.id, current_user.handle)
         
-        # Join user's personal room for notifications
+        # Join user's personal room for notifications, followed users' posts and presence
         join_room(f"user_{current_user.id}")
         
-        # Join timeline room
-        join_room("timeline")
-        
         emit('connected', {
             'message': 'Connected successfully',
-            'user_id': current_user.id
+            'user_id': current_user.id,
+            # Where this session starts in the user's replayable event sequence
+            'last_seq': get_replay_buffer(current_app.config).current_seq(current_user.id)
         })
         
-        # Notify followers that user is online
-        emit('user_online', {
-            'user_id': current_user.id,
-            'handle': current_user.handle
-        }, room='timeline')
+        # Notify followers that user is online (only for their first session, batched)
+        if came_online:
+            presence_broadcaster().record(current_user.id, current_user.handle, online=True,
+                                          follower_ids=User.get_follower_ids(current_user.id))
         
         print(f"User {current_user.handle} connected")
     else:
-        # Allow anonymous users to join timeline
-        join_room("timeline")
+        # Guests only receive updates for the posts they subscribe to
         emit('connected', {'message': 'Connected as guest'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     if current_user.is_authenticated:
-        # Remove from active users
-        if current_user.id in active_users:
-            del active_users[current_user.id]
+        # Unregister this session
+        went_offline = presence().remove(current_user.id, request.sid)
+        _identities.pop(request.sid, None)
         
-        # Update last seen
-        current_user.last_seen = datetime.utcnow()
-        db.session.commit()
+        # Announce stops for conversations the user was typing in
+        for room_name in typing_tracker().clear_user(current_user.id):
+            emit_typing_stopped(current_user.id, current_user.handle, room_name)
         
-        # Notify followers that user is offline
-        emit('user_offline', {
-            'user_id': current_user.id,
-            'handle': current_user.handle
-        }, room='timeline')
+        # Update last seen (buffered, written in batches)
+        last_seen_tracker.record(current_user.id)
+        
+        # Notify followers that user is offline (only when their last session closed, batched)
+        if went_offline:
+            presence_broadcaster().record(current_user.id, current_user.handle, online=False,
+                                          follower_ids=User.get_follower_ids(current_user.id))
         
         print(f"User {current_user.handle} disconnected")
 
+@socketio.on('heartbeat')
+def handle_heartbeat():
+    """Keep this session's presence from expiring"""
+    identity = socket_identity()
+    if identity:
+        presence().heartbeat(identity[0], request.sid)
+
+@socketio.on('resume')
+def handle_resume(data):
+    """Replay the events a reconnecting client missed since last_seq"""
+    identity = socket_identity()
+    last_seq = data.get('last_seq') if isinstance(data, dict) else None
+    if not identity or not isinstance(last_seq, int):
+        return
+    
+    events, complete, seq = get_replay_buffer(current_app.config).since(identity[0], last_seq)
+    
+    # When missed events are no longer buffered the client falls back to refetching
+    emit('resumed', {
+        'complete': complete,
+        'events': [dict(event['data'], seq=event['seq'], event=event['event']) for event in events] if complete else [],
+        'last_seq': seq
+    })
+
+@socketio.on('subscribe_posts')
+def handle_subscribe_posts(data):
+    """Receive updates for the posts currently in the client's viewport"""
+    post_ids = data.get('post_ids') if isinstance(data, dict) else None
+    if not isinstance(post_ids, list):
+        emit('error', {'message': 'post_ids list required'})
+        return
+    
+    joined = set(rooms())
+    subscribed = sum(1 for room_name in joined if room_name.startswith('post_'))
+    new_post_ids = []
+    for post_id in post_ids:
+        if subscribed >= MAX_POST_SUBSCRIPTIONS:
+            break
+        if isinstance(post_id, int) and post_room(post_id) not in joined:
+            join_room(post_room(post_id))
+            joined.add(post_room(post_id))
+            new_post_ids.append(post_id)
+            subscribed += 1
+    
+    # Bring the counters up to date, e.g. after missing updates while reconnecting
+    if new_post_ids:
+        emit('post_engagement', {'updates': Post.get_engagement(new_post_ids)})
+
+@socketio.on('unsubscribe_posts')
+def handle_unsubscribe_posts(data):
+    """Stop receiving updates for posts that left the client's viewport"""
+    post_ids = data.get('post_ids') if isinstance(data, dict) else None
+    if not isinstance(post_ids, list):
+        return
+    
+    for post_id in post_ids:
+        if isinstance(post_id, int):
+            leave_room(post_room(post_id))
+
 @socketio.on('join_conversation')
 def handle_join_conversation(data):
     """Join a conversation room for real-time messaging"""
@@ -76,7 +211,7 @@ def handle_join_conversation(data):
         return
     
     # Create conversation room name (consistent ordering)
-    room_name = f"conversation_{min(current_user.id, other_user_id)}_{max(current_user.id, other_user_id)}"
+    room_name = conversation_room(current_user.id, other_user_id)
     join_room(room_name)
     
     emit('joined_conversation', {
@@ -94,7 +229,7 @@ def handle_leave_conversation(data):
     if not other_user_id:
         return
     
-    room_name = f"conversation_{min(current_user.id, other_user_id)}_{max(current_user.id, other_user_id)}"
+    room_name = conversation_room(current_user.id, other_user_id)
     leave_room(room_name)
     
     emit('left_conversation', {'room': room_name})
@@ -120,80 +255,53 @@ def handle_send_message(data):
         return
     
     try:
-        # Create message
-        message = Message(
-            sender_id=current_user.id,
-            recipient_id=recipient_id,
-            content=content,
-            original_language=current_user.preferred_language
+        message, conversation_id = Message.send(
+            current_user.id, recipient.id, content, current_user.preferred_language
         )
-        
-        db.session.add(message)
-        
-        # Update or create conversation
-        conversation = Conversation.get_or_create(current_user.id, recipient_id)
-        conversation.last_message_id = message.id
-        conversation.last_activity = datetime.utcnow()
-        
+        # Serialize before the commit expires the loaded objects
+        message_data = message_payload(message, conversation_id, current_user, recipient)
         db.session.commit()
-        
-        # Send to conversation room
-        room_name = f"conversation_{min(current_user.id, recipient_id)}_{max(current_user.id, recipient_id)}"
-        emit('new_message', {
-            'message': message.to_dict(),
-            'conversation_id': conversation.id
-        }, room=room_name)
-        
-        # Send notification to recipient if they're online
-        if recipient_id in active_users:
-            emit('message_notification', {
-                'sender': current_user.to_dict(),
-                'preview': content[:50] + '...' if len(content) > 50 else content,
-                'conversation_id': conversation.id
-            }, room=f"user_{recipient_id}")
-        
-        emit('message_sent', {
-            'message': message.to_dict(),
-            'conversation_id': conversation.id
-        })
-        
     except Exception as e:
         db.session.rollback()
         emit('error', {'message': 'Failed to send message'})
+        return
+    
+    emit_new_message(message_data)
+    emit('message_sent', message_data)
 
 @socketio.on('typing_start')
 def handle_typing_start(data):
-    """Handle typing indicator start"""
-    if not current_user.is_authenticated:
+    """Handle typing indicator start (may be sent on every keystroke)"""
+    identity = socket_identity()
+    other_user_id = data.get('user_id') if isinstance(data, dict) else None
+    if not identity or not isinstance(other_user_id, int):
         return
     
-    other_user_id = data.get('user_id')
-    if not other_user_id:
-        return
-    
-    room_name = f"conversation_{min(current_user.id, other_user_id)}_{max(current_user.id, other_user_id)}"
-    emit('user_typing', {
-        'user_id': current_user.id,
-        'handle': current_user.handle,
-        'typing': True
-    }, room=room_name, include_self=False)
+    user_id, handle = identity
+    room_name = conversation_room(user_id, other_user_id)
+    if typing_tracker().start(user_id, handle, room_name):
+        emit('user_typing', {
+            'user_id': user_id,
+            'handle': handle,
+            'typing': True
+        }, room=room_name, include_self=False)
 
 @socketio.on('typing_stop')
 def handle_typing_stop(data):
-    """Handle typing indicator stop"""
-    if not current_user.is_authenticated:
+    """Handle typing indicator stop (optional, typing also expires on the server)"""
+    identity = socket_identity()
+    other_user_id = data.get('user_id') if isinstance(data, dict) else None
+    if not identity or not isinstance(other_user_id, int):
         return
     
-    other_user_id = data.get('user_id')
-    if not other_user_id:
-        return
-    
-    room_name = f"conversation_{min(current_user.id, other_user_id)}_{max(current_user.id, other_user_id)}"
-    emit('user_typing', {
-        'user_id': current_user.id,
-        'handle': current_user.handle,
-        'typing': False
-    }, room=room_name, include_self=False)
+    user_id, handle = identity
+    room_name = conversation_room(user_id, other_user_id)
+    if typing_tracker().stop(user_id, room_name):
+        emit('user_typing', {
+            'user_id': user_id,
+            'handle': handle,
+            'typing': False
+        }, room=room_name, include_self=False)
 
 @socketio.on('mark_messages_read')
 def handle_mark_messages_read(data):
@@ -207,55 +315,191 @@ def handle_mark_messages_read(data):
     
     try:
         # Mark all unread messages in conversation as read
-        messages = Message.query.filter_by(
-            recipient_id=current_user.id,
-            is_read=False
-        ).join(Conversation).filter(Conversation.id == conversation_id).all()
-        
-        for message in messages:
-            message.mark_as_read()
+        conversation = Conversation.query.filter(
+            Conversation.id == conversation_id,
+            db.or_(
+                Conversation.user1_id == current_user.id,
+                Conversation.user2_id == current_user.id
+            )
+        ).first()
+        count = conversation.mark_read(current_user.id) if conversation else 0
         
         emit('messages_marked_read', {
             'conversation_id': conversation_id,
-            'count': len(messages)
+            'count': count
         })
         
     except Exception as e:
+        db.session.rollback()
         emit('error', {'message': 'Failed to mark messages as read'})
 
+@socketio.on('translate_stream')
+def handle_translate_stream(data):
+    """Stream a translation back to the requesting client as it is generated"""
+    from app.controllers.translation_service import TranslationService
+    from app.models import Post
+
+    request_id = data.get('request_id')
+    target_lang = data.get('target_lang') or data.get('lang')
+    context = data.get('context')
+
+    if data.get('post_id'):
+        post = Post.query.filter_by(id=data['post_id'], is_deleted=False).first()
+        if not post:
+            emit('translation_error', {'request_id': request_id, 'error': 'Post not found'})
+            return
+        content = post.content
+        source_lang = post.original_language
+        if post.parent:
+            context = post.parent.content[:100]  # First 100 chars as context
+    elif data.get('message_id'):
+        if not current_user.is_authenticated:
+            emit('translation_error', {'request_id': request_id, 'error': 'Authentication required'})
+            return
+        message = Message.query.get(data['message_id'])
+        if not message or current_user.id not in (message.sender_id, message.recipient_id) \
+                or not message.is_visible_to_user(current_user.id):
+            emit('translation_error', {'request_id': request_id, 'error': 'Message not found'})
+            return
+        content = message.content
+        source_lang = message.original_language
+    else:
+        content = (data.get('content') or '').strip()
+        source_lang = data.get('source_lang', 'en')
+
+    if not content:
+        emit('translation_error', {'request_id': request_id, 'error': 'Content is required'})
+        return
+
+    if not target_lang:
+        target_lang = current_user.preferred_language if current_user.is_authenticated else 'en'
+
+    # Generate on the bounded translation executor so streams can't tie up the socket workers
+    sid = request.sid
+
+    def send_partial(partial_content):
+        socketio.emit('translation_chunk', {
+            'request_id': request_id,
+            'translated_content': partial_content
+        }, to=sid)
+
+    def stream_translation():
+        try:
+            result = TranslationService().translate_content_stream(
+                content=content,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                context=context,
+                on_partial=send_partial
+            )
+        except Exception as e:
+            socketio.emit('translation_error', {'request_id': request_id, 'error': 'Translation service error'}, to=sid)
+            return {'success': False}
+
+        result = dict(result, request_id=request_id, target_language=target_lang)
+        socketio.emit('translation_complete', result, to=sid)
+        return result
+
+    job = get_translation_executor(current_app.config).submit(
+        current_app._get_current_object(), stream_translation, private=True
+    )
+    if not job:
+        emit('translation_error', {'request_id': request_id, 'error': 'Translation service busy, try again later'})
+
 # Helper functions to emit real-time updates from other parts of the app
 
 def emit_new_post(post):
-    """Emit new post to timeline"""
+    """Emit new post to its author's followers (and to viewers of the parent for replies)"""
+    room_names = follower_rooms(post.user_id, include_self=True)
+    if post.parent_id:
+        room_names.append(post_room(post.parent_id))
+    
     socketio.emit('new_post', {
-        'post': post.to_dict()
-    }, room='timeline')
+        'post': post.to_dict(include_author=False),
+        'authors': author_summaries([post.author])
+    }, to=room_names)
+
+def message_payload(message, conversation_id, sender, recipient):
+    """Serialize a sent message once for every event and response that carries it"""
+    return {
+        'message': message.to_dict(include_users=False),
+        'authors': author_summaries([sender, recipient]),
+        'conversation_id': conversation_id
+    }
+
+def emit_new_message(message_data):
+    """Deliver a sent message to both participants' sessions and notify the recipient (replayable after a reconnect)"""
+    message = message_data['message']
+    emit_to_user(message['recipient_id'], 'new_message', message_data)
+    if message['sender_id'] != message['recipient_id']:
+        emit_to_user(message['sender_id'], 'new_message', message_data)
+    
+    content = message['content']
+    emit_to_user(message['recipient_id'], 'message_notification', {
+        'sender_id': message['sender_id'],
+        'authors': message_data['authors'][:1],
+        'preview': content[:50] + '...' if len(content) > 50 else content,
+        'conversation_id': message_data['conversation_id']
+    })
 
 def emit_new_notification(user_id, notification):
     """Emit new notification to user"""
-    socketio.emit('new_notification', {
+    emit_to_user(user_id, 'new_notification', {
         'notification': notification.to_dict()
-    }, room=f"user_{user_id}")
+    })
 
 def emit_post_update(post):
-    """Emit post update (likes, shares, etc.)"""
-    socketio.emit('post_updated', {
-        'post': post.to_dict()
-    }, room='timeline')
+    """Queue a post's engagement counters (likes, shares, etc.) for the next batched frame"""
+    engagement_aggregator().record(post)
+
+def emit_engagement_batch(updates):
+    """Emit a batch of engagement deltas, one frame per post room so viewers only get the posts they watch"""
+    frames = {}
+    for update in updates:
+        frames.setdefault(post_room(update['id']), []).append(update)
+    
+    for room_name, room_updates in frames.items():
+        socketio.emit('post_engagement', {'updates': room_updates}, to=room_name)
 
 def emit_post_deleted(post_id):
-    """Emit post deletion to timeline"""
+    """Emit post deletion to clients viewing the post"""
     socketio.emit('post_deleted', {
         'post_id': post_id
-    }, room='timeline')
+    }, to=post_room(post_id))
+
+def emit_presence_batch(changes):
+    """Emit a batch of online/offline changes, one frame per follower covering everyone they follow"""
+    frames = {}
+    for change in changes:
+        payload = {'user_id': change['user_id'], 'handle': change['handle'], 'online': change['online']}
+        for follower_id in change['follower_ids']:
+            frames.setdefault(f"user_{follower_id}", []).append(payload)
+    
+    for room_name, room_changes in frames.items():
+        socketio.emit('presence_changed', {'changes': room_changes}, to=room_name)
 
 def emit_user_status(user_id, status):
-    """Emit user status change"""
-    socketio.emit('user_status_changed', {
+    """Emit user status change to the user's followers"""
+    room_names = follower_rooms(user_id)
+    if room_names:
+        socketio.emit('user_status_changed', {
+            'user_id': user_id,
+            'status': status
+        }, to=room_names)
+
+def emit_typing_stopped(user_id, handle, room_name):
+    """Emit that a user stopped typing in a conversation"""
+    socketio.emit('user_typing', {
         'user_id': user_id,
-        'status': status
-    }, room='timeline')
+        'handle': handle,
+        'typing': False
+    }, room=room_name)
+
+def emit_translation_job_complete(job):
+    """Emit a finished queued translation to the users that requested it"""
+    for user_id in job.user_ids:
+        emit_to_user(user_id, 'translation_job_complete', job.to_dict())
 
 def is_user_online(user_id):
     """Check if user is currently online"""
-    return user_id in active_users
+    return presence().is_online(user_id)
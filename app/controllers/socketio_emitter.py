@@ -0,0 +1,24 @@
+from flask_socketio import SocketIO
+from app.config import Config
+
+
+def create_emitter(message_queue=None, channel=None):
+    """
+    Create a write-only Socket.IO client for processes that don't serve sockets
+
+    Background jobs, cron tasks and CLI scripts can emit events through the
+    message queue, and whichever web worker holds the recipient's connection
+    delivers them.
+
+    Args:
+        message_queue (str, optional): Message queue URL, defaults to SOCKETIO_MESSAGE_QUEUE
+        channel (str, optional): Queue channel, defaults to SOCKETIO_CHANNEL
+
+    Returns:
+        SocketIO: An instance whose emit() publishes to the message queue
+    """
+    message_queue = message_queue or Config.SOCKETIO_MESSAGE_QUEUE
+    if not message_queue:
+        raise ValueError('SOCKETIO_MESSAGE_QUEUE must be set to emit from outside the web workers')
+
+    return SocketIO(message_queue=message_queue, channel=channel or Config.SOCKETIO_CHANNEL)
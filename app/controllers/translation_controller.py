@@ -1,11 +1,62 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app, url_for
 from flask_login import current_user
 from app.controllers.translation_service import TranslationService
+from app.controllers.translation_executor import get_translation_executor
 from app.models import Post, Message
 from app import db
 
+
+def _translate_post_job(post_id, target_lang, context):
+    """Translate a post on the translation executor"""
+    post = Post.query.get(post_id)
+    translation_service = TranslationService()
+    return {'post': translation_service.translate_post(post, target_lang, context)}
+
+
+def _translate_message_job(message_id, target_lang):
+    """Translate a message on the translation executor"""
+    message = Message.query.get(message_id)
+    translation_service = TranslationService()
+    return {'message': translation_service.translate_message(message, target_lang)}
+
+
+def _translate_text_job(content, source_lang, target_lang, context):
+    """Translate arbitrary text on the translation executor"""
+    translation_service = TranslationService()
+    return translation_service.translate_content(
+        content=content,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        context=context
+    )
+
+
 class TranslationController:
     
+    @staticmethod
+    def _queue_translation(fn, *args, dedupe_key=None, private=False):
+        """
+        Queue a translation on the translation executor
+
+        Returns 202 with a job handle; the result is pushed to the requesting
+        user's socket room and can be polled from /api/translate/jobs/<job_id>.
+        """
+        executor = get_translation_executor(current_app.config)
+        user_id = current_user.id if current_user.is_authenticated else None
+        
+        job = executor.submit(
+            current_app._get_current_object(), fn, *args,
+            user_id=user_id, dedupe_key=dedupe_key, private=private
+        )
+        if not job:
+            return jsonify({'error': 'Translation service busy, try again later'}), 503
+        
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'poll_url': url_for('api.translation_job', job_id=job.id)
+        }), 202
+    
     @staticmethod
     def translate_post(post_id):
         """Translate a specific post"""
@@ -22,10 +73,15 @@ class TranslationController:
         
         try:
             translation_service = TranslationService()
-            translated_post = translation_service.translate_post(post, target_lang, context)
+            result = translation_service.get_immediate_result(post.content, post.original_language, target_lang)
+            if not result:
+                return TranslationController._queue_translation(
+                    _translate_post_job, post.id, target_lang, context,
+                    dedupe_key=('post', post.id, target_lang)
+                )
             
             return jsonify({
-                'post': translated_post
+                'post': translation_service.build_post_result(post, target_lang, result)
             }), 200
             
         except Exception as e:
@@ -52,10 +108,15 @@ class TranslationController:
         
         try:
             translation_service = TranslationService()
-            translated_message = translation_service.translate_message(message, target_lang)
+            result = translation_service.get_immediate_result(message.content, message.original_language, target_lang)
+            if not result:
+                return TranslationController._queue_translation(
+                    _translate_message_job, message.id, target_lang,
+                    dedupe_key=('message', message.id, target_lang), private=True
+                )
             
             return jsonify({
-                'message': translated_message
+                'message': translation_service.build_message_result(message, target_lang, result)
             }), 200
             
         except Exception as e:
@@ -76,18 +137,30 @@ class TranslationController:
         
         try:
             translation_service = TranslationService()
-            result = translation_service.translate_content(
-                content=content,
-                source_lang=source_lang,
-                target_lang=target_lang,
-                context=context
-            )
+            result = translation_service.get_immediate_result(content, source_lang, target_lang)
+            if not result:
+                return TranslationController._queue_translation(
+                    _translate_text_job, content, source_lang, target_lang, context,
+                    dedupe_key=('text', content, source_lang, target_lang, context)
+                )
             
             return jsonify(result), 200
             
         except Exception as e:
             return jsonify({'error': 'Translation service error'}), 500
     
+    @staticmethod
+    def get_translation_job(job_id):
+        """Poll a queued translation"""
+        executor = get_translation_executor(current_app.config)
+        job = executor.get_job(job_id)
+        
+        user_id = current_user.id if current_user.is_authenticated else None
+        if not job or not job.is_visible_to_user(user_id):
+            return jsonify({'error': 'Translation job not found'}), 404
+        
+        return jsonify(job.to_dict()), 200 if job.is_finished else 202
+    
     @staticmethod
     def get_supported_languages():
         """Get list of supported languages"""
@@ -126,8 +199,11 @@ class TranslationController:
             translation_service = TranslationService()
             stats = translation_service.get_cache_stats()
             
+            executor = get_translation_executor(current_app.config)
+            
             return jsonify({
-                'stats': stats
+                'stats': stats,
+                'executor': executor.get_stats()
             }), 200
             
         except Exception as e:
@@ -140,10 +216,11 @@ class TranslationController:
             return jsonify({'error': 'Admin access required'}), 403
 
         days = request.args.get('days', 30, type=int)
+        max_entries = request.args.get('max_entries', type=int)
 
         try:
             translation_service = TranslationService()
-            deleted_count = translation_service.cleanup_old_cache(days)
+            deleted_count = translation_service.cleanup_old_cache(days, max_entries)
 
             return jsonify({
                 'message': f'Cleaned up {deleted_count} old translations',
@@ -176,7 +253,8 @@ class TranslationController:
                 'ollama_config': {
                     'host': translation_service.ollama_host,
                     'port': translation_service.ollama_port,
-                    'model': translation_service.ollama_model
+                    'model': translation_service.ollama_model,
+                    'backends': translation_service.ollama_pool.get_status()
                 },
                 'mongodb_connected': True,  # If we get here, MongoDB is working
                 'supported_languages': translation_service.supported_languages
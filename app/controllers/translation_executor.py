@@ -0,0 +1,182 @@
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TranslationJob:
+    """A translation queued on the translation executor"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    def __init__(self, dedupe_key=None, private=False):
+        self.id = uuid.uuid4().hex
+        self.user_ids = set()
+        self.dedupe_key = dedupe_key
+        self.private = private
+        self.status = self.QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+
+    @property
+    def is_finished(self):
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def is_visible_to_user(self, user_id):
+        """Private jobs are only visible to the users that requested them"""
+        return not self.private or user_id in self.user_ids
+
+    def to_dict(self):
+        """Convert job to dictionary"""
+        data = {
+            'job_id': self.id,
+            'status': self.status
+        }
+        if self.status == self.COMPLETED:
+            data['result'] = self.result
+        elif self.status == self.FAILED:
+            data['error'] = self.error
+        return data
+
+
+class TranslationExecutor:
+    """
+    Runs translations on a dedicated bounded thread pool
+
+    Keeps slow LLM calls off the WSGI request threads. At most max_workers
+    translations run at once and at most max_queue jobs may be pending; beyond
+    that submit() refuses new work. Identical pending requests share one job,
+    and finished jobs are kept for job_ttl seconds so clients can poll them.
+    """
+
+    def __init__(self, max_workers=4, max_queue=100, job_ttl=300):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translation')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending_by_key = {}
+        self._pending = 0
+        self.rejected = 0
+
+    def submit(self, app, fn, *args, user_id=None, dedupe_key=None, private=False):
+        """
+        Queue fn(*args) to run inside an app context
+
+        Args:
+            app: Flask application whose context the job runs in
+            fn (callable): Returns the job result as a JSON-serializable dict
+            user_id (int, optional): User to notify over Socket.IO on completion
+            dedupe_key (hashable, optional): Pending jobs with the same key are shared
+            private (bool): Only requesting users may poll the job
+
+        Returns:
+            TranslationJob or None: The job, or None if the queue is full
+        """
+        with self._lock:
+            self._expire_jobs()
+
+            if dedupe_key is not None and dedupe_key in self._pending_by_key:
+                job = self._pending_by_key[dedupe_key]
+                if user_id is not None:
+                    job.user_ids.add(user_id)
+                return job
+
+            if self._pending >= self.max_queue:
+                self.rejected += 1
+                return None
+
+            job = TranslationJob(dedupe_key=dedupe_key, private=private)
+            if user_id is not None:
+                job.user_ids.add(user_id)
+            self._jobs[job.id] = job
+            if dedupe_key is not None:
+                self._pending_by_key[dedupe_key] = job
+            self._pending += 1
+
+        self._executor.submit(self._run, app, job, fn, args)
+        return job
+
+    def _run(self, app, job, fn, args):
+        job.status = TranslationJob.RUNNING
+        try:
+            with app.app_context():
+                job.result = fn(*args)
+            job.status = TranslationJob.COMPLETED
+        except Exception as e:
+            logging.error(f"Translation job {job.id} failed: {e}")
+            job.error = 'Translation service error'
+            job.status = TranslationJob.FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                if job.dedupe_key is not None and self._pending_by_key.get(job.dedupe_key) is job:
+                    del self._pending_by_key[job.dedupe_key]
+            job.done.set()
+
+        if job.user_ids:
+            try:
+                from app.controllers.socketio_controller import emit_translation_job_complete
+                with app.app_context():
+                    emit_translation_job_complete(job)
+            except Exception as e:
+                logging.error(f"Failed to push translation job {job.id}: {e}")
+
+    def _expire_jobs(self):
+        """Drop finished jobs older than the TTL (lock held by caller)"""
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id):
+        """Get a job by id, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_stats(self):
+        """Get executor statistics"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'tracked_jobs': len(self._jobs),
+                'rejected': self.rejected
+            }
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and release the worker threads"""
+        self._executor.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_translation_executor(config):
+    """Get the process-wide translation executor, creating it from app config on first use"""
+    global _executor
+
+    if _executor is not None:
+        return _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = TranslationExecutor(
+                max_workers=config.get('TRANSLATION_WORKERS', 4),
+                max_queue=config.get('TRANSLATION_QUEUE_SIZE', 100),
+                job_ttl=config.get('TRANSLATION_JOB_TTL', 300)
+            )
+
+    return _executor
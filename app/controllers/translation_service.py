@@ -3,9 +3,9 @@ import json
 import hashlib
 import re
 from flask import current_app
-from datetime import datetime, timedelta
 import logging
 import time
+from app.controllers.ollama_pool import get_ollama_pool
 
 class TranslationService:
 
@@ -13,11 +13,17 @@ class TranslationService:
         self.ollama_host = current_app.config.get('OLLAMA_HOST', '10.102.109.66')
         self.ollama_port = current_app.config.get('OLLAMA_PORT', 11434)
         self.ollama_model = current_app.config.get('OLLAMA_MODEL', 'gemma3:1b')
+        self.ollama_timeout = current_app.config.get('OLLAMA_TIMEOUT', 30)
+        self.ollama_pool = get_ollama_pool(current_app.config)
         self.supported_languages = current_app.config.get('SUPPORTED_LANGUAGES', ['en', 'fr', 'pt', 'de', 'es'])
 
         # Regex patterns for mentions and hashtags
         self.mention_pattern = re.compile(r'@([a-zA-Z0-9_]+)')
         self.hashtag_pattern = re.compile(r'#([a-zA-Z0-9_]+)')
+        self.placeholder_pattern = re.compile(r'__(MENTION|HASHTAG)_(\d+)__')
+
+        # Sentence boundaries used to split content into translation memory segments
+        self.segment_pattern = re.compile(r'((?<=[.!?])\s+|\n+)')
 
     def _extract_preservable_elements(self, content):
         """
@@ -81,37 +87,171 @@ class TranslationService:
 
         return restored_content
     
-    def _get_cached_translation(self, content, source_lang, target_lang):
-        """Get translation from PostgreSQL cache"""
+    def _split_segments(self, content):
+        """
+        Split content into sentence segments for the translation memory
+
+        Returns:
+            tuple: (segments, separators) where separators[i] sits between
+            segments[i] and segments[i + 1]
+        """
+        parts = self.segment_pattern.split(content)
+        return parts[0::2], parts[1::2]
+
+    def _join_segments(self, segments, separators):
+        """Stitch segments back together with their original separators"""
+        joined = segments[0]
+        for separator, segment in zip(separators, segments[1:]):
+            joined += separator + segment
+        return joined
+
+    def _localize_placeholders(self, segment):
+        """
+        Renumber placeholders from zero within a segment
+
+        "Thanks __MENTION_2__!" and "Thanks __MENTION_0__!" are the same
+        sentence, so segments are keyed with locally numbered placeholders.
+
+        Returns:
+            tuple: (localized segment, mapping of local to original placeholders)
+        """
+        counters = {}
+        mapping = {}
+
+        def localize(match):
+            kind = match.group(1)
+            index = counters.get(kind, 0)
+            counters[kind] = index + 1
+            local_placeholder = f"__{kind}_{index}__"
+            mapping[local_placeholder] = match.group(0)
+            return local_placeholder
+
+        return self.placeholder_pattern.sub(localize, segment), mapping
+
+    def _globalize_placeholders(self, translated_segment, mapping):
+        """Map locally numbered placeholders back to the content's placeholders"""
+        return self.placeholder_pattern.sub(
+            lambda match: mapping.get(match.group(0), match.group(0)),
+            translated_segment
+        )
+
+    def _plan_translation(self, normalized_content, source_lang, target_lang):
+        """
+        Look up the full content and each of its segments in the cache
+
+        Args:
+            normalized_content (str): Content with mentions and hashtags replaced by placeholders
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+
+        Returns:
+            dict: The full cached translation (or None), the localized segments
+            with their placeholder mappings, separators, and per-segment cached
+            translations (None where the segment still needs the LLM)
+        """
+        segments, separators = self._split_segments(normalized_content)
+        localized = [self._localize_placeholders(segment) for segment in segments]
+
+        keys = {normalized_content}
+        keys.update(local for local, _ in localized if local.strip())
+        cached = self._get_cached_translations(keys, source_lang, target_lang, primary=normalized_content)
+
+        return {
+            'content': normalized_content,
+            'languages': (source_lang, target_lang),
+            'full_translation': cached.get(normalized_content),
+            'segments': localized,
+            'separators': separators,
+            # Whitespace-only segments need no translation
+            'translations': [cached.get(local) if local.strip() else local for local, _ in localized]
+        }
+
+    def _assemble_translation(self, plan):
+        """Stitch the per-segment translations of a plan into the full normalized translation"""
+        if plan['full_translation'] is not None:
+            return plan['full_translation']
+
+        if any(translation is None for translation in plan['translations']):
+            return None
+
+        return self._join_segments(
+            [self._globalize_placeholders(translation, mapping)
+             for translation, (_, mapping) in zip(plan['translations'], plan['segments'])],
+            plan['separators']
+        )
+
+    def _align_segments(self, plan, translated_content):
+        """
+        Pair source segments with the segments of a full-text translation
+
+        Only trusted when the translation has the same number of sentences and
+        every segment keeps exactly its own placeholders.
+
+        Returns:
+            list: (localized source segment, localized translated segment) pairs
+        """
+        translated_segments, _ = self._split_segments(translated_content)
+        if len(translated_segments) != len(plan['segments']):
+            return []
+
+        pairs = []
+        for (local_source, mapping), translated_segment in zip(plan['segments'], translated_segments):
+            if not local_source.strip():
+                continue
+
+            reverse_mapping = {original: local for local, original in mapping.items()}
+            placeholders = self.placeholder_pattern.findall(translated_segment)
+            found = {f"__{kind}_{index}__" for kind, index in placeholders}
+            if found != set(reverse_mapping):
+                return []
+
+            pairs.append((local_source, self.placeholder_pattern.sub(
+                lambda match: reverse_mapping[match.group(0)], translated_segment.strip()
+            )))
+
+        return pairs
+
+    def _remember_translation(self, plan, source_lang, target_lang, translated_content, translation_time_ms=None,
+                              segment_translations=None):
+        """Store a full translation and its segments in the translation memory"""
+        entries = {plan['content']: translated_content}
+
+        if segment_translations is None:
+            segment_translations = self._align_segments(plan, translated_content)
+        for local_source, local_translation in segment_translations:
+            entries.setdefault(local_source, local_translation)
+
+        self._cache_translations(entries, source_lang, target_lang, translation_time_ms, primary=plan['content'])
+
+    def _get_cached_translations(self, contents, source_lang, target_lang, primary=None):
+        """Get translations for several normalized texts from PostgreSQL cache in one query"""
         try:
             from app.models.translation_cache import TranslationCache
 
-            cached = TranslationCache.get_cached_translation(
-                content=content,
+            return TranslationCache.get_cached_translations(
+                contents=contents,
                 source_lang=source_lang,
-                target_lang=target_lang
+                target_lang=target_lang,
+                primary=primary
             )
 
-            if cached:
-                return cached.translated_content
-
-            return None
-
         except Exception as e:
             logging.error(f"Error retrieving cached translation: {e}")
-            return None
+            return {}
 
-    def _cache_translation(self, content, source_lang, target_lang, translated_content, translation_time_ms=None):
-        """Cache translation in PostgreSQL"""
+    def _cache_translations(self, entries, source_lang, target_lang, translation_time_ms=None, primary=None,
+                            hit=False):
+        """Cache normalized translations in PostgreSQL"""
         try:
             from app.models.translation_cache import TranslationCache
 
-            TranslationCache.cache_translation(
-                content=content,
+            TranslationCache.cache_translations(
+                entries=entries,
                 source_lang=source_lang,
                 target_lang=target_lang,
-                translated_content=translated_content,
-                translation_time_ms=translation_time_ms
+                translation_time_ms=translation_time_ms,
+                primary=primary,
+                hit=hit
             )
 
         except Exception as e:
@@ -119,7 +259,12 @@ class TranslationService:
     
     def _call_ollama_api(self, prompt):
         """Call Ollama API for translation"""
-        url = f"http://{self.ollama_host}:{self.ollama_port}/api/generate"
+        backend = self.ollama_pool.acquire()
+        if backend is None:
+            logging.warning("No Ollama backend available, skipping translation")
+            return None
+
+        url = f"{backend.base_url}/api/generate"
         
         payload = {
             "model": self.ollama_model,
@@ -132,20 +277,99 @@ class TranslationService:
             }
         }
         
+        start_time = time.time()
+        error = None
         try:
-            response = requests.post(url, json=payload, timeout=30)
+            response = requests.post(url, json=payload, timeout=self.ollama_timeout)
             response.raise_for_status()
             
             result = response.json()
             return result.get('response', '').strip()
             
         except requests.exceptions.RequestException as e:
+            error = str(e)
             logging.error(f"Ollama API error: {e}")
             return None
         except json.JSONDecodeError as e:
+            error = str(e)
             logging.error(f"JSON decode error: {e}")
             return None
+        finally:
+            latency_ms = int((time.time() - start_time) * 1000)
+            self.ollama_pool.release(backend, error is None, latency_ms, error)
     
+    def _call_ollama_api_stream(self, prompt, on_token=None):
+        """
+        Call Ollama API in streaming mode for translation
+
+        Ollama answers a streaming request with newline-delimited JSON objects,
+        each carrying the next fragment in ``response`` until one reports ``done``.
+
+        Args:
+            prompt (str): The translation prompt
+            on_token (callable, optional): Called with the accumulated text after each fragment
+
+        Returns:
+            str or None: The complete response text, or None on failure
+        """
+        backend = self.ollama_pool.acquire()
+        if backend is None:
+            logging.warning("No Ollama backend available, skipping translation")
+            return None
+
+        url = f"{backend.base_url}/api/generate"
+
+        payload = {
+            "model": self.ollama_model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": 0.3,  # Lower temperature for more consistent translations
+                "top_p": 0.9,
+                "max_tokens": 500
+            }
+        }
+
+        start_time = time.time()
+        error = None
+        try:
+            chunks = []
+            with requests.post(url, json=payload, stream=True, timeout=self.ollama_timeout) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line:
+                        continue
+
+                    data = json.loads(line)
+                    if data.get('error'):
+                        error = data['error']
+                        logging.error(f"Ollama stream error: {error}")
+                        return None
+
+                    token = data.get('response', '')
+                    if token:
+                        chunks.append(token)
+                        if on_token:
+                            on_token(''.join(chunks))
+
+                    if data.get('done'):
+                        break
+
+            return ''.join(chunks).strip()
+
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+            logging.error(f"Ollama API error: {e}")
+            return None
+        except json.JSONDecodeError as e:
+            error = str(e)
+            logging.error(f"JSON decode error: {e}")
+            return None
+        finally:
+            latency_ms = int((time.time() - start_time) * 1000)
+            self.ollama_pool.release(backend, error is None, latency_ms, error)
+
     def _create_translation_prompt(self, content, source_lang, target_lang, context=None, has_placeholders=False):
         """Create a prompt for translation that preserves context"""
 
@@ -180,20 +404,9 @@ Translate the following {source_name} text to {target_name}, preserving:
 
         return prompt
     
-    def translate_content(self, content, source_lang, target_lang, context=None):
-        """
-        Translate content from source language to target language
-        
-        Args:
-            content (str): Content to translate
-            source_lang (str): Source language code (e.g., 'en')
-            target_lang (str): Target language code (e.g., 'fr')
-            context (str, optional): Additional context for better translation
-            
-        Returns:
-            dict: Translation result with success status and translated content
-        """
-        
+    def _check_languages(self, content, source_lang, target_lang):
+        """Get the result for unsupported or same-language requests, or None"""
+
         # Validate languages
         if source_lang not in self.supported_languages or target_lang not in self.supported_languages:
             return {
@@ -201,7 +414,7 @@ Translate the following {source_name} text to {target_name}, preserving:
                 'error': 'Unsupported language',
                 'translated_content': content
             }
-        
+
         # If source and target are the same, return original
         if source_lang == target_lang:
             return {
@@ -209,31 +422,109 @@ Translate the following {source_name} text to {target_name}, preserving:
                 'translated_content': content,
                 'cached': False
             }
+
+        return None
+
+    def _cached_result(self, plan, preservable_elements):
+        """Build the result for a plan fully answered by the translation memory"""
+        translated_content = self._assemble_translation(plan)
+        if translated_content is None:
+            return None
+
+        if plan['full_translation'] is None:
+            # Remember the stitched text so the next lookup is a single hit; this one counts as a hit too
+            self._cache_translations(
+                {plan['content']: translated_content}, *plan['languages'], primary=plan['content'], hit=True
+            )
+
+        return {
+            'success': True,
+            'translated_content': self._restore_preservable_elements(
+                translated_content,
+                preservable_elements['mention_placeholders'],
+                preservable_elements['hashtag_placeholders']
+            ),
+            'cached': True
+        }
+
+    def get_immediate_result(self, content, source_lang, target_lang):
+        """
+        Get a translation result that can be produced without calling the LLM
+
+        Args:
+            content (str): Content to translate
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+
+        Returns:
+            dict or None: The result for unsupported languages, same-language
+            requests and cache hits, or None if the LLM must be called
+        """
+        language_result = self._check_languages(content, source_lang, target_lang)
+        if language_result:
+            return language_result
+
+        preservable_elements = self._extract_preservable_elements(content)
+        plan = self._plan_translation(preservable_elements['placeholder_content'], source_lang, target_lang)
+
+        return self._cached_result(plan, preservable_elements)
+
+    def translate_content(self, content, source_lang, target_lang, context=None):
+        """
+        Translate content from source language to target language
+
+        The cache is keyed on the placeholder-normalized text, so posts that only
+        differ in their mentions or hashtags share entries. Content is also split
+        into sentences; only sentences missing from the translation memory are
+        sent to the LLM and cached sentences are stitched back in.
+        
+        Args:
+            content (str): Content to translate
+            source_lang (str): Source language code (e.g., 'en')
+            target_lang (str): Target language code (e.g., 'fr')
+            context (str, optional): Additional context for better translation
+            
+        Returns:
+            dict: Translation result with success status and translated content
+        """
+        
+        language_result = self._check_languages(content, source_lang, target_lang)
+        if language_result:
+            return language_result
         
         # Extract mentions and hashtags before translation
         preservable_elements = self._extract_preservable_elements(content)
-        content_to_translate = preservable_elements['placeholder_content']
-        has_placeholders = bool(preservable_elements['mention_placeholders'] or preservable_elements['hashtag_placeholders'])
+        plan = self._plan_translation(preservable_elements['placeholder_content'], source_lang, target_lang)
 
-        # Check cache first (using original content as cache key)
-        cached_translation = self._get_cached_translation(content, source_lang, target_lang)
-        if cached_translation:
-            return {
-                'success': True,
-                'translated_content': cached_translation,
-                'cached': True
-            }
+        cached_result = self._cached_result(plan, preservable_elements)
+        if cached_result:
+            return cached_result
 
-        # Create translation prompt with placeholder content
-        prompt = self._create_translation_prompt(content_to_translate, source_lang, target_lang, context, has_placeholders)
+        translatable = [i for i, (local, _) in enumerate(plan['segments']) if local.strip()]
+        missing = [i for i in translatable if plan['translations'][i] is None]
 
-        # Call Ollama API with timing
         start_time = time.time()
-        translated_content = self._call_ollama_api(prompt)
-        end_time = time.time()
-        translation_time_ms = int((end_time - start_time) * 1000)
+        if len(missing) == len(translatable):
+            # Nothing reusable: translate the whole text in one call for best context
+            translated_content = self._translate_normalized(plan['content'], source_lang, target_lang, context)
+            segment_translations = None
+        else:
+            segment_translations = []
+            for i in missing:
+                local_source = plan['segments'][i][0]
+                local_translation = self._translate_normalized(local_source, source_lang, target_lang, context)
+                if not local_translation:
+                    break
+                plan['translations'][i] = local_translation
+                segment_translations.append((local_source, local_translation))
+            translated_content = self._assemble_translation(plan)
+        translation_time_ms = int((time.time() - start_time) * 1000)
 
         if translated_content:
+            self._remember_translation(
+                plan, source_lang, target_lang, translated_content, translation_time_ms, segment_translations
+            )
+
             # Restore mentions and hashtags in the translated content
             final_translated_content = self._restore_preservable_elements(
                 translated_content,
@@ -241,14 +532,13 @@ Translate the following {source_name} text to {target_name}, preserving:
                 preservable_elements['hashtag_placeholders']
             )
 
-            # Cache the translation with timing information (using original content as key)
-            self._cache_translation(content, source_lang, target_lang, final_translated_content, translation_time_ms)
-
             return {
                 'success': True,
                 'translated_content': final_translated_content,
                 'cached': False,
                 'translation_time_ms': translation_time_ms,
+                'segments_total': len(translatable),
+                'segments_cached': len(translatable) - len(missing),
                 'preserved_mentions': preservable_elements['mentions'],
                 'preserved_hashtags': preservable_elements['hashtags']
             }
@@ -258,7 +548,85 @@ Translate the following {source_name} text to {target_name}, preserving:
                 'error': 'Translation service unavailable',
                 'translated_content': content
             }
+
+    def _translate_normalized(self, normalized_content, source_lang, target_lang, context=None):
+        """Translate placeholder-normalized text with a single LLM call"""
+        has_placeholders = bool(self.placeholder_pattern.search(normalized_content))
+        prompt = self._create_translation_prompt(normalized_content, source_lang, target_lang, context, has_placeholders)
+        return self._call_ollama_api(prompt)
     
+    def translate_content_stream(self, content, source_lang, target_lang, context=None, on_partial=None):
+        """
+        Translate content while streaming partial output as it is generated
+
+        Behaves like translate_content, but the LLM output is consumed token by
+        token and each partial translation (with mentions and hashtags restored)
+        is handed to on_partial. Cached translations are returned immediately
+        without invoking the callback.
+
+        Args:
+            content (str): Content to translate
+            source_lang (str): Source language code (e.g., 'en')
+            target_lang (str): Target language code (e.g., 'fr')
+            context (str, optional): Additional context for better translation
+            on_partial (callable, optional): Called with each partial translation
+
+        Returns:
+            dict: Translation result with success status and translated content
+        """
+
+        language_result = self._check_languages(content, source_lang, target_lang)
+        if language_result:
+            return language_result
+
+        preservable_elements = self._extract_preservable_elements(content)
+        plan = self._plan_translation(preservable_elements['placeholder_content'], source_lang, target_lang)
+
+        cached_result = self._cached_result(plan, preservable_elements)
+        if cached_result:
+            return cached_result
+
+        has_placeholders = bool(preservable_elements['mention_placeholders'] or preservable_elements['hashtag_placeholders'])
+        prompt = self._create_translation_prompt(
+            plan['content'], source_lang, target_lang, context, has_placeholders
+        )
+
+        def handle_token(partial_content):
+            if on_partial:
+                on_partial(self._restore_preservable_elements(
+                    partial_content.lstrip(),
+                    preservable_elements['mention_placeholders'],
+                    preservable_elements['hashtag_placeholders']
+                ))
+
+        start_time = time.time()
+        translated_content = self._call_ollama_api_stream(prompt, on_token=handle_token)
+        translation_time_ms = int((time.time() - start_time) * 1000)
+
+        if not translated_content:
+            return {
+                'success': False,
+                'error': 'Translation service unavailable',
+                'translated_content': content
+            }
+
+        self._remember_translation(plan, source_lang, target_lang, translated_content, translation_time_ms)
+
+        final_translated_content = self._restore_preservable_elements(
+            translated_content,
+            preservable_elements['mention_placeholders'],
+            preservable_elements['hashtag_placeholders']
+        )
+
+        return {
+            'success': True,
+            'translated_content': final_translated_content,
+            'cached': False,
+            'translation_time_ms': translation_time_ms,
+            'preserved_mentions': preservable_elements['mentions'],
+            'preserved_hashtags': preservable_elements['hashtags']
+        }
+
     def translate_post(self, post, target_lang, context=None):
         """
         Translate a post object to target language
@@ -279,6 +647,10 @@ Translate the following {source_name} text to {target_name}, preserving:
             context=context
         )
         
+        return self.build_post_result(post, target_lang, result)
+    
+    def build_post_result(self, post, target_lang, result):
+        """Merge a translation result into the post's dictionary"""
         post_data = post.to_dict()
         post_data['translated_content'] = result['translated_content']
         post_data['translation_success'] = result['success']
@@ -308,6 +680,10 @@ Translate the following {source_name} text to {target_name}, preserving:
             target_lang=target_lang
         )
         
+        return self.build_message_result(message, target_lang, result)
+    
+    def build_message_result(self, message, target_lang, result):
+        """Merge a translation result into the message's dictionary"""
         message_data = message.to_dict()
         message_data['translated_content'] = result['translated_content']
         message_data['translation_success'] = result['success']
@@ -321,36 +697,14 @@ Translate the following {source_name} text to {target_name}, preserving:
     
     def get_cache_stats(self):
         """Get translation cache statistics"""
-        total_translations = self.translations_collection.count_documents({})
-        
-        # Get stats by language pair
-        pipeline = [
-            {
-                '$group': {
-                    '_id': {
-                        'source_lang': '$source_lang',
-                        'target_lang': '$target_lang'
-                    },
-                    'count': {'$sum': 1}
-                }
-            },
-            {'$sort': {'count': -1}}
-        ]
-        
-        language_pairs = list(self.translations_collection.aggregate(pipeline))
-        
-        return {
-            'total_translations': total_translations,
-            'language_pairs': language_pairs,
-            'supported_languages': self.supported_languages
-        }
+        from app.models.translation_cache import TranslationCache
+
+        stats = TranslationCache.get_cache_stats()
+        stats['supported_languages'] = self.supported_languages
+        return stats
     
-    def cleanup_old_cache(self, days=30):
-        """Clean up old cached translations"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        result = self.translations_collection.delete_many({
-            'last_accessed': {'$lt': cutoff_date}
-        })
-        
-        return result.deleted_count
+    def cleanup_old_cache(self, days=30, max_entries=None):
+        """Evict cached translations not accessed within the given number of days"""
+        from app.models.translation_cache import TranslationCache
+
+        return TranslationCache.cleanup_old_entries(days_old=days, max_entries=max_entries)
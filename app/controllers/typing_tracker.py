@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+
+
+class TypingTracker:
+    """
+    Server-side typing state for conversation rooms
+
+    Clients report typing on every keystroke. Only the first report, and at
+    most one refresh every min_interval seconds, is forwarded to the room.
+    Typing state expires ttl seconds after the last report and the stop is
+    announced by the server, so clients don't have to send stop events.
+    """
+
+    def __init__(self, emit_stopped, ttl=5.0, min_interval=2.0, sweep_interval=1.0, clock=time.monotonic):
+        """
+        Args:
+            emit_stopped (callable): Called with (user_id, handle, room) when typing state expires
+            ttl (float): Seconds after the last report before typing expires
+            min_interval (float): Minimum seconds between forwarded reports per user per room
+            sweep_interval (float): Seconds between expiry checks
+        """
+        self.emit_stopped = emit_stopped
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._typing = {}
+        self._sweeper = None
+
+    def start(self, user_id, handle, room):
+        """
+        Record a typing report
+
+        Returns:
+            bool: True if the report should be forwarded to the room
+        """
+        now = self.clock()
+        key = (user_id, room)
+        with self._lock:
+            state = self._typing.get(key)
+            if state is not None and now - state['emitted_at'] < self.min_interval:
+                state['expires_at'] = now + self.ttl
+                return False
+
+            self._typing[key] = {'handle': handle, 'expires_at': now + self.ttl, 'emitted_at': now}
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep, daemon=True)
+                self._sweeper.start()
+            return True
+
+    def stop(self, user_id, room):
+        """
+        Clear typing state explicitly
+
+        Returns:
+            bool: True if the user was typing, so the stop should be forwarded
+        """
+        with self._lock:
+            return self._typing.pop((user_id, room), None) is not None
+
+    def clear_user(self, user_id):
+        """
+        Clear a user's typing state in every room
+
+        Returns:
+            list: Rooms the user was typing in
+        """
+        with self._lock:
+            keys = [key for key in self._typing if key[0] == user_id]
+            for key in keys:
+                del self._typing[key]
+        return [room for _, room in keys]
+
+    def expire(self):
+        """
+        Drop expired typing state and announce the stops
+
+        Returns:
+            int: Number of expired entries
+        """
+        now = self.clock()
+        with self._lock:
+            expired = [(key, state) for key, state in self._typing.items() if state['expires_at'] <= now]
+            for key, _ in expired:
+                del self._typing[key]
+
+        for (user_id, room), state in expired:
+            try:
+                self.emit_stopped(user_id, state['handle'], room)
+            except Exception as e:
+                logging.error(f"Error emitting typing stop: {e}")
+
+        return len(expired)
+
+    def _sweep(self):
+        """Expire typing state until nobody is typing"""
+        while True:
+            time.sleep(self.sweep_interval)
+            self.expire()
+            with self._lock:
+                if not self._typing:
+                    self._sweeper = None
+                    return
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_typing_tracker(config, emit_stopped):
+    """Get the process-wide typing tracker, creating it from app config on first use"""
+    global _tracker
+
+    if _tracker is not None:
+        return _tracker
+
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = TypingTracker(
+                emit_stopped,
+                ttl=config.get('TYPING_TTL', 5),
+                min_interval=config.get('TYPING_MIN_INTERVAL', 2)
+            )
+
+    return _tracker
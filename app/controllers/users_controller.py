@@ -33,6 +33,10 @@ class UsersController:
             }
         })
         
+        # Online status comes from the presence registry, not last_seen
+        from app.controllers.socketio_controller import is_user_online
+        profile_data['is_online'] = is_user_online(user.id)
+        
         # Add follow status if user is authenticated
         if current_user.is_authenticated:
             profile_data['is_following'] = current_user.is_following(user)
@@ -1,6 +1,6 @@
 from .user import User
 from .post import Post, PostImage
-from .message import Message, Conversation
+from .message import Message, Conversation, MessageStats
 from .notification import Notification, Report
 from .translation_cache import TranslationCache
 
@@ -10,6 +10,7 @@ __all__ = [
     'PostImage',
     'Message',
     'Conversation',
+    'MessageStats',
     'Notification',
     'Report',
     'TranslationCache'
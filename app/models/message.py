@@ -1,10 +1,24 @@
 from datetime import datetime
+import re
+from sqlalchemy import event, DDL
+from sqlalchemy.dialects import postgresql, sqlite
 from app import db
 
+
+def upsert_insert(model):
+    """INSERT construct with ON CONFLICT support for the database in use"""
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    return dialect.insert(model)
+
+
 class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Conversations reference their last message too, so this side is added with ALTER
+    conversation_id = db.Column(db.Integer, db.ForeignKey(
+        'conversation.id', ondelete='SET NULL', use_alter=True, name='fk_message_conversation_id'
+    ))
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     is_read = db.Column(db.Boolean, default=False)
@@ -13,9 +27,16 @@ class Message(db.Model):
     is_deleted_by_recipient = db.Column(db.Boolean, default=False)
     original_language = db.Column(db.String(5), default='en')
     
+    # Keyset pagination within a conversation
+    __table_args__ = (
+        db.Index('idx_message_conversation_created', 'conversation_id', 'created_at', 'id'),
+    )
+    
     def mark_as_read(self):
         """Mark message as read"""
-        self.is_read = True
+        if not self.is_read:
+            self.is_read = True
+            Conversation.decrement_unread(self.sender_id, self.recipient_id)
         db.session.commit()
     
     def save_message(self):
@@ -29,10 +50,18 @@ class Message(db.Model):
             self.is_deleted_by_sender = True
         elif user_id == self.recipient_id:
             self.is_deleted_by_recipient = True
+            # A message the recipient removed no longer counts as unread
+            if not self.is_read:
+                self.is_read = True
+                Conversation.decrement_unread(self.sender_id, self.recipient_id)
         
         # If both users deleted, remove from database
         if self.is_deleted_by_sender and self.is_deleted_by_recipient:
             db.session.delete(self)
+            MessageStats.apply(MessageStats.merge(
+                {self.sender_id: {'sent_count': -1}},
+                {self.recipient_id: {'received_count': -1}}
+            ))
         
         db.session.commit()
     
@@ -44,20 +73,158 @@ class Message(db.Model):
             return False
         return True
     
-    def to_dict(self):
-        """Convert message to dictionary for JSON serialization"""
-        return {
+    def to_dict(self, include_users=True):
+        """Convert message to dictionary for JSON serialization (events reference users by id)"""
+        data = {
             'id': self.id,
+            'conversation_id': self.conversation_id,
             'sender_id': self.sender_id,
             'recipient_id': self.recipient_id,
-            'sender': self.sender.to_dict() if self.sender else None,
-            'recipient': self.recipient.to_dict() if self.recipient else None,
             'content': self.content,
             'created_at': self.created_at.isoformat(),
             'is_read': self.is_read,
             'is_saved': self.is_saved,
             'original_language': self.original_language
         }
+        
+        if include_users:
+            data['sender'] = self.sender.to_dict() if self.sender else None
+            data['recipient'] = self.recipient.to_dict() if self.recipient else None
+        
+        return data
+    
+    @staticmethod
+    def send(sender_id, recipient_id, content, original_language='en'):
+        """
+        Store a message and record it on its conversation, without committing
+        
+        The conversation is upserted in one statement that returns its id,
+        the message is inserted into it (its id comes back through RETURNING)
+        and becomes the conversation's last message, so the caller's commit
+        is the only transaction of the send.
+        
+        Returns:
+            tuple: (message, conversation_id)
+        """
+        created_at = datetime.utcnow()
+        conversation_id, is_new = Conversation.record_message(sender_id, recipient_id, created_at)
+        
+        new_conversation = {'conversation_count': 1} if is_new else {}
+        MessageStats.apply(MessageStats.merge(
+            {sender_id: dict(new_conversation, sent_count=1)},
+            {recipient_id: dict(new_conversation, received_count=1, unread_count=1)}
+        ))
+        
+        message = Message(
+            conversation_id=conversation_id,
+            sender_id=sender_id,
+            recipient_id=recipient_id,
+            content=content,
+            original_language=original_language,
+            created_at=created_at
+        )
+        db.session.add(message)
+        db.session.flush()
+        
+        # Concurrent sends may flush out of order; never move last_message_id backwards
+        Conversation.query.filter(
+            Conversation.id == conversation_id,
+            db.or_(Conversation.last_message_id.is_(None), Conversation.last_message_id < message.id)
+        ).update({'last_message_id': message.id}, synchronize_session=False)
+        
+        return message, conversation_id
+    
+    @staticmethod
+    def get_page(conversation_id, user_id, before=None, limit=50):
+        """
+        Get a page of a conversation's messages visible to user_id, in chronological order
+        
+        Args:
+            conversation_id (int): The conversation
+            user_id (int): The participant reading it
+            before (int, optional): Only return messages older than this message id
+            limit (int): Maximum number of messages
+            
+        Returns:
+            tuple: (messages, has_more)
+        """
+        query = Message.query.filter(
+            Message.conversation_id == conversation_id,
+            ~((Message.sender_id == user_id) & (Message.is_deleted_by_sender == True)),
+            ~((Message.recipient_id == user_id) & (Message.is_deleted_by_recipient == True))
+        )
+        
+        if before is not None:
+            cursor = db.session.query(Message.created_at, Message.id).filter(
+                Message.id == before,
+                Message.conversation_id == conversation_id
+            ).first()
+            if cursor is None:
+                return [], False
+            query = query.filter(db.tuple_(Message.created_at, Message.id) < tuple(cursor))
+        
+        # One extra row tells whether there is an older page
+        messages = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1).all()
+        has_more = len(messages) > limit
+        
+        return messages[:limit][::-1], has_more
+    
+    @staticmethod
+    def search_terms(text):
+        """Split a search query into the lowercase words that must all match, at underscores too as PostgreSQL does"""
+        return re.findall(r'[^\W_]+', text.lower())
+    
+    @staticmethod
+    def search(user_id, text):
+        """
+        Query the messages visible to user_id with a word starting with each word of text, newest first
+        
+        On PostgreSQL the words are matched as prefixes through the full-text
+        index on content and combined with the sender/recipient indexes; other
+        databases fall back to substring matching.
+        """
+        terms = Message.search_terms(text)
+        
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Terms are letters and digits only, so they need no tsquery escaping
+            match = db.func.to_tsvector('simple', Message.content).op('@@')(
+                db.func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+            )
+        else:
+            match = db.and_(*(db.func.lower(Message.content).contains(term, autoescape=True) for term in terms))
+        
+        return Message.query.filter(
+            db.or_(
+                (Message.sender_id == user_id) & (Message.is_deleted_by_sender == False),
+                (Message.recipient_id == user_id) & (Message.is_deleted_by_recipient == False)
+            ),
+            match
+        ).order_by(Message.created_at.desc(), Message.id.desc())
+    
+    @staticmethod
+    def highlight(content, text):
+        """
+        Find where the words of a search query occur in content
+        
+        Like the PostgreSQL search, a query word matches the start of a word
+        in content.
+        
+        Returns:
+            list: Non-overlapping [start, end) character ranges, in order
+        """
+        ranges = []
+        lowered = content.lower()
+        for term in Message.search_terms(text):
+            pattern = r'(?<![^\W_])' + re.escape(term)
+            ranges.extend([match.start(), match.end()] for match in re.finditer(pattern, lowered))
+        
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
     
     @staticmethod
     def get_conversation(user1_id, user2_id, limit=50):
@@ -73,20 +240,102 @@ class Message(db.Model):
         return messages[::-1]  # Reverse to get chronological order
     
     @staticmethod
-    def cleanup_ephemeral_messages(user_id):
-        """Clean up ephemeral messages for user on logout"""
-        ephemeral_messages = Message.query.filter(
-            ((Message.sender_id == user_id) | (Message.recipient_id == user_id)) &
-            (Message.is_saved == False)
-        ).all()
+    def cleanup_ephemeral_messages(user_id, before=None):
+        """
+        Clean up ephemeral messages for user on logout
+        
+        Hides every unsaved message on the user's side with one UPDATE per
+        side, deletes the messages now hidden on both sides and refreshes the
+        user's conversations, all in one transaction.
+        
+        Args:
+            user_id (int): User who logged out
+            before (datetime, optional): Only hide messages created up to this
+                time (the logout), so a deferred cleanup spares messages of a
+                session that started since
         
-        for message in ephemeral_messages:
-            message.delete_for_user(user_id)
+        Returns:
+            int: Number of messages deleted from the database
+        """
+        ephemeral = [Message.is_saved == False]
+        if before is not None:
+            ephemeral.append(Message.created_at <= before)
+        
+        hidden_unread = Message.query.filter(
+            Message.recipient_id == user_id,
+            *ephemeral,
+            Message.is_deleted_by_recipient == False,
+            Message.is_read == False
+        ).count()
+        
+        Message.query.filter(
+            Message.sender_id == user_id,
+            *ephemeral,
+            Message.is_deleted_by_sender == False
+        ).update({'is_deleted_by_sender': True}, synchronize_session=False)
+        
+        # A message the recipient removed no longer counts as unread
+        Message.query.filter(
+            Message.recipient_id == user_id,
+            *ephemeral,
+            Message.is_deleted_by_recipient == False
+        ).update({'is_deleted_by_recipient': True, 'is_read': True}, synchronize_session=False)
+        
+        deleted_by_both = db.select(Message.id).where(
+            db.or_(Message.sender_id == user_id, Message.recipient_id == user_id),
+            Message.is_deleted_by_sender == True,
+            Message.is_deleted_by_recipient == True
+        )
+        user_conversations = Conversation.query.filter(
+            db.or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id)
+        )
+        
+        # Release the conversations' references before deleting the rows they point at
+        user_conversations.filter(Conversation.last_message_id.in_(deleted_by_both)).update(
+            {'last_message_id': None}, synchronize_session=False
+        )
+        deleted_pairs = db.session.query(Message.sender_id, Message.recipient_id, db.func.count(Message.id)).filter(
+            Message.id.in_(deleted_by_both)
+        ).group_by(Message.sender_id, Message.recipient_id).all()
+        deleted = Message.query.filter(Message.id.in_(deleted_by_both)).delete(synchronize_session=False)
+        
+        MessageStats.apply(MessageStats.merge(
+            {user_id: {'unread_count': -hidden_unread}},
+            *({sender_id: {'sent_count': -count}} for sender_id, _, count in deleted_pairs),
+            *({recipient_id: {'received_count': -count}} for _, recipient_id, count in deleted_pairs)
+        ))
+        
+        unread = db.select(db.func.count(Message.id)).where(
+            Message.conversation_id == Conversation.id,
+            Message.recipient_id == user_id,
+            Message.is_read == False
+        ).scalar_subquery()
+        last_message = db.select(db.func.max(Message.id)).where(
+            Message.conversation_id == Conversation.id
+        ).scalar_subquery()
+        user_conversations.update({
+            'last_message_id': last_message,
+            'user1_unread_count': db.case((Conversation.user1_id == user_id, unread), else_=Conversation.user1_unread_count),
+            'user2_unread_count': db.case((Conversation.user2_id == user_id, unread), else_=Conversation.user2_unread_count)
+        }, synchronize_session=False)
+        
+        db.session.commit()
+        return deleted
     
     def __repr__(self):
         return f'<Message {self.id}: {self.sender.handle} -> {self.recipient.handle}>'
 
 
+# Full-text index for message search; expression GIN indexes are PostgreSQL-only.
+# Existing databases get it from scripts/backfill_message_conversations.py
+event.listen(
+    Message.__table__,
+    'after_create',
+    DDL("CREATE INDEX IF NOT EXISTS idx_message_content_fts ON message "
+        "USING gin (to_tsvector('simple', content))").execute_if(dialect='postgresql')
+)
+
+
 class Conversation(db.Model):
     """Model to track conversation metadata"""
     id = db.Column(db.Integer, primary_key=True)
@@ -96,6 +345,14 @@ class Conversation(db.Model):
     last_activity = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Unread messages per participant, maintained on send and read
+    user1_unread_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    user2_unread_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user1_id', 'user2_id', name='uq_conversation_users'),
+    )
+    
     # Relationships
     user1 = db.relationship('User', foreign_keys=[user1_id])
     user2 = db.relationship('User', foreign_keys=[user2_id])
@@ -105,49 +362,230 @@ class Conversation(db.Model):
         """Get the other user in the conversation"""
         return self.user2 if self.user1_id == current_user_id else self.user1
     
+    @staticmethod
+    def unread_column(user1_id, user_id):
+        """Get the unread counter column of a participant, given the conversation's user1_id"""
+        return Conversation.user1_unread_count if user_id == user1_id else Conversation.user2_unread_count
+    
     def get_unread_count(self, user_id):
         """Get unread message count for user"""
-        return Message.query.filter_by(
+        return self.user1_unread_count if user_id == self.user1_id else self.user2_unread_count
+    
+    def mark_read(self, user_id):
+        """
+        Mark every message the other participant sent to user_id as read
+        
+        Returns:
+            int: Number of messages marked as read
+        """
+        other_user_id = self.user2_id if user_id == self.user1_id else self.user1_id
+        count = Message.query.filter_by(
+            sender_id=other_user_id,
             recipient_id=user_id,
             is_read=False
-        ).filter(
-            ((Message.sender_id == self.user1_id) & (Message.recipient_id == self.user2_id)) |
-            ((Message.sender_id == self.user2_id) & (Message.recipient_id == self.user1_id))
-        ).count()
+        ).update({'is_read': True}, synchronize_session=False)
+        
+        setattr(self, Conversation.unread_column(self.user1_id, user_id).key, 0)
+        MessageStats.apply({user_id: {'unread_count': -count}})
+        db.session.commit()
+        return count
+    
+    @staticmethod
+    def decrement_unread(sender_id, recipient_id):
+        """Take one message off the recipient's unread counter, without committing"""
+        user1_id, user2_id = sorted((sender_id, recipient_id))
+        unread = Conversation.unread_column(user1_id, recipient_id)
+        Conversation.query.filter_by(user1_id=user1_id, user2_id=user2_id).update(
+            {unread.key: db.case((unread > 0, unread - 1), else_=0)},
+            synchronize_session=False
+        )
+        MessageStats.apply({recipient_id: {'unread_count': -1}})
+    
+    @staticmethod
+    def get_inbox(user_id):
+        """Query a user's conversations, most recent first, with participants and last message joined in"""
+        return Conversation.query.filter(
+            db.or_(
+                Conversation.user1_id == user_id,
+                Conversation.user2_id == user_id
+            )
+        ).options(
+            db.joinedload(Conversation.user1),
+            db.joinedload(Conversation.user2),
+            db.joinedload(Conversation.last_message)
+        ).order_by(Conversation.last_activity.desc())
     
     def to_dict(self, current_user_id):
-        """Convert conversation to dictionary"""
+        """Convert conversation to dictionary (no per-conversation queries once get_inbox loaded it)"""
         other_user = self.get_other_user(current_user_id)
         return {
             'id': self.id,
-            'other_user': other_user.to_dict(),
-            'last_message': self.last_message.to_dict() if self.last_message else None,
+            'other_user': other_user.to_summary_dict(),
+            'last_message': self.last_message.to_dict(include_users=False) if self.last_message else None,
             'last_activity': self.last_activity.isoformat(),
             'unread_count': self.get_unread_count(current_user_id),
             'created_at': self.created_at.isoformat()
         }
     
     @staticmethod
-    def get_or_create(user1_id, user2_id):
-        """Get existing conversation or create new one"""
-        # Ensure consistent ordering
-        if user1_id > user2_id:
-            user1_id, user2_id = user2_id, user1_id
+    def record_message(sender_id, recipient_id, sent_at):
+        """
+        Create or update the conversation for a new message in a single statement
+        
+        Returns:
+            tuple: (conversation id, True if the conversation was created)
+        """
+        user1_id, user2_id = sorted((sender_id, recipient_id))
+        unread = Conversation.unread_column(user1_id, recipient_id)
         
-        conversation = Conversation.query.filter_by(
+        upsert = upsert_insert(Conversation).values(
             user1_id=user1_id,
-            user2_id=user2_id
-        ).first()
+            user2_id=user2_id,
+            last_activity=sent_at,
+            created_at=sent_at,
+            **{unread.key: 1}
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=['user1_id', 'user2_id'],
+            set_={
+                'last_activity': upsert.excluded.last_activity,
+                unread.key: unread + 1
+            }
+        ).returning(Conversation.id, Conversation.created_at)
         
-        if not conversation:
-            conversation = Conversation(
-                user1_id=user1_id,
-                user2_id=user2_id
-            )
-            db.session.add(conversation)
+        # The update leaves created_at alone, so it only equals sent_at for a new row
+        conversation_id, created_at = db.session.execute(upsert).one()
+        return conversation_id, created_at == sent_at
+    
+    def __repr__(self):
+        return f'<Conversation {self.id}: {self.user1.handle} <-> {self.user2.handle}>'
+
+
+class MessageStats(db.Model):
+    """
+    Per-user message counters, maintained on send, read and delete
+    
+    Counts mirror what COUNT queries over message and conversation would
+    return: messages stored that the user sent or received, received
+    messages still unread, and conversations the user takes part in.
+    reconcile() recomputes them to repair drift.
+    """
+    __tablename__ = 'message_stats'
+    
+    COUNTERS = ('sent_count', 'received_count', 'unread_count', 'conversation_count')
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    sent_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    received_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    unread_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    conversation_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
+    @staticmethod
+    def merge(*deltas):
+        """Combine {user_id: {counter: delta}} mappings, adding deltas of the same user"""
+        merged = {}
+        for delta in deltas:
+            for user_id, changes in delta.items():
+                counters = merged.setdefault(user_id, {})
+                for counter, value in changes.items():
+                    counters[counter] = counters.get(counter, 0) + value
+        return merged
+    
+    @staticmethod
+    def apply(deltas):
+        """Add counter deltas ({user_id: {counter: delta}}) for several users in one upsert, without committing"""
+        rows = [
+            dict({counter: changes.get(counter, 0) for counter in MessageStats.COUNTERS}, user_id=user_id)
+            # Same row order in every transaction, so concurrent sends can't deadlock on each other's rows
+            for user_id, changes in sorted(deltas.items())
+            if any(changes.values())
+        ]
+        if not rows:
+            return
+        
+        upsert = upsert_insert(MessageStats).values(rows)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={
+                counter: getattr(MessageStats, counter) + getattr(upsert.excluded, counter)
+                for counter in MessageStats.COUNTERS
+            }
+        )
+        db.session.execute(upsert)
+    
+    @staticmethod
+    def get_for_user(user_id):
+        """Get a user's counters from their stats row"""
+        stats = db.session.get(MessageStats, user_id)
+        return {counter: getattr(stats, counter) if stats else 0 for counter in MessageStats.COUNTERS}
+    
+    @staticmethod
+    def count_for_users(first_user_id, last_user_id):
+        """Count the true counters of users in an id range from message and conversation"""
+        def grouped(column, *criteria):
+            return dict(db.session.query(column, db.func.count()).filter(
+                column.between(first_user_id, last_user_id), *criteria
+            ).group_by(column).all())
+        
+        conversations = grouped(Conversation.user1_id)
+        for user_id, count in grouped(Conversation.user2_id, Conversation.user1_id != Conversation.user2_id).items():
+            conversations[user_id] = conversations.get(user_id, 0) + count
+        
+        counts = {
+            'sent_count': grouped(Message.sender_id),
+            'received_count': grouped(Message.recipient_id),
+            'unread_count': grouped(Message.recipient_id, Message.is_read == False),
+            'conversation_count': conversations
+        }
+        
+        user_ids = set().union(*counts.values())
+        return {
+            user_id: {counter: counts[counter].get(user_id, 0) for counter in MessageStats.COUNTERS}
+            for user_id in user_ids
+        }
+    
+    @staticmethod
+    def reconcile(batch_size=1000):
+        """
+        Recompute every user's counters and fix the rows that drifted
+        
+        Users are processed in id ranges of batch_size, one transaction per
+        range. A send racing with its range can still leave a small drift,
+        which the next run repairs.
+        
+        Returns:
+            int: Number of users whose counters were corrected
+        """
+        from app.models.user import User
+        
+        corrected = 0
+        last_user_id = db.session.query(db.func.max(User.id)).scalar() or 0
+        for first_user_id in range(1, last_user_id + 1, batch_size):
+            range_end = first_user_id + batch_size - 1
+            actual = MessageStats.count_for_users(first_user_id, range_end)
+            stored = {
+                stats.user_id: {counter: getattr(stats, counter) for counter in MessageStats.COUNTERS}
+                for stats in MessageStats.query.filter(MessageStats.user_id.between(first_user_id, range_end))
+            }
+            
+            zero = {counter: 0 for counter in MessageStats.COUNTERS}
+            drifted = [
+                dict(actual.get(user_id, zero), user_id=user_id)
+                for user_id in set(actual) | set(stored)
+                if actual.get(user_id, zero) != stored.get(user_id, zero)
+            ]
+            
+            if drifted:
+                upsert = upsert_insert(MessageStats).values(drifted)
+                upsert = upsert.on_conflict_do_update(
+                    index_elements=['user_id'],
+                    set_={counter: getattr(upsert.excluded, counter) for counter in MessageStats.COUNTERS}
+                )
+                db.session.execute(upsert)
             db.session.commit()
+            corrected += len(drifted)
         
-        return conversation
+        return corrected
     
     def __repr__(self):
-        return f'<Conversation {self.id}: {self.user1.handle} <-> {self.user2.handle}>'
+        return f'<MessageStats {self.user_id}>'
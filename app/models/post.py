@@ -128,6 +128,17 @@ class Post(db.Model):
             self.shared_by.append(user)
             self.shares_count += 1
     
+    @staticmethod
+    def get_engagement(post_ids):
+        """Get the engagement counters of several visible posts in one query"""
+        rows = db.session.query(
+            Post.id, Post.likes_count, Post.replies_count, Post.shares_count
+        ).filter(Post.id.in_(post_ids), Post.is_deleted == False).all()
+        return [
+            {'id': post_id, 'likes_count': likes, 'replies_count': replies, 'shares_count': shares}
+            for post_id, likes, replies, shares in rows
+        ]
+    
     def get_trending_score(self):
         """Calculate trending score based on engagement"""
         # Simple trending algorithm - can be improved
@@ -163,13 +174,12 @@ class Post(db.Model):
             if parent_post and parent_post.replies_count > 0:
                 parent_post.replies_count -= 1
     
-    def to_dict(self, include_replies=False):
-        """Convert post to dictionary for JSON serialization"""
+    def to_dict(self, include_replies=False, include_author=True):
+        """Convert post to dictionary for JSON serialization (events reference the author by user_id)"""
         data = {
             'id': self.id,
             'content': self.content,
             'user_id': self.user_id,
-            'author': self.author.to_dict() if self.author else None,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'parent_id': self.parent_id,
@@ -185,6 +195,9 @@ class Post(db.Model):
             'trending_score': self.get_trending_score()
         }
         
+        if include_author:
+            data['author'] = self.author.to_dict() if self.author else None
+        
         if include_replies:
             data['replies'] = self.get_conversation_tree()
         
@@ -1,6 +1,72 @@
 from app import db
 from datetime import datetime, timedelta
 import hashlib
+import threading
+import time
+import logging
+
+
+class CacheAccessTracker:
+    """
+    Buffers cache hits in memory and writes them in batches
+
+    Recording every hit with its own UPDATE would turn each cache read into a
+    write. Hits and access times are accumulated per entry and flushed as one
+    executemany UPDATE when a record finds flush_interval elapsed, from a
+    periodic task (see flush_periodically) and at exit, since eviction relies
+    on them.
+    """
+
+    def __init__(self, flush_interval=30):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, entry_ids, hit=True):
+        """Record an access to each cache entry id (a hit unless hit is False), flushing if the interval has elapsed"""
+        now = datetime.utcnow()
+        with self._lock:
+            for entry_id in entry_ids:
+                hits, _ = self._pending.get(entry_id, (0, None))
+                self._pending[entry_id] = (hits + int(hit), now)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered hits to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        table = TranslationCache.__table__
+        statement = table.update().where(
+            table.c.id == db.bindparam('entry_id')
+        ).values(
+            hit_count=db.func.coalesce(table.c.hit_count, 0) + db.bindparam('hits'),
+            last_accessed=db.bindparam('accessed_at')
+        )
+
+        try:
+            # Separate connection so the caller's session transaction is untouched
+            with db.engine.begin() as connection:
+                connection.execute(statement, [
+                    {'entry_id': entry_id, 'hits': hits, 'accessed_at': accessed_at}
+                    for entry_id, (hits, accessed_at) in pending.items()
+                ])
+        except Exception as e:
+            logging.error(f"Error flushing translation cache access times: {e}")
+            return 0
+
+        return len(pending)
+
+
+access_tracker = CacheAccessTracker()
 
 
 class TranslationCache(db.Model):
@@ -33,11 +99,16 @@ class TranslationCache(db.Model):
     # Performance tracking
     translation_time_ms = db.Column(db.Integer, nullable=True)
     
+    # Usage tracking (written in batches by CacheAccessTracker)
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    last_accessed = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
+    
     # Composite index for efficient lookups
     __table_args__ = (
         db.Index('idx_translation_lookup', 'content_hash', 'source_language', 'target_language'),
         db.Index('idx_language_pair', 'source_language', 'target_language'),
         db.Index('idx_created_at', 'created_at'),
+        db.Index('idx_last_accessed', 'last_accessed'),
     )
     
     @staticmethod
@@ -77,11 +148,16 @@ class TranslationCache(db.Model):
         """
         content_hash = cls.generate_content_hash(content, source_lang, target_lang, context)
         
-        return cls.query.filter_by(
+        cached = cls.query.filter_by(
             content_hash=content_hash,
             source_language=source_lang,
             target_language=target_lang
         ).first()
+        
+        if cached:
+            access_tracker.record([cached.id])
+        
+        return cached
     
     @classmethod
     def cache_translation(cls, content, source_lang, target_lang, translated_content, 
@@ -134,59 +210,190 @@ class TranslationCache(db.Model):
         
         return cache_entry
     
+    @classmethod
+    def get_cached_translations(cls, contents, source_lang, target_lang, primary=None):
+        """
+        Retrieve cached translations for several texts in a single query
+        
+        Every entry found is marked as accessed. If primary is given, only its
+        entry counts as a hit, since it is the text the request asked for and
+        the others are its segments; otherwise every entry found does.
+        
+        Args:
+            contents (iterable): The texts to look up
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+            primary (str, optional): The text the request asked for
+            
+        Returns:
+            dict: Mapping of each cached text to its translation
+        """
+        hashes = {
+            cls.generate_content_hash(content, source_lang, target_lang): content
+            for content in contents
+        }
+        if not hashes:
+            return {}
+        
+        entries = db.session.query(cls.id, cls.content_hash, cls.translated_content).filter(
+            cls.content_hash.in_(list(hashes)),
+            cls.source_language == source_lang,
+            cls.target_language == target_lang
+        ).all()
+        
+        if primary is None:
+            access_tracker.record(entry.id for entry in entries)
+        else:
+            primary_hash = cls.generate_content_hash(primary, source_lang, target_lang)
+            access_tracker.record(entry.id for entry in entries if entry.content_hash == primary_hash)
+            access_tracker.record((entry.id for entry in entries if entry.content_hash != primary_hash), hit=False)
+        
+        return {hashes[entry.content_hash]: entry.translated_content for entry in entries}
+    
+    @classmethod
+    def cache_translations(cls, entries, source_lang, target_lang, translation_time_ms=None, primary=None,
+                           hit=False):
+        """
+        Cache several translation results with a single commit
+        
+        If primary is given, the translation time is recorded on its entry
+        only, so a translation counts once in the stats however many segments
+        it stored. hit counts the primary entry as a hit, for translations
+        stitched from cached segments.
+        
+        Args:
+            entries (dict): Mapping of original text to translated text
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+            translation_time_ms (int, optional): Time taken for the translation
+            primary (str, optional): The text the request asked for
+            hit (bool): Whether the primary entry was served from the cache
+        """
+        hashes = {
+            cls.generate_content_hash(content, source_lang, target_lang): content
+            for content in entries
+        }
+        if not hashes:
+            return
+        
+        existing = cls.query.filter(
+            cls.content_hash.in_(list(hashes)),
+            cls.source_language == source_lang,
+            cls.target_language == target_lang
+        ).all()
+        
+        def is_primary(content):
+            return primary is None or content == primary
+        
+        for entry in existing:
+            content = hashes[entry.content_hash]
+            entry.translated_content = entries[content]
+            entry.updated_at = datetime.utcnow()
+            entry.last_accessed = entry.updated_at
+            if is_primary(content):
+                if translation_time_ms is not None:
+                    entry.translation_time_ms = translation_time_ms
+                if hit:
+                    entry.hit_count = cls.hit_count + 1
+        
+        existing_hashes = {entry.content_hash for entry in existing}
+        for content_hash, content in hashes.items():
+            if content_hash in existing_hashes:
+                continue
+            db.session.add(cls(
+                content_hash=content_hash,
+                original_content=content,
+                source_language=source_lang,
+                target_language=target_lang,
+                translated_content=entries[content],
+                translation_time_ms=translation_time_ms if is_primary(content) else None,
+                hit_count=int(hit and is_primary(content))
+            ))
+        
+        db.session.commit()
+    
     @classmethod
     def get_cache_stats(cls):
         """
         Get statistics about the translation cache
         
+        Hits count requests answered from the cache and misses count
+        translations, i.e. entries with a translation time; segments stored
+        alongside a translation are neither, so they don't skew the hit ratio
+        or the average translation time.
+        
         Returns:
             dict: Cache statistics
         """
-        total_entries = cls.query.count()
+        access_tracker.flush()
         
-        # Get language pair statistics
+        recent_cutoff = datetime.utcnow() - timedelta(hours=24)
+        
+        # One grouped scan for all per-pair figures
         language_pairs = db.session.query(
             cls.source_language,
             cls.target_language,
-            db.func.count(cls.id).label('count')
+            db.func.count(cls.id).label('count'),
+            db.func.coalesce(db.func.sum(cls.hit_count), 0).label('hits'),
+            db.func.count(cls.translation_time_ms).label('misses'),
+            db.func.avg(cls.translation_time_ms).label('avg_translation_time_ms'),
+            db.func.sum(db.case((cls.created_at >= recent_cutoff, 1), else_=0)).label('recent')
         ).group_by(cls.source_language, cls.target_language).all()
         
-        # Get recent activity (last 24 hours)
-        recent_cutoff = datetime.utcnow() - timedelta(hours=24)
-        recent_entries = cls.query.filter(cls.created_at >= recent_cutoff).count()
+        def hit_ratio(hits, misses):
+            return round(hits / (hits + misses), 4) if hits + misses else 0.0
+        
+        total_entries = sum(pair.count for pair in language_pairs)
+        total_hits = sum(int(pair.hits) for pair in language_pairs)
+        total_misses = sum(pair.misses for pair in language_pairs)
         
         return {
             'total_entries': total_entries,
+            'total_hits': total_hits,
+            'total_misses': total_misses,
+            'hit_ratio': hit_ratio(total_hits, total_misses),
             'language_pairs': [
                 {
                     'source': pair.source_language,
                     'target': pair.target_language,
-                    'count': pair.count
+                    'count': pair.count,
+                    'hits': int(pair.hits),
+                    'misses': pair.misses,
+                    'hit_ratio': hit_ratio(int(pair.hits), pair.misses),
+                    'avg_translation_time_ms': round(float(pair.avg_translation_time_ms), 1)
+                    if pair.avg_translation_time_ms is not None else None
                 }
                 for pair in language_pairs
             ],
-            'recent_entries_24h': recent_entries
+            'recent_entries_24h': sum(int(pair.recent or 0) for pair in language_pairs)
         }
     
     @classmethod
-    def cleanup_old_entries(cls, days_old=30):
+    def cleanup_old_entries(cls, days_old=30, max_entries=None):
         """
-        Clean up old cache entries to prevent database bloat
+        Evict cache entries that have not been used recently
         
         Args:
-            days_old (int): Remove entries older than this many days
+            days_old (int): Remove entries not accessed for this many days
+            max_entries (int, optional): Also keep only this many most recently used entries
             
         Returns:
             int: Number of entries removed
         """
+        access_tracker.flush()
+        
+        last_used = db.func.coalesce(cls.last_accessed, cls.created_at)
         cutoff_date = datetime.utcnow() - timedelta(days=days_old)
         
-        old_entries = cls.query.filter(cls.created_at < cutoff_date)
-        count = old_entries.count()
-        old_entries.delete()
+        removed = cls.query.filter(last_used < cutoff_date).delete(synchronize_session=False)
+        
+        if max_entries is not None:
+            keep_ids = db.session.query(cls.id).order_by(last_used.desc()).limit(max_entries)
+            removed += cls.query.filter(~cls.id.in_(keep_ids.scalar_subquery())).delete(synchronize_session=False)
+        
         db.session.commit()
         
-        return count
+        return removed
     
     def to_dict(self):
         """
@@ -204,6 +411,8 @@ class TranslationCache(db.Model):
             'translated_content': self.translated_content,
             'context': self.context,
             'translation_time_ms': self.translation_time_ms,
+            'hit_count': self.hit_count,
+            'last_accessed': self.last_accessed.isoformat() if self.last_accessed else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -1,7 +1,13 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from flask import current_app
 from flask_login import UserMixin
-from app import db, bcrypt
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+import threading
+import time
+import logging
 
 # Association tables for many-to-many relationships
 followers = db.Table('followers',
@@ -9,6 +15,166 @@ followers = db.Table('followers',
     db.Column('followed_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
 )
 
+class LastSeenTracker:
+    """
+    Buffers last_seen updates in memory and writes them in batches
+
+    Connects, disconnects and logins all touch last_seen, so reconnect storms
+    would otherwise become write storms on the user table. Every record keeps
+    the user's latest timestamp, but each user is written at most once per
+    min_interval seconds; buffered timestamps are flushed as one executemany
+    UPDATE when a record finds flush_interval elapsed, from a periodic task
+    (see flush_periodically) and at exit with force=True.
+    """
+
+    def __init__(self, min_interval=60, flush_interval=30):
+        self.min_interval = min_interval
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._written_at = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, user_id):
+        """Record that a user was seen now, flushing if the interval has elapsed"""
+        now = time.monotonic()
+        with self._lock:
+            self._pending[user_id] = datetime.utcnow()
+            due = now - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+
+    def get(self, user_id):
+        """Get a user's buffered last_seen that hasn't been written yet"""
+        with self._lock:
+            return self._pending.get(user_id)
+
+    def flush(self, force=False):
+        """
+        Write buffered last_seen timestamps to the database
+
+        Users written less than min_interval ago stay buffered for a later
+        flush unless force is set (e.g. at shutdown).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._last_flush = now
+            # Forget users whose throttle window has passed
+            self._written_at = {
+                user_id: written_at for user_id, written_at in self._written_at.items()
+                if now - written_at < self.min_interval
+            }
+            if force:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {
+                    user_id: seen_at for user_id, seen_at in self._pending.items()
+                    if user_id not in self._written_at
+                }
+                for user_id in pending:
+                    del self._pending[user_id]
+            for user_id in pending:
+                self._written_at[user_id] = now
+
+        if not pending:
+            return 0
+
+        table = User.__table__
+        statement = table.update().where(
+            table.c.id == db.bindparam('user_id')
+        ).values(last_seen=db.bindparam('seen_at'))
+
+        try:
+            # Separate connection so the caller's session transaction is untouched
+            with db.engine.begin() as connection:
+                connection.execute(statement, [
+                    {'user_id': user_id, 'seen_at': seen_at}
+                    for user_id, seen_at in pending.items()
+                ])
+        except Exception as e:
+            logging.error(f"Error flushing last seen times: {e}")
+            return 0
+
+        return len(pending)
+
+
+last_seen_tracker = LastSeenTracker()
+
+
+class IdentityCache:
+    """
+    Keeps the column values of recently loaded users for a short time
+
+    Flask-Login loads the session user on every request and every Socket.IO
+    event, which would otherwise be one primary key SELECT each time. Entries
+    expire after ttl seconds and are dropped as soon as the user row is
+    updated or deleted in this process; other workers see the change once
+    their entry expires. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, ttl=30, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """Get a user's cached column values, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, values):
+        """Cache a user's column values for ttl seconds"""
+        if self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_size and user_id not in self._entries:
+                # Drop expired entries first, then the oldest insertions
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+                while len(self._entries) >= self.max_size:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[user_id] = (now + self.ttl, values)
+
+    def invalidate(self, user_id):
+        """Forget a user so the next load reads the database"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Forget every user and reset the counters"""
+        with self._lock:
+            self._entries = {}
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self):
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'ttl': self.ttl,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+identity_cache = IdentityCache()
+
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     handle = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -43,13 +209,62 @@ class User(UserMixin, db.Model):
         secondaryjoin=(followers.c.followed_id == id),
         backref=db.backref('followers', lazy='dynamic'), lazy='dynamic')
     
+    # Unique constraints (index names as created by SQLAlchemy/PostgreSQL) and the field each guards
+    UNIQUE_CONSTRAINTS = {
+        'ix_user_handle': 'handle',
+        'ix_user_email': 'email',
+        'user_phone_number_key': 'phone_number'
+    }
+    
+    @classmethod
+    def duplicate_field(cls, error):
+        """Get the field whose unique constraint an IntegrityError violated, or None"""
+        message = str(getattr(error, 'orig', error)).split('\n')[0]
+        for constraint, field in cls.UNIQUE_CONSTRAINTS.items():
+            # PostgreSQL names the constraint, SQLite the column; neither first line quotes the value
+            if f'"{constraint}"' in message or message.endswith(f'user.{field}'):
+                return field
+        return None
+    
+    @classmethod
+    def load_identity(cls, user_id):
+        """
+        Load the session user, from the identity cache when possible
+
+        A cached user is attached to the current session without a SELECT, so
+        relationships and writes behave as for a freshly queried user.
+        """
+        values = identity_cache.get(user_id)
+        if values is None:
+            user = db.session.get(cls, user_id)
+            if user is not None:
+                identity_cache.put(user_id, {
+                    attr.key: getattr(user, attr.key) for attr in db.inspect(cls).column_attrs
+                })
+            return user
+
+        user = cls(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        from app.controllers.password_hasher import get_password_hasher
+        self.password_hash = get_password_hasher(current_app.config).hash(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        from app.controllers.password_hasher import get_password_hasher
+        return get_password_hasher(current_app.config).check(password, self.password_hash)
+    
+    def rehash_password(self, password):
+        """Re-hash a verified password made with another cost factor; returns True if it changed"""
+        from app.controllers.password_hasher import get_password_hasher
+        hasher = get_password_hasher(current_app.config)
+        if not hasher.needs_rehash(self.password_hash):
+            return False
+        self.password_hash = hasher.hash(password)
+        return True
     
     def follow(self, user):
         """Follow a user"""
@@ -65,6 +280,12 @@ class User(UserMixin, db.Model):
         """Check if following a user"""
         return self.followed.filter(followers.c.followed_id == user.id).count() > 0
     
+    @staticmethod
+    def get_follower_ids(user_id):
+        """Get the ids of a user's followers without loading the users"""
+        rows = db.session.query(followers.c.follower_id).filter(followers.c.followed_id == user_id)
+        return [follower_id for follower_id, in rows]
+    
     def get_timeline_posts(self):
         """Get posts for user's timeline"""
         from app.models.post import Post
@@ -76,8 +297,14 @@ class User(UserMixin, db.Model):
     
     def get_unread_message_count(self):
         """Get count of unread messages"""
-        from app.models.message import Message
-        return Message.query.filter_by(recipient_id=self.id, is_read=False).count()
+        from app.models.message import Conversation
+        unread = db.session.query(db.func.sum(db.case(
+            (Conversation.user1_id == self.id, Conversation.user1_unread_count),
+            else_=Conversation.user2_unread_count
+        ))).filter(
+            db.or_(Conversation.user1_id == self.id, Conversation.user2_id == self.id)
+        ).scalar()
+        return unread or 0
     
     def get_notification_count(self):
         """Get count of unread notifications"""
@@ -89,8 +316,20 @@ class User(UserMixin, db.Model):
         """Get user's full name"""
         return f"{self.first_name} {self.last_name}"
     
+    def to_summary_dict(self):
+        """Convert user to the compact form embedded in real-time events (no counters)"""
+        return {
+            'id': self.id,
+            'handle': self.handle,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'full_name': self.full_name,
+            'profile_picture': self.profile_picture
+        }
+    
     def to_dict(self):
         """Convert user to dictionary for JSON serialization"""
+        last_seen = last_seen_tracker.get(self.id) or self.last_seen
         return {
             'id': self.id,
             'handle': self.handle,
@@ -105,8 +344,15 @@ class User(UserMixin, db.Model):
             'following_count': self.followed.count(),
             'posts_count': self.posts.count(),
             'created_at': self.created_at.isoformat(),
-            'last_seen': self.last_seen.isoformat() if self.last_seen else None
+            'last_seen': last_seen.isoformat() if last_seen else None
         }
     
     def __repr__(self):
         return f'<User {self.handle}>'
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_identity(mapper, connection, user):
+    """Drop a changed user (profile, password, suspension) from the identity cache"""
+    identity_cache.invalidate(user.id)
@@ -33,6 +33,7 @@ api_bp.add_url_rule('/search/suggestions', 'search_suggestions', SearchControlle
 api_bp.add_url_rule('/translate/post/<int:post_id>', 'translate_post', TranslationController.translate_post, methods=['GET'])
 api_bp.add_url_rule('/translate/message/<int:message_id>', 'translate_message', TranslationController.translate_message, methods=['GET'])
 api_bp.add_url_rule('/translate/text', 'translate_text', TranslationController.translate_text, methods=['POST'])
+api_bp.add_url_rule('/translate/jobs/<string:job_id>', 'translation_job', TranslationController.get_translation_job, methods=['GET'])
 api_bp.add_url_rule('/translate/languages', 'supported_languages', TranslationController.get_supported_languages, methods=['GET'])
 api_bp.add_url_rule('/translate/stats', 'translation_stats', TranslationController.get_translation_stats, methods=['GET'])
 api_bp.add_url_rule('/translate/cleanup', 'cleanup_translations', TranslationController.cleanup_translation_cache, methods=['POST'])
@@ -33,12 +33,19 @@ const LLMTest = () => {
   const testCustomTranslation = async () => {
     setCustomLoading(true);
     try {
-      const response = await axios.post('/api/translate/text', {
+      let response = await axios.post('/api/translate/text', {
         content: customTest.text,
         source_lang: customTest.sourceLang,
         target_lang: customTest.targetLang
       });
-      setCustomResult(response.data);
+
+      // Uncached translations are queued; poll the job until it finishes
+      while (response.status === 202) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        response = await axios.get(`/api/translate/jobs/${response.data.job_id}`);
+      }
+
+      setCustomResult(response.data.result || response.data);
     } catch (error) {
       setCustomResult({
         success: false,
@@ -1,5 +1,6 @@
-import React, { createContext, useContext, useEffect, useState } from 'react';
+import React, { createContext, useContext, useEffect, useRef, useState } from 'react';
 import io from 'socket.io-client';
+import msgpackParser from 'socket.io-msgpack-parser';
 import { useAuth } from './AuthContext';
 
 // Configure Socket.IO URL based on environment
@@ -29,6 +30,9 @@ const getSocketUrl = () => {
 
 const SOCKET_URL = getSocketUrl();
 
+// Must match the server's SOCKETIO_SERIALIZER
+const USE_MSGPACK = process.env.REACT_APP_SOCKET_SERIALIZER === 'msgpack';
+
 const SocketContext = createContext();
 
 export const useSocket = () => {
@@ -44,20 +48,115 @@ export const SocketProvider = ({ children }) => {
   const [connected, setConnected] = useState(false);
   const [onlineUsers, setOnlineUsers] = useState(new Set());
   const { user } = useAuth();
+  // Post ids currently in the viewport, and pending (un)subscriptions sent in batches
+  const subscribedPosts = useRef(new Set());
+  const pendingSubscriptions = useRef({ subscribe: new Set(), unsubscribe: new Set(), timer: null });
+  // Users referenced by id in events; each event carries the ones it needs in 'authors'
+  const authorCache = useRef(new Map());
 
   useEffect(() => {
     if (user) {
       // Initialize socket connection
       const newSocket = io(SOCKET_URL, {
         withCredentials: true,
-        transports: ['websocket', 'polling']
+        transports: ['websocket', 'polling'],
+        // Spread automatic reconnects out so a server restart isn't hit by every client at once
+        reconnectionDelay: 1000,
+        reconnectionDelayMax: 30000,
+        randomizationFactor: 0.5,
+        ...(USE_MSGPACK ? { parser: msgpackParser } : {})
+      });
+
+      const rememberAuthors = (data) => {
+        (data.authors || []).forEach((author) => authorCache.current.set(author.id, author));
+      };
+      const author = (userId) => authorCache.current.get(userId) || null;
+      const hydrateMessage = (data) => {
+        rememberAuthors(data);
+        return {
+          ...data,
+          message: { ...data.message, sender: author(data.message.sender_id), recipient: author(data.message.recipient_id) }
+        };
+      };
+
+      // The server refuses connections beyond its accept rate and suggests when to retry;
+      // refused connections are not retried automatically
+      let retryTimer = null;
+      newSocket.on('connect_error', (error) => {
+        const retryAfter = error?.data?.retry_after;
+        if (retryAfter && !retryTimer) {
+          retryTimer = setTimeout(() => {
+            retryTimer = null;
+            newSocket.connect();
+          }, retryAfter);
+        }
+      });
+
+      // Personal events carry a per-user sequence number; after a reconnect the
+      // server replays what was missed, or asks for a full refetch if it can't
+      let lastSeq = null;
+      // Live events that arrive while a resume is in flight wait for the replay
+      let resumeQueue = null;
+      const userEventTargets = {
+        new_notification: (data) => ['newNotification', data.notification],
+        new_message: (data) => ['newMessage', hydrateMessage(data)],
+        message_notification: (data) => {
+          rememberAuthors(data);
+          return ['messageNotification', { ...data, sender: author(data.sender_id) }];
+        },
+        translation_job_complete: (data) => ['translationJobComplete', data]
+      };
+      const dispatchUserEvent = (event, data) => {
+        if (lastSeq !== null && data.seq <= lastSeq) return;
+        lastSeq = data.seq;
+        const [name, detail] = userEventTargets[event](data);
+        window.dispatchEvent(new CustomEvent(name, { detail }));
+      };
+      Object.keys(userEventTargets).forEach((event) => {
+        newSocket.on(event, (data) => {
+          if (resumeQueue) {
+            resumeQueue.push([event, data]);
+          } else {
+            dispatchUserEvent(event, data);
+          }
+        });
+      });
+
+      newSocket.on('resumed', (data) => {
+        if (data.complete) {
+          data.events.forEach((event) => dispatchUserEvent(event.event, event));
+        } else {
+          // Too much was missed: pages should refetch instead
+          lastSeq = data.last_seq;
+          window.dispatchEvent(new CustomEvent('socketResync'));
+        }
+        const queued = resumeQueue || [];
+        resumeQueue = null;
+        queued.forEach(([event, eventData]) => dispatchUserEvent(event, eventData));
       });
 
       newSocket.on('connect', () => {
         console.log('Connected to server');
         setConnected(true);
+
+        if (lastSeq !== null) {
+          resumeQueue = [];
+          newSocket.emit('resume', { last_seq: lastSeq });
+        }
+
+        // Rooms don't survive a reconnect, so restore the viewport subscriptions
+        if (subscribedPosts.current.size > 0) {
+          newSocket.emit('subscribe_posts', { post_ids: [...subscribedPosts.current] });
+        }
       });
 
+      // Keep server-side presence alive while the tab is open
+      const heartbeat = setInterval(() => {
+        if (newSocket.connected) {
+          newSocket.emit('heartbeat');
+        }
+      }, 30000);
+
       newSocket.on('disconnect', () => {
         console.log('Disconnected from server');
         setConnected(false);
@@ -65,28 +164,37 @@ export const SocketProvider = ({ children }) => {
 
       newSocket.on('connected', (data) => {
         console.log('Socket connected:', data);
+        if (lastSeq === null && data.last_seq !== undefined) {
+          lastSeq = data.last_seq;
+        }
       });
 
-      newSocket.on('user_online', (data) => {
-        setOnlineUsers(prev => new Set([...prev, data.user_id]));
-      });
-
-      newSocket.on('user_offline', (data) => {
+      newSocket.on('presence_changed', (data) => {
+        // Batched online/offline changes of followed users
         setOnlineUsers(prev => {
           const newSet = new Set(prev);
-          newSet.delete(data.user_id);
+          data.changes.forEach((change) => {
+            if (change.online) {
+              newSet.add(change.user_id);
+            } else {
+              newSet.delete(change.user_id);
+            }
+          });
           return newSet;
         });
       });
 
       newSocket.on('new_post', (data) => {
         // Handle new post in timeline
-        window.dispatchEvent(new CustomEvent('newPost', { detail: data.post }));
+        rememberAuthors(data);
+        window.dispatchEvent(new CustomEvent('newPost', { detail: { ...data.post, author: author(data.post.user_id) } }));
       });
 
-      newSocket.on('post_updated', (data) => {
-        // Handle post updates (likes, shares, etc.)
-        window.dispatchEvent(new CustomEvent('postUpdated', { detail: data.post }));
+      newSocket.on('post_engagement', (data) => {
+        // Handle batched engagement counters (likes, shares, etc.)
+        data.updates.forEach((update) => {
+          window.dispatchEvent(new CustomEvent('postUpdated', { detail: update }));
+        });
       });
 
       newSocket.on('post_deleted', (data) => {
@@ -94,29 +202,31 @@ export const SocketProvider = ({ children }) => {
         window.dispatchEvent(new CustomEvent('postDeleted', { detail: data.post_id }));
       });
 
-      newSocket.on('new_notification', (data) => {
-        // Handle new notification
-        window.dispatchEvent(new CustomEvent('newNotification', { detail: data.notification }));
+      newSocket.on('user_typing', (data) => {
+        // Handle typing indicator
+        window.dispatchEvent(new CustomEvent('userTyping', { detail: data }));
       });
 
-      newSocket.on('new_message', (data) => {
-        // Handle new message
-        window.dispatchEvent(new CustomEvent('newMessage', { detail: data }));
+      newSocket.on('translation_chunk', (data) => {
+        // Handle partial streamed translation
+        window.dispatchEvent(new CustomEvent('translationChunk', { detail: data }));
       });
 
-      newSocket.on('message_notification', (data) => {
-        // Handle message notification
-        window.dispatchEvent(new CustomEvent('messageNotification', { detail: data }));
+      newSocket.on('translation_complete', (data) => {
+        // Handle final streamed translation
+        window.dispatchEvent(new CustomEvent('translationComplete', { detail: data }));
       });
 
-      newSocket.on('user_typing', (data) => {
-        // Handle typing indicator
-        window.dispatchEvent(new CustomEvent('userTyping', { detail: data }));
+      newSocket.on('translation_error', (data) => {
+        // Handle streamed translation failure
+        window.dispatchEvent(new CustomEvent('translationError', { detail: data }));
       });
 
       setSocket(newSocket);
 
       return () => {
+        clearInterval(heartbeat);
+        clearTimeout(retryTimer);
         newSocket.close();
         setSocket(null);
         setConnected(false);
@@ -152,6 +262,8 @@ export const SocketProvider = ({ children }) => {
     }
   };
 
+  // Safe to call on every keystroke: the server rate-limits typing reports and
+  // expires them on its own, so stopTyping is optional
   const startTyping = (userId) => {
     if (socket) {
       socket.emit('typing_start', { user_id: userId });
@@ -170,6 +282,49 @@ export const SocketProvider = ({ children }) => {
     }
   };
 
+  const translateStream = (requestId, params) => {
+    if (socket) {
+      socket.emit('translate_stream', { request_id: requestId, ...params });
+    }
+  };
+
+  const flushPostSubscriptions = () => {
+    const pending = pendingSubscriptions.current;
+    pending.timer = null;
+    if (socket && socket.connected) {
+      if (pending.unsubscribe.size > 0) {
+        socket.emit('unsubscribe_posts', { post_ids: [...pending.unsubscribe] });
+      }
+      if (pending.subscribe.size > 0) {
+        socket.emit('subscribe_posts', { post_ids: [...pending.subscribe] });
+      }
+    }
+    pending.subscribe.clear();
+    pending.unsubscribe.clear();
+  };
+
+  const schedulePostSubscriptions = () => {
+    if (!pendingSubscriptions.current.timer) {
+      pendingSubscriptions.current.timer = setTimeout(flushPostSubscriptions, 250);
+    }
+  };
+
+  const subscribePost = (postId) => {
+    if (subscribedPosts.current.has(postId)) return;
+    subscribedPosts.current.add(postId);
+    pendingSubscriptions.current.unsubscribe.delete(postId);
+    pendingSubscriptions.current.subscribe.add(postId);
+    schedulePostSubscriptions();
+  };
+
+  const unsubscribePost = (postId) => {
+    if (!subscribedPosts.current.has(postId)) return;
+    subscribedPosts.current.delete(postId);
+    pendingSubscriptions.current.subscribe.delete(postId);
+    pendingSubscriptions.current.unsubscribe.add(postId);
+    schedulePostSubscriptions();
+  };
+
   const isUserOnline = (userId) => {
     return onlineUsers.has(userId);
   };
@@ -184,6 +339,9 @@ export const SocketProvider = ({ children }) => {
     startTyping,
     stopTyping,
     markMessagesRead,
+    translateStream,
+    subscribePost,
+    unsubscribePost,
     isUserOnline
   };
 
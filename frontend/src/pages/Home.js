@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../utils/api';
 import { useSocket } from '../contexts/SocketContext';
@@ -56,16 +56,23 @@ const Home = () => {
       setPosts(prevPosts => prevPosts.filter(post => post.id !== deletedPostId));
     };
 
+    // Events were missed during a long disconnect
+    const handleResync = () => {
+      fetchTimeline();
+    };
+
     // Add event listeners
     window.addEventListener('newPost', handleNewPost);
     window.addEventListener('postUpdated', handlePostUpdate);
     window.addEventListener('postDeleted', handlePostDeleted);
+    window.addEventListener('socketResync', handleResync);
 
     // Cleanup
     return () => {
       window.removeEventListener('newPost', handleNewPost);
       window.removeEventListener('postUpdated', handlePostUpdate);
       window.removeEventListener('postDeleted', handlePostDeleted);
+      window.removeEventListener('socketResync', handleResync);
     };
   }, []);
 
@@ -234,7 +241,29 @@ const Home = () => {
 const PostCard = ({ post, onLike, onDelete }) => {
   const { t, formatRelativeTime } = useLanguage();
   const { user } = useAuth();
+  const { subscribePost, unsubscribePost } = useSocket();
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
+  const cardRef = useRef(null);
+
+  // Only receive live updates for posts that are on screen
+  useEffect(() => {
+    const element = cardRef.current;
+    if (!element || typeof IntersectionObserver === 'undefined') return;
+
+    const observer = new IntersectionObserver(([entry]) => {
+      if (entry.isIntersecting) {
+        subscribePost(post.id);
+      } else {
+        unsubscribePost(post.id);
+      }
+    });
+    observer.observe(element);
+
+    return () => {
+      observer.disconnect();
+      unsubscribePost(post.id);
+    };
+  }, [post.id]);
 
   const handleDelete = () => {
     setShowDeleteConfirm(true);
@@ -252,7 +281,7 @@ const PostCard = ({ post, onLike, onDelete }) => {
   const isOwner = user && post.author && user.id === post.author.id;
 
   return (
-    <div className="post-card">
+    <div className="post-card" ref={cardRef}>
       <div className="flex space-x-3">
         {/* Avatar */}
         <div className="w-12 h-12 bg-primary-blue rounded-full flex items-center justify-center text-white font-medium">
@@ -1,15 +1,43 @@
 #!/usr/bin/env python3
 """
 User management script for co.nnecti.ng
+
+Usage:
+    python manage_users.py                  # Drop all users and create the default user
+    python manage_users.py import FILE      # Bulk import users from CSV or JSONL
+    python manage_users.py export FILE      # Stream all users to CSV or JSONL
+
+Import records need handle, email, first_name, last_name and either
+password (hashed here across all cores) or password_hash (used as is, e.g.
+from an export). On PostgreSQL each batch is loaded with COPY; elsewhere,
+or with --skip-existing, with one executemany INSERT.
 """
 
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
 from app import create_app, db
-from app.models import User, Post, Message, Conversation, Notification, Report, PostImage
+from app.models import User, Post, Message, Conversation, MessageStats, Notification, Report, PostImage
 from app.models.user import followers
+from app.models.message import upsert_insert
+from app.controllers.password_hasher import PasswordHasher
+
+# Columns written by export and accepted by import (besides password)
+USER_FIELDS = [
+    'handle', 'email', 'phone_number', 'first_name', 'last_name', 'bio', 'profile_picture',
+    'preferred_language', 'dark_mode', 'is_active', 'is_admin', 'created_at', 'last_seen', 'password_hash'
+]
+REQUIRED_FIELDS = ['handle', 'email', 'first_name', 'last_name']
+BOOLEAN_FIELDS = {'dark_mode': False, 'is_active': True, 'is_admin': False}
+DATETIME_FIELDS = ['created_at', 'last_seen']
 
-def drop_all_users():
+def drop_all_users(app=None):
     """Drop all users and related data from the database"""
-    app = create_app()
+    app = app or create_app()
     
     with app.app_context():
         try:
@@ -34,6 +62,9 @@ def drop_all_users():
             print("   Deleting messages...")
             Message.query.delete()
             
+            print("   Deleting message stats...")
+            MessageStats.query.delete()
+            
             print("   Deleting follower relationships...")
             db.session.execute(followers.delete())
             
@@ -50,9 +81,9 @@ def drop_all_users():
             print(f"❌ Error deleting users: {e}")
             return False
 
-def create_user(first_name, last_name, handle, email, password, preferred_language='en'):
+def create_user(first_name, last_name, handle, email, password, preferred_language='en', app=None):
     """Create a new user"""
-    app = create_app()
+    app = app or create_app()
     
     with app.app_context():
         try:
@@ -95,14 +126,199 @@ def create_user(first_name, last_name, handle, email, password, preferred_langua
             print(f"❌ Error creating user: {e}")
             return False
 
-def main():
-    """Main function"""
+def file_format(path, fmt=None):
+    """Get 'csv' or 'jsonl' from an explicit format or the file extension"""
+    if fmt:
+        return fmt
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+def read_records(stream, fmt):
+    """Yield user records one at a time from a CSV or JSONL stream"""
+    if fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(stream)
+
+def parse_boolean(value, default):
+    """Read a boolean from JSON or a CSV string"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 't')
+
+def parse_datetime(value, default):
+    """Read a datetime from an ISO 8601 string"""
+    if not value:
+        return default
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+def to_row(record, now):
+    """Turn an import record into a user row, or None if a required field is missing"""
+    if any(not record.get(field) for field in REQUIRED_FIELDS):
+        return None
+    if not record.get('password') and not record.get('password_hash'):
+        return None
+
+    row = {field: record.get(field) or None for field in USER_FIELDS}
+    row['handle'] = row['handle'].strip().lower()
+    row['email'] = row['email'].strip().lower()
+    row['preferred_language'] = row['preferred_language'] or 'en'
+    for field, default in BOOLEAN_FIELDS.items():
+        row[field] = parse_boolean(record.get(field), default)
+    for field in DATETIME_FIELDS:
+        row[field] = parse_datetime(record.get(field), now)
+    row['password'] = None if row['password_hash'] else record['password']
+    return row
+
+def hash_passwords(rows, hasher):
+    """Hash the plaintext passwords of a batch in parallel"""
+    pending = [row for row in rows if row['password'] is not None]
+    for row, password_hash in zip(pending, hasher.hash_many([row['password'] for row in pending])):
+        row['password_hash'] = password_hash
+    for row in rows:
+        del row['password']
+
+def copy_rows(rows):
+    """Load a batch into the user table with PostgreSQL COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[field] for field in USER_FIELDS])
+
+    sql = f'COPY "user" ({", ".join(USER_FIELDS)}) FROM STDIN WITH (FORMAT csv)'
+    cursor = db.session.connection().connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):
+            # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+def insert_rows(rows, skip_existing=False):
+    """
+    Load a batch into the user table in one round trip
+
+    Returns:
+        int: Users inserted (fewer than the batch when existing ones were skipped)
+    """
+    if db.engine.dialect.name == 'postgresql' and not skip_existing:
+        copy_rows(rows)
+        return len(rows)
+
+    if not skip_existing:
+        db.session.execute(User.__table__.insert(), rows)
+        return len(rows)
+
+    statement = upsert_insert(User).on_conflict_do_nothing().returning(User.id)
+    return len(db.session.execute(statement, rows).all())
+
+def import_users(path, fmt=None, batch_size=1000, workers=None, rounds=None, skip_existing=False, app=None):
+    """
+    Stream users from a CSV or JSONL file into the database, batch_size rows per transaction
+
+    Returns:
+        dict: Counts of imported and skipped records
+    """
+    app = app or create_app()
+    fmt = file_format(path, fmt)
+    hasher = PasswordHasher(
+        max_workers=os.cpu_count() if workers is None else workers,
+        rounds=rounds or app.config.get('BCRYPT_LOG_ROUNDS', 12)
+    )
+    counts = {'imported': 0, 'skipped': 0}
+    start_time = time.time()
+
+    def flush(batch):
+        hash_passwords(batch, hasher)
+        inserted = insert_rows(batch, skip_existing=skip_existing)
+        db.session.commit()
+        counts['imported'] += inserted
+        counts['skipped'] += len(batch) - inserted
+        elapsed = max(time.time() - start_time, 1e-9)
+        print(f"   {counts['imported']} users imported ({counts['imported'] / elapsed:.0f}/s)")
+
+    with app.app_context():
+        try:
+            with open(path, newline='', encoding='utf-8') as stream:
+                batch = []
+                now = datetime.utcnow()
+                for record in read_records(stream, fmt):
+                    row = to_row(record, now)
+                    if row is None:
+                        counts['skipped'] += 1
+                        continue
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        flush(batch)
+                        batch = []
+                if batch:
+                    flush(batch)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            hasher.shutdown()
+
+    return counts
+
+def export_users(path, fmt=None, batch_size=1000, app=None):
+    """
+    Stream every user to a CSV or JSONL file, reading batch_size rows at a time by id
+
+    Returns:
+        int: Users exported
+    """
+    app = app or create_app()
+    fmt = file_format(path, fmt)
+    columns = [getattr(User, field) for field in USER_FIELDS]
+    exported = 0
+    start_time = time.time()
+
+    with app.app_context(), open(path, 'w', newline='', encoding='utf-8') as stream:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(USER_FIELDS)
+
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                db.select(User.id, *columns).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                values = [value.isoformat() if isinstance(value, datetime) else value for value in row[1:]]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    stream.write(json.dumps(dict(zip(USER_FIELDS, values))) + '\n')
+
+            exported += len(rows)
+            elapsed = max(time.time() - start_time, 1e-9)
+            print(f"   {exported} users exported ({exported / elapsed:.0f}/s)")
+
+    return exported
+
+def reset_users():
+    """Drop all users and create the default user"""
     print("🚀 User Management Script for co.nnecti.ng")
     print("=" * 50)
+    app = create_app()
     
     # Drop all users
     print("\n1. Dropping all existing users...")
-    if not drop_all_users():
+    if not drop_all_users(app):
         print("💥 Failed to drop users. Exiting.")
         return
     
@@ -114,7 +330,8 @@ def main():
         handle="djynnius",
         email="sunday.ikpe@example.com",  # You may want to provide a real email
         password="Okokomaiko01",
-        preferred_language="en"
+        preferred_language="en",
+        app=app
     )
     
     if success:
@@ -128,5 +345,43 @@ def main():
     else:
         print("\n💥 User creation failed!")
 
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command')
+
+    import_parser = subparsers.add_parser('import', help='bulk import users from CSV or JSONL')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    import_parser.add_argument('--batch-size', type=int, default=1000, help='users per transaction')
+    import_parser.add_argument('--workers', type=int, help='hashing processes (default: one per core)')
+    import_parser.add_argument('--rounds', type=int, help='bcrypt cost (default: BCRYPT_LOG_ROUNDS)')
+    import_parser.add_argument('--skip-existing', action='store_true',
+                               help='skip users whose handle, email or phone number is taken instead of failing')
+
+    export_parser = subparsers.add_parser('export', help='stream all users to CSV or JSONL')
+    export_parser.add_argument('path')
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+    export_parser.add_argument('--batch-size', type=int, default=1000, help='users per query')
+
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        print(f"📥 Importing users from {args.path}...")
+        start_time = time.time()
+        counts = import_users(args.path, fmt=args.format, batch_size=args.batch_size, workers=args.workers,
+                              rounds=args.rounds, skip_existing=args.skip_existing)
+        elapsed = time.time() - start_time
+        print(f"✅ Imported {counts['imported']} users, skipped {counts['skipped']} "
+              f"in {elapsed:.1f}s ({counts['imported'] / max(elapsed, 1e-9):.0f} users/s)")
+    elif args.command == 'export':
+        print(f"📤 Exporting users to {args.path}...")
+        start_time = time.time()
+        exported = export_users(args.path, fmt=args.format, batch_size=args.batch_size)
+        elapsed = time.time() - start_time
+        print(f"✅ Exported {exported} users in {elapsed:.1f}s ({exported / max(elapsed, 1e-9):.0f} users/s)")
+    else:
+        reset_users()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Backfill conversation data on existing messages for co.nnecti.ng
+
+Run once after adding message.conversation_id and the unread counters to an
+existing database, before adding the unique (user1_id, user2_id) constraint
+on conversation (step 1 removes the duplicates it would reject):
+
+1. Merge duplicate conversations of the same pair (keeps the oldest)
+2. Create conversations for message pairs that have none
+3. Set message.conversation_id, in batches
+4. Recompute last_message_id and the unread counters of every conversation
+5. Create the full-text index message search uses (PostgreSQL only; new
+   databases get it from create_all)
+
+Usage:
+    python scripts/backfill_message_conversations.py [--batch-size 5000]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models import Message, Conversation
+
+
+def pair_columns():
+    """Conversation-ordered (user1_id, user2_id) expressions for a message"""
+    lower = db.case((Message.sender_id < Message.recipient_id, Message.sender_id), else_=Message.recipient_id)
+    upper = db.case((Message.sender_id < Message.recipient_id, Message.recipient_id), else_=Message.sender_id)
+    return lower, upper
+
+
+def merge_duplicate_conversations():
+    """Delete all but the oldest conversation of each pair"""
+    keep = db.session.query(db.func.min(Conversation.id)).group_by(Conversation.user1_id, Conversation.user2_id)
+    removed = Conversation.query.filter(~Conversation.id.in_(keep)).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def create_missing_conversations():
+    """Create a conversation for every pair of users that exchanged messages without one"""
+    lower, upper = pair_columns()
+    pairs = db.session.query(lower, upper, db.func.min(Message.created_at)).group_by(lower, upper).all()
+    existing = set(db.session.query(Conversation.user1_id, Conversation.user2_id))
+
+    missing = [
+        Conversation(user1_id=user1_id, user2_id=user2_id, created_at=created_at, last_activity=created_at)
+        for user1_id, user2_id, created_at in pairs
+        if (user1_id, user2_id) not in existing
+    ]
+    db.session.add_all(missing)
+    db.session.commit()
+    return len(missing)
+
+
+def assign_conversations(batch_size):
+    """Set conversation_id on messages that have none, batch_size rows per transaction"""
+    lower, upper = pair_columns()
+    conversation_id = db.select(Conversation.id).where(
+        Conversation.user1_id == lower,
+        Conversation.user2_id == upper
+    ).scalar_subquery()
+
+    total = 0
+    while True:
+        batch = [row.id for row in db.session.query(Message.id).filter(
+            Message.conversation_id.is_(None)
+        ).order_by(Message.id).limit(batch_size)]
+        if not batch:
+            return total
+
+        Message.query.filter(Message.id.in_(batch)).update(
+            {'conversation_id': conversation_id}, synchronize_session=False
+        )
+        db.session.commit()
+        total += len(batch)
+        print(f"   {total} messages assigned...")
+
+
+def recompute_conversations():
+    """Recompute each conversation's last message, activity and unread counters from its messages"""
+    def unread_for(user_id_column):
+        return db.select(db.func.count(Message.id)).where(
+            Message.conversation_id == Conversation.id,
+            Message.recipient_id == user_id_column,
+            Message.is_read == False
+        ).scalar_subquery()
+
+    last_message = db.select(db.func.max(Message.id)).where(
+        Message.conversation_id == Conversation.id
+    ).scalar_subquery()
+    last_activity = db.select(db.func.max(Message.created_at)).where(
+        Message.conversation_id == Conversation.id
+    ).scalar_subquery()
+
+    updated = Conversation.query.update({
+        'last_message_id': last_message,
+        'last_activity': db.func.coalesce(last_activity, Conversation.created_at),
+        'user1_unread_count': unread_for(Conversation.user1_id),
+        'user2_unread_count': unread_for(Conversation.user2_id)
+    }, synchronize_session=False)
+    db.session.commit()
+    return updated
+
+
+def create_search_index():
+    """Build the message content full-text index without blocking writes; returns False if not PostgreSQL"""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(db.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_message_content_fts ON message "
+            "USING gin (to_tsvector('simple', content))"
+        ))
+    return True
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print("🔧 Backfilling message conversations...")
+        print(f"   Merged {merge_duplicate_conversations()} duplicate conversations")
+        print(f"   Created {create_missing_conversations()} missing conversations")
+        print(f"   Assigned {assign_conversations(args.batch_size)} messages")
+        print(f"   Recomputed {recompute_conversations()} conversations")
+        if create_search_index():
+            print("   Created the message search index")
+        print("✅ Backfill complete")
+
+
+if __name__ == "__main__":
+    main()
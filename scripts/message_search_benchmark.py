@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Private message search benchmark for co.nnecti.ng
+
+Fills a scratch table shaped like message with synthetic messages (10M by
+default) in the PostgreSQL database from DATABASE_URL, then times the search
+page and total count for a sample of users:
+
+- before: substring match over the user's messages, with only the
+  created_at index the message table used to have
+- after: the full-text GIN index plus sender/recipient indexes and the
+  visibility filters that Message.search uses
+
+The scratch table is dropped at the end unless --keep is given; the real
+message table is never touched.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/message_search_benchmark.py [--messages 10000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.config import Config
+
+TABLE = 'message_search_bench'
+WORDS = [
+    'lunch', 'tomorrow', 'meeting', 'coffee', 'weekend', 'project', 'thanks', 'call', 'later', 'photo',
+    'concert', 'tickets', 'birthday', 'dinner', 'train', 'late', 'deadline', 'review', 'python', 'release',
+    'hello', 'again', 'maybe', 'sure', 'great', 'idea', 'soon', 'home', 'office', 'game',
+]
+
+
+def seed(connection, messages, users, chunk=1000000):
+    """Create the scratch table and fill it with random messages, chunk rows per statement"""
+    connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    connection.execute(text(f"""
+        CREATE TABLE {TABLE} (
+            id BIGSERIAL PRIMARY KEY,
+            sender_id INTEGER NOT NULL,
+            recipient_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            is_deleted_by_sender BOOLEAN NOT NULL DEFAULT FALSE,
+            is_deleted_by_recipient BOOLEAN NOT NULL DEFAULT FALSE
+        )
+    """))
+
+    words = "ARRAY[" + ", ".join(f"'{word}'" for word in WORDS) + "]"
+    for offset in range(0, messages, chunk):
+        rows = min(chunk, messages - offset)
+        connection.execute(text(f"""
+            INSERT INTO {TABLE} (sender_id, recipient_id, content, created_at, is_deleted_by_sender, is_deleted_by_recipient)
+            SELECT
+                (random() * :users)::int + 1,
+                (random() * :users)::int + 1,
+                (SELECT string_agg(({words})[(random() * {len(WORDS) - 1})::int + 1], ' ')
+                 FROM generate_series(1, 6 + (g % 6))),
+                now() - (random() * interval '365 days'),
+                random() < 0.1,
+                random() < 0.1
+            FROM generate_series(1, :rows) AS g
+        """), {'users': users, 'rows': rows})
+        print(f"   {offset + rows} messages...")
+
+    connection.execute(text(f"CREATE INDEX ON {TABLE} (created_at)"))
+    connection.execute(text(f"ANALYZE {TABLE}"))
+
+
+def add_search_indexes(connection):
+    """Create the indexes Message.search relies on"""
+    connection.execute(text(f"CREATE INDEX ON {TABLE} (sender_id)"))
+    connection.execute(text(f"CREATE INDEX ON {TABLE} (recipient_id)"))
+    connection.execute(text(f"CREATE INDEX ON {TABLE} USING gin (to_tsvector('simple', content))"))
+    connection.execute(text(f"ANALYZE {TABLE}"))
+
+
+BEFORE = f"""
+    FROM {TABLE}
+    WHERE (sender_id = :user_id OR recipient_id = :user_id) AND content LIKE :pattern
+"""
+
+AFTER = f"""
+    FROM {TABLE}
+    WHERE ((sender_id = :user_id AND NOT is_deleted_by_sender)
+           OR (recipient_id = :user_id AND NOT is_deleted_by_recipient))
+      AND to_tsvector('simple', content) @@ to_tsquery('simple', :query)
+"""
+
+
+def time_search(connection, where, samples):
+    """Time a page of 20 results plus the total count; return per-search latencies in ms"""
+    latencies = []
+    for user_id, word in samples:
+        params = {'user_id': user_id, 'query': f'{word}:*', 'pattern': f'%{word}%'}
+        start_time = time.perf_counter()
+        connection.execute(text(f"SELECT id, content {where} ORDER BY created_at DESC, id DESC LIMIT 20"), params).all()
+        connection.execute(text(f"SELECT count(*) {where}"), params).scalar()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return sorted(latencies)
+
+
+def report(label, latencies):
+    """Print mean and p95 latency"""
+    mean = sum(latencies) / len(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:10} mean {mean:9.1f} ms   p95 {p95:9.1f} ms")
+    return mean
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=10000000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--searches', type=int, default=50)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch table')
+    args = parser.parse_args()
+
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+    if engine.dialect.name != 'postgresql':
+        sys.exit("This benchmark needs PostgreSQL (set DATABASE_URL)")
+
+    rng = random.Random(42)
+    samples = [(rng.randint(1, args.users), rng.choice(WORDS)) for _ in range(args.searches)]
+
+    with engine.begin() as connection:
+        print(f"🧪 Seeding {args.messages} messages for {args.users} users...")
+        seed(connection, args.messages, args.users)
+
+    try:
+        with engine.connect() as connection:
+            before = report('before', time_search(connection, BEFORE, samples))
+
+        with engine.begin() as connection:
+            print("🔧 Building search indexes...")
+            add_search_indexes(connection)
+
+        with engine.connect() as connection:
+            after = report('after', time_search(connection, AFTER, samples))
+
+        print(f"Speedup:   {before / after:.1f}x")
+    finally:
+        if not args.keep:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+if __name__ == "__main__":
+    main()
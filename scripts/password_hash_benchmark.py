@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Password verification benchmark for co.nnecti.ng
+
+Hashes one password at the given bcrypt cost, then checks it from many
+concurrent threads (standing in for WSGI request threads) for a fixed time:
+
+- inline: bcrypt on the calling threads, as login did before the hasher
+- pool: PasswordHasher with 1..--workers processes
+
+Reports password checks (i.e. logins) per second and per core for each run,
+which is the number to size PASSWORD_HASH_WORKERS and BCRYPT_LOG_ROUNDS with.
+
+Usage:
+    python scripts/password_hash_benchmark.py [--rounds 12] [--workers 4] [--seconds 10]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.controllers.password_hasher import PasswordHasher
+
+PASSWORD = 'correct horse battery staple'
+
+
+def run(hasher, password_hash, threads, seconds):
+    """Check the password from threads threads for seconds; return checks per second"""
+    checks = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        while time.perf_counter() < deadline:
+            hasher.check(PASSWORD, password_hash)
+            checks[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start_time = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(checks) / (time.perf_counter() - start_time)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='largest pool to try')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent request threads')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    password_hash = PasswordHasher(max_workers=0, rounds=args.rounds).hash(PASSWORD)
+    print(f"🧪 bcrypt cost {args.rounds}, {args.threads} request threads, {os.cpu_count()} cores")
+
+    rate = run(PasswordHasher(max_workers=0), password_hash, args.threads, args.seconds)
+    print(f"{'inline':10} {rate:8.1f} logins/s")
+
+    for workers in range(1, args.workers + 1):
+        hasher = PasswordHasher(max_workers=workers, max_queue=args.threads)
+        hasher.check(PASSWORD, password_hash)  # Start the worker processes before timing
+        try:
+            rate = run(hasher, password_hash, args.threads, args.seconds)
+        finally:
+            hasher.shutdown()
+        print(f"{f'pool x{workers}':10} {rate:8.1f} logins/s   {rate / workers:8.1f} per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Reconcile per-user message counters for co.nnecti.ng
+
+Recomputes sent, received, unread and conversation counts from the message
+and conversation tables and rewrites the message_stats rows that drifted.
+Run it once after creating message_stats on an existing database, then
+periodically (e.g. nightly from cron).
+
+Usage:
+    python scripts/reconcile_message_stats.py [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.models import MessageStats
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=1000, help='users per transaction')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print("🔧 Reconciling message stats...")
+        start_time = time.time()
+        corrected = MessageStats.reconcile(batch_size=args.batch_size)
+        print(f"✅ Corrected {corrected} users in {time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Replay a corpus of posts through the translation cache for co.nnecti.ng
+
+Compares the old exact-text cache key with the placeholder-normalized key plus
+sentence-level translation memory. The LLM is simulated, so no Ollama server
+or database is needed; the numbers show how many requests would reach the LLM.
+
+Usage:
+    python scripts/replay_translation_cache.py [corpus.txt]
+
+The corpus holds one post per line. Without a corpus a synthetic one is built
+from reposts that differ only in mentions and hashtags.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.controllers.translation_service import TranslationService
+
+
+def build_synthetic_corpus(size=2000, seed=42):
+    """Build posts from a small set of sentences with varying mentions and hashtags"""
+    rng = random.Random(seed)
+    sentences = [
+        'Good morning @{user}!',
+        'Check out #{tag} today.',
+        'Thanks @{user} for the great advice!',
+        'Who is going to #{tag} this weekend?',
+        'This made my day.',
+        'Coffee first, then code.',
+        'Big news coming soon!',
+        'Congrats @{user}, well deserved.',
+    ]
+    users = [f'user{i}' for i in range(200)]
+    tags = [f'topic{i}' for i in range(50)]
+
+    corpus = []
+    for _ in range(size):
+        picked = rng.sample(sentences, rng.randint(1, 3))
+        corpus.append(' '.join(
+            sentence.format(user=rng.choice(users), tag=rng.choice(tags)) for sentence in picked
+        ))
+    return corpus
+
+
+def replay(corpus, source_lang='en', target_lang='fr'):
+    """Replay the corpus under both cache strategies and return the statistics"""
+    app = Flask(__name__)
+    app.config['OLLAMA_HEALTH_INTERVAL'] = 0
+
+    with app.app_context():
+        service = TranslationService()
+        cache = {}
+        llm_calls = []
+
+        def fake_translate(normalized_content, *args, **kwargs):
+            llm_calls.append(normalized_content)
+            segments, separators = service._split_segments(normalized_content)
+            return service._join_segments([f'[{target_lang}] {s}' if s.strip() else s for s in segments], separators)
+
+        service._get_cached_translations = lambda contents, *args, **kwargs: {c: cache[c] for c in contents if c in cache}
+        service._cache_translations = lambda entries, *args, **kwargs: cache.update(entries)
+        service._translate_normalized = fake_translate
+
+        exact_keys = set()
+        exact_hits = 0
+        memory_hits = 0
+        llm_segments = 0
+
+        for post in corpus:
+            if post in exact_keys:
+                exact_hits += 1
+            exact_keys.add(post)
+
+            result = service.translate_content(post, source_lang, target_lang)
+            if result.get('cached'):
+                memory_hits += 1
+            else:
+                llm_segments += result['segments_total'] - result['segments_cached']
+
+    total = len(corpus)
+    return {
+        'posts': total,
+        'exact_hit_rate': exact_hits / total if total else 0,
+        'exact_llm_calls': total - exact_hits,
+        'memory_hit_rate': memory_hits / total if total else 0,
+        'memory_llm_calls': len(llm_calls),
+        'memory_llm_segments': llm_segments,
+    }
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as corpus_file:
+            corpus = [line.strip() for line in corpus_file if line.strip()]
+        print(f"📂 Replaying {len(corpus)} posts from {sys.argv[1]}")
+    else:
+        corpus = build_synthetic_corpus()
+        print(f"🧪 Replaying {len(corpus)} synthetic posts")
+
+    stats = replay(corpus)
+
+    print("=" * 50)
+    print(f"Exact-text cache:      {stats['exact_hit_rate']:.1%} hit rate, {stats['exact_llm_calls']} LLM calls")
+    print(f"Translation memory:    {stats['memory_hit_rate']:.1%} hit rate, {stats['memory_llm_calls']} LLM calls")
+    print(f"Segments sent to LLM:  {stats['memory_llm_segments']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Socket.IO fan-out benchmark for co.nnecti.ng
+
+Registers thousands of simulated sockets with a python-socketio server and
+compares the old delivery model (every event broadcast to the global
+timeline room) with audience-scoped delivery (new posts to followers'
+personal rooms, engagement updates to the clients viewing the post).
+
+The engine.io transport is replaced by a counter, so the numbers measure the
+server-side cost of encoding and addressing packets, without network I/O.
+
+Usage:
+    python scripts/socketio_fanout_benchmark.py [--sockets 10000] [--events 2000]
+"""
+
+import argparse
+import random
+import time
+
+import socketio
+
+
+def build_server(sockets, posts, followers_per_user, viewport_size, seed=42):
+    """Create a server with simulated sockets joined to their rooms"""
+    rng = random.Random(seed)
+    server = socketio.Server(async_mode='threading')
+    deliveries = [0]
+
+    def count_delivery(eio_sid, pkt):
+        deliveries[0] += 1
+
+    # Older python-socketio releases send through _send_packet, newer ones
+    # pre-encode and send through _send_eio_packet
+    server._send_packet = count_delivery
+    server._send_eio_packet = count_delivery
+
+    manager = server.manager
+    manager.initialize()
+    for user_id in range(sockets):
+        eio_sid = f'eio-{user_id}'
+        sid = manager.connect(eio_sid, '/')
+        manager.enter_room(sid, '/', 'timeline', eio_sid)
+        manager.enter_room(sid, '/', f'user_{user_id}', eio_sid)
+        for post_id in rng.sample(range(posts), viewport_size):
+            manager.enter_room(sid, '/', f'post_{post_id}', eio_sid)
+
+    follower_ids = {
+        user_id: rng.sample(range(sockets), min(followers_per_user, sockets))
+        for user_id in range(sockets)
+    }
+    return server, follower_ids, deliveries
+
+
+def sample_post(post_id, user_id):
+    """Build a payload shaped like Post.to_dict()"""
+    return {
+        'id': post_id,
+        'content': 'Coffee first, then code. Who is going to #pycon this weekend? @friend',
+        'user_id': user_id,
+        'author': {
+            'id': user_id, 'handle': f'user{user_id}', 'first_name': 'Test',
+            'last_name': 'User', 'full_name': 'Test User', 'bio': None,
+            'profile_picture': None, 'preferred_language': 'en', 'dark_mode': False,
+            'followers_count': 150, 'following_count': 150, 'posts_count': 42,
+            'created_at': '2024-01-01T00:00:00', 'last_seen': '2024-01-01T00:00:00',
+        },
+        'likes_count': 10, 'shares_count': 2, 'replies_count': 3, 'views_count': 100,
+        'created_at': '2024-01-01T00:00:00', 'images': [],
+    }
+
+
+def run(server, follower_ids, deliveries, events, posts, targeted, seed=7):
+    """Emit a mix of new posts and engagement updates; return (events/s, deliveries/event)"""
+    rng = random.Random(seed)
+    sockets = len(follower_ids)
+    deliveries[0] = 0
+
+    start_time = time.perf_counter()
+    for i in range(events):
+        post_id = rng.randrange(posts)
+        author_id = rng.randrange(sockets)
+        post = sample_post(post_id, author_id)
+
+        # Roughly one new post for every nine likes/shares
+        if i % 10 == 0:
+            if targeted:
+                rooms = [f'user_{follower_id}' for follower_id in follower_ids[author_id]]
+                rooms.append(f'user_{author_id}')
+                server.emit('new_post', {'post': post}, to=rooms)
+            else:
+                server.emit('new_post', {'post': post}, to='timeline')
+        else:
+            server.emit('post_updated', {'post': post}, to=f'post_{post_id}' if targeted else 'timeline')
+    elapsed = time.perf_counter() - start_time
+
+    return events / elapsed, deliveries[0] / events
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sockets', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=5000, help='distinct posts being viewed')
+    parser.add_argument('--followers', type=int, default=150, help='followers per user')
+    parser.add_argument('--viewport', type=int, default=10, help='posts subscribed per socket')
+    args = parser.parse_args()
+
+    print(f"🧪 Registering {args.sockets} sockets...")
+    server, follower_ids, deliveries = build_server(args.sockets, args.posts, args.followers, args.viewport)
+
+    broadcast_rate, broadcast_fanout = run(server, follower_ids, deliveries, args.events, args.posts, targeted=False)
+    targeted_rate, targeted_fanout = run(server, follower_ids, deliveries, args.events, args.posts, targeted=True)
+
+    print("=" * 50)
+    print(f"Broadcast to timeline:  {broadcast_rate:8.0f} emits/s, {broadcast_fanout:8.1f} packets/emit")
+    print(f"Audience-scoped:        {targeted_rate:8.0f} emits/s, {targeted_fanout:8.1f} packets/emit")
+    print(f"Speedup:                {targeted_rate / broadcast_rate:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
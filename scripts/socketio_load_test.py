@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Cross-worker Socket.IO delivery test for co.nnecti.ng
+
+Starts several local app workers sharing SOCKETIO_MESSAGE_QUEUE, connects
+guest clients to each of them and subscribes them to one post, then
+publishes events from this separate process through the write-only
+emitter and checks that every client on every worker receives every event.
+
+Usage:
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 \\
+        python scripts/socketio_load_test.py [--workers 3] [--clients 20] [--events 200]
+
+Requires a reachable message queue, the database configured for the app,
+and the python-socketio client.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Post whose room every client subscribes to
+LOAD_TEST_POST_ID = 1
+
+
+def serve(port):
+    """Run one app worker"""
+    from app import create_app, socketio
+
+    app = create_app()
+    socketio.run(app, host='127.0.0.1', port=port, allow_unsafe_werkzeug=True)
+
+
+def wait_for_port(port, timeout=30):
+    """Wait until a worker accepts connections"""
+    import socket
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_load_test(workers, clients_per_worker, events, base_port):
+    """Run the cross-worker delivery test and print the results"""
+    import socketio as socketio_client
+    from app.controllers.socketio_emitter import create_emitter
+
+    if not os.environ.get('SOCKETIO_MESSAGE_QUEUE'):
+        print("❌ SOCKETIO_MESSAGE_QUEUE must be set")
+        return False
+
+    ports = [base_port + i for i in range(workers)]
+    processes = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', str(port)])
+        for port in ports
+    ]
+
+    clients = []
+    received = {}
+    lock = threading.Lock()
+
+    try:
+        for port in ports:
+            if not wait_for_port(port):
+                print(f"❌ Worker on port {port} did not start")
+                return False
+        print(f"🚀 Started {workers} workers on ports {ports}")
+
+        for port in ports:
+            for i in range(clients_per_worker):
+                client = socketio_client.Client(reconnection=False)
+                key = (port, i)
+                received[key] = set()
+
+                def on_event(data, key=key):
+                    with lock:
+                        received[key].add(data['seq'])
+
+                client.on('load_test', on_event)
+                client.connect(f'http://127.0.0.1:{port}', transports=['websocket'])
+                client.emit('subscribe_posts', {'post_ids': [LOAD_TEST_POST_ID]})
+                clients.append(client)
+        print(f"🔌 Connected {len(clients)} clients")
+
+        # Give subscriptions a moment to settle before publishing
+        time.sleep(1)
+
+        emitter = create_emitter()
+        start_time = time.time()
+        for seq in range(events):
+            emitter.emit('load_test', {'seq': seq, 'sent_at': time.time()}, to=f'post_{LOAD_TEST_POST_ID}')
+
+        expected = events * len(clients)
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            with lock:
+                delivered = sum(len(seqs) for seqs in received.values())
+            if delivered >= expected:
+                break
+            time.sleep(0.1)
+        elapsed = time.time() - start_time
+
+        print("=" * 50)
+        for port in ports:
+            port_delivered = sum(len(received[(port, i)]) for i in range(clients_per_worker))
+            print(f"Worker :{port}  {port_delivered}/{events * clients_per_worker} events delivered")
+        print(f"Total: {delivered}/{expected} deliveries in {elapsed:.2f}s "
+              f"({delivered / elapsed:.0f} deliveries/s)")
+
+        return delivered == expected
+
+    finally:
+        for client in clients:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--clients', type=int, default=20, help='clients per worker')
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--base-port', type=int, default=5101)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    success = run_load_test(args.workers, args.clients, args.events, args.base_port)
+    if success:
+        print("🎉 Every client received every event across workers")
+    else:
+        print("💥 Some events were not delivered")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
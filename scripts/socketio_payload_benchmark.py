@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Socket.IO payload size benchmark for co.nnecti.ng
+
+Encodes a stream of typical real-time events (new posts, messages, engagement
+deltas) and reports the bytes each one costs on the wire for:
+
+- verbose payloads (full user objects embedded in every event) versus
+  compact payloads (users referenced by id, summaries listed once in 'authors')
+- the default JSON serializer versus msgpack (SOCKETIO_SERIALIZER=msgpack)
+- no compression, permessage-deflate per message, and permessage-deflate
+  with context takeover (the default when browsers negotiate it)
+
+Usage:
+    python scripts/socketio_payload_benchmark.py [--events 1000]
+"""
+
+import argparse
+import random
+import zlib
+
+from socketio import packet, msgpack_packet
+
+
+def user_dict(user_id):
+    """Build a payload shaped like User.to_dict()"""
+    return {
+        'id': user_id, 'handle': f'user{user_id}', 'first_name': 'Test',
+        'last_name': 'User', 'full_name': 'Test User', 'bio': 'Coffee, code and climbing.',
+        'profile_picture': f'/uploads/avatar_{user_id}.jpg', 'preferred_language': 'en', 'dark_mode': False,
+        'followers_count': 150, 'following_count': 150, 'posts_count': 42,
+        'created_at': '2024-01-01T00:00:00', 'last_seen': '2024-06-01T12:34:56.789012',
+    }
+
+
+def user_summary(user_id):
+    """Build a payload shaped like User.to_summary_dict()"""
+    user = user_dict(user_id)
+    return {key: user[key] for key in ('id', 'handle', 'first_name', 'last_name', 'full_name', 'profile_picture')}
+
+
+def post_dict(post_id, user_id):
+    """Build a payload shaped like Post.to_dict(include_author=False)"""
+    return {
+        'id': post_id,
+        'content': 'Coffee first, then code. Who is going to #pycon this weekend? @friend',
+        'user_id': user_id,
+        'created_at': '2024-06-01T12:34:56.789012', 'updated_at': '2024-06-01T12:34:56.789012',
+        'parent_id': None, 'conversation_root_id': None, 'branch_level': 0, 'is_branch_root': False,
+        'original_language': 'en', 'likes_count': 10, 'replies_count': 3, 'shares_count': 2,
+        'views_count': 100, 'images': [], 'trending_score': 1.2345,
+    }
+
+
+def message_dict(message_id, sender_id, recipient_id):
+    """Build a payload shaped like Message.to_dict(include_users=False)"""
+    return {
+        'id': message_id, 'sender_id': sender_id, 'recipient_id': recipient_id,
+        'content': 'Are we still on for lunch tomorrow?',
+        'created_at': '2024-06-01T12:34:56.789012',
+        'is_read': False, 'is_saved': False, 'original_language': 'en',
+    }
+
+
+def build_events(count, users, seed=42):
+    """Build (verbose, compact) event lists with the same content"""
+    rng = random.Random(seed)
+    verbose, compact = [], []
+
+    for i in range(count):
+        kind = i % 10
+        if kind == 0:
+            author_id = rng.randrange(users)
+            post = post_dict(i, author_id)
+            verbose.append(('new_post', {'post': dict(post, author=user_dict(author_id))}))
+            compact.append(('new_post', {'post': post, 'authors': [user_summary(author_id)]}))
+        elif kind == 1:
+            sender_id, recipient_id = rng.sample(range(users), 2)
+            message = message_dict(i, sender_id, recipient_id)
+            verbose.append(('new_message', {
+                'message': dict(message, sender=user_dict(sender_id), recipient=user_dict(recipient_id)),
+                'conversation_id': 7, 'seq': i
+            }))
+            compact.append(('new_message', {
+                'message': message, 'authors': [user_summary(sender_id), user_summary(recipient_id)],
+                'conversation_id': 7, 'seq': i
+            }))
+        else:
+            updates = {'updates': [{'id': rng.randrange(5000), 'likes_count': rng.randrange(500),
+                                    'shares_count': rng.randrange(50), 'replies_count': rng.randrange(50)}
+                                   for _ in range(rng.randint(1, 5))]}
+            verbose.append(('post_engagement', updates))
+            compact.append(('post_engagement', updates))
+
+    return verbose, compact
+
+
+def encode_json(event, data):
+    """Encode an event the way the default serializer does"""
+    return packet.Packet(packet.EVENT, data=[event, data]).encode().encode('utf-8')
+
+
+def encode_msgpack(event, data):
+    """Encode an event the way SOCKETIO_SERIALIZER=msgpack does"""
+    return msgpack_packet.MsgPackPacket(packet.EVENT, data=[event, data]).encode()
+
+
+def measure(frames):
+    """Get average bytes per frame (raw, deflated per message, deflated with context takeover)"""
+    raw = sum(len(frame) for frame in frames)
+
+    per_message = 0
+    for frame in frames:
+        compressor = zlib.compressobj(wbits=-15)
+        per_message += len(compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+
+    compressor = zlib.compressobj(wbits=-15)
+    takeover = 0
+    for frame in frames:
+        takeover += len(compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+
+    return raw / len(frames), per_message / len(frames), takeover / len(frames)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=500)
+    args = parser.parse_args()
+
+    verbose, compact = build_events(args.events, args.users)
+
+    print(f"📦 Bytes per event over {args.events} events")
+    print("=" * 66)
+    print(f"{'':28} {'raw':>10} {'deflate':>12} {'deflate+ctx':>12}")
+    baseline = None
+    for label, events in (('verbose', verbose), ('compact', compact)):
+        for serializer, encode in (('json', encode_json), ('msgpack', encode_msgpack)):
+            raw, per_message, takeover = measure([encode(event, data) for event, data in events])
+            baseline = baseline or raw
+            print(f"{label + ' / ' + serializer:28} {raw:10.0f} {per_message:12.0f} {takeover:12.0f}")
+    print("=" * 66)
+    print(f"Compact + msgpack + deflate+ctx vs verbose JSON raw: {baseline / takeover:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
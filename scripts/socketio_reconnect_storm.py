@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Reconnect storm harness for co.nnecti.ng
+
+Simulates every client reconnecting at once after a deploy: N python-socketio
+clients connect to a running server at the same moment. Clients refused by
+admission control wait for the server-suggested retry_after and try again.
+Reports how long it takes until every client is connected, and how many
+connection attempts were refused along the way.
+
+Usage:
+    python app.py   # or any worker with SOCKETIO_ACCEPT_RATE configured
+    python scripts/socketio_reconnect_storm.py [--url http://127.0.0.1:5000] [--clients 10000] [--processes 8]
+
+Large client counts need a raised open-file limit (ulimit -n).
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+
+def run_clients(url, count, start_at, transport, results):
+    """Connect count clients at start_at, honouring retry_after; put per-client results on the queue"""
+    import socketio as socketio_client
+
+    clients = []
+    outcomes = []
+    outcomes_lock = threading.Lock()
+
+    def connect_client():
+        client = socketio_client.Client(reconnection=False)
+        refusal = {}
+
+        @client.on('connect_error')
+        def on_connect_error(data):
+            refusal['data'] = data
+
+        refused = 0
+        while True:
+            refusal.clear()
+            try:
+                client.connect(url, transports=[transport], wait_timeout=30)
+                break
+            except Exception:
+                data = refusal.get('data')
+                retry_after = data.get('retry_after') if isinstance(data, dict) else None
+                if retry_after is None:
+                    # Not an admission refusal (e.g. server down); back off briefly
+                    retry_after = 1000
+                refused += 1
+                time.sleep(retry_after / 1000)
+
+        with outcomes_lock:
+            clients.append(client)
+            outcomes.append((time.time() - start_at, refused))
+
+    time.sleep(max(0, start_at - time.time()))
+    threads = [threading.Thread(target=connect_client, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results.put(outcomes)
+
+    # Stay connected until every process has finished, then leave
+    time.sleep(2)
+    for client in clients:
+        try:
+            client.disconnect()
+        except Exception:
+            pass
+
+
+def percentile(values, fraction):
+    """Get a percentile of a sorted list"""
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--transport', default='polling', choices=['polling', 'websocket'])
+    args = parser.parse_args()
+
+    results = multiprocessing.Queue()
+    start_at = time.time() + 2
+    per_process = [args.clients // args.processes + (1 if i < args.clients % args.processes else 0)
+                   for i in range(args.processes)]
+
+    print(f"🌩️  Reconnecting {args.clients} clients to {args.url} from {args.processes} processes...")
+    processes = [
+        multiprocessing.Process(target=run_clients, args=(args.url, count, start_at, args.transport, results))
+        for count in per_process if count
+    ]
+    for process in processes:
+        process.start()
+
+    outcomes = []
+    for _ in processes:
+        outcomes.extend(results.get())
+    for process in processes:
+        process.join()
+
+    connect_times = sorted(elapsed for elapsed, _ in outcomes)
+    refusals = sum(refused for _, refused in outcomes)
+
+    print("=" * 50)
+    print(f"Connected:          {len(outcomes)}/{args.clients}")
+    print(f"Time to stabilize:  {connect_times[-1] if connect_times else 0:.2f}s")
+    print(f"Connect time p50:   {percentile(connect_times, 0.5):.2f}s")
+    print(f"Connect time p95:   {percentile(connect_times, 0.95):.2f}s")
+    print(f"Refused attempts:   {refusals}")
+
+    if len(outcomes) < args.clients:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import unittest
 import json
 from app import create_app, db
 from app.models import User
+from app.models.user import identity_cache
+from app.controllers.password_hasher import PasswordHasher, get_password_hasher
 
 class AuthTestCase(unittest.TestCase):
     
@@ -80,5 +82,111 @@ class AuthTestCase(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('error', data)
 
+    def test_session_user_is_cached_until_profile_update(self):
+        """Repeat requests skip the user query, and an update is visible on the next one"""
+        with self.app.app_context():
+            user = User(
+                handle='testuser',
+                email='test@example.com',
+                first_name='Test',
+                last_name='User'
+            )
+            user.set_password('testpassword123')
+            db.session.add(user)
+            db.session.commit()
+
+        self.client.post('/auth/login',
+            data=json.dumps({
+                'login': 'testuser',
+                'password': 'testpassword123'
+            }),
+            content_type='application/json'
+        )
+
+        for _ in range(3):
+            self.assertEqual(self.client.get('/auth/me').status_code, 200)
+        stats = identity_cache.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+
+        self.client.put('/auth/profile',
+            data=json.dumps({'first_name': 'Renamed'}),
+            content_type='application/json'
+        )
+        data = json.loads(self.client.get('/auth/me').data)
+        self.assertEqual(data['user']['first_name'], 'Renamed')
+        self.assertEqual(identity_cache.get_stats()['misses'], 2)
+
+    def test_login_rehashes_password_made_with_another_cost(self):
+        """A successful login upgrades the stored hash to the configured cost factor"""
+        rounds = get_password_hasher(self.app.config).rounds
+        with self.app.app_context():
+            user = User(
+                handle='testuser',
+                email='test@example.com',
+                first_name='Test',
+                last_name='User',
+                password_hash=PasswordHasher(max_workers=0, rounds=4).hash('testpassword123')
+            )
+            db.session.add(user)
+            db.session.commit()
+
+        response = self.client.post('/auth/login',
+            data=json.dumps({
+                'login': 'testuser',
+                'password': 'testpassword123'
+            }),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.app.app_context():
+            password_hash = User.query.filter_by(handle='testuser').first().password_hash
+            self.assertTrue(password_hash.startswith(f'$2b${rounds:02d}$'))
+            self.assertTrue(PasswordHasher(max_workers=0).check('testpassword123', password_hash))
+
+    def test_repeated_failed_logins_are_rate_limited(self):
+        """Guessing at one account is refused before any password check"""
+        statuses = []
+        for _ in range(10):
+            response = self.client.post('/auth/login',
+                data=json.dumps({
+                    'login': 'stuffed_account',
+                    'password': 'wrongpassword'
+                }),
+                content_type='application/json'
+            )
+            statuses.append(response.status_code)
+            if response.status_code == 429:
+                break
+
+        self.assertEqual(statuses[-1], 429)
+        self.assertTrue(all(status == 401 for status in statuses[:-1]))
+        self.assertGreater(int(response.headers['Retry-After']), 0)
+
+    def test_registration_reports_the_taken_field(self):
+        """A duplicate handle or email is rejected by the insert and named in the error"""
+        registration = {
+            'handle': 'testuser',
+            'email': 'test@example.com',
+            'first_name': 'Test',
+            'last_name': 'User',
+            'password': 'testpassword123'
+        }
+        self.assertEqual(self.client.post('/auth/register',
+            data=json.dumps(registration), content_type='application/json').status_code, 201)
+
+        for changes, error in (({'email': 'other@example.com'}, 'Handle already exists'),
+                               ({'handle': 'otheruser'}, 'Email already exists')):
+            response = self.app.test_client().post('/auth/register',
+                data=json.dumps(dict(registration, **changes)),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.data)['error'], error)
+
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 1)
+
 if __name__ == '__main__':
     unittest.main()
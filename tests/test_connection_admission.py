@@ -0,0 +1,66 @@
+import unittest
+from app.controllers.connection_admission import ConnectionAdmission
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionAdmissionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up admission control accepting 10 connections per second with a burst of 5"""
+        self.clock = FakeClock()
+        self.admission = ConnectionAdmission(rate=10, burst=5, max_delay=30, clock=self.clock, rng=lambda: 0.5)
+
+    def test_burst_then_refuse(self):
+        """Connections beyond the burst are refused with a retry delay"""
+        for _ in range(5):
+            self.assertIsNone(self.admission.admit())
+
+        self.assertIsNotNone(self.admission.admit())
+        self.assertEqual(self.admission.get_stats()['refused'], 1)
+
+    def test_retry_delays_spread_over_backlog(self):
+        """Each refused client is told to wait longer than the one before"""
+        for _ in range(5):
+            self.admission.admit()
+
+        delays = [self.admission.admit() for _ in range(20)]
+
+        self.assertEqual(delays, sorted(delays))
+        self.assertAlmostEqual(delays[-1], 2.0)
+
+    def test_delay_is_capped(self):
+        """Suggested delays never exceed max_delay"""
+        for _ in range(5):
+            self.admission.admit()
+
+        delays = [self.admission.admit() for _ in range(1000)]
+
+        self.assertEqual(max(delays), 30)
+
+    def test_tokens_refill_over_time(self):
+        """Clients retrying after their delay are accepted"""
+        for _ in range(5):
+            self.admission.admit()
+        delay = self.admission.admit()
+
+        self.clock.now += delay
+        self.assertIsNone(self.admission.admit())
+
+    def test_zero_rate_disables_admission_control(self):
+        """A rate of 0 accepts everything"""
+        admission = ConnectionAdmission(rate=0, burst=0)
+
+        self.assertTrue(all(admission.admit() is None for _ in range(100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
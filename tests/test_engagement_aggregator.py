@@ -0,0 +1,52 @@
+import time
+import unittest
+from types import SimpleNamespace
+from app.controllers.engagement_aggregator import EngagementAggregator
+
+
+def make_post(post_id, likes=0):
+    return SimpleNamespace(id=post_id, likes_count=likes, replies_count=0, shares_count=0)
+
+
+class EngagementAggregatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an aggregator that records emitted frames"""
+        self.frames = []
+        self.aggregator = EngagementAggregator(self.frames.append, window=0.05, max_batch=2)
+
+    def test_updates_within_window_are_collapsed(self):
+        """Only the latest counters of a post are emitted"""
+        for likes in range(1, 51):
+            self.aggregator.record(make_post(1, likes))
+        self.aggregator.flush()
+
+        self.assertEqual(self.frames, [[{'id': 1, 'likes_count': 50, 'replies_count': 0, 'shares_count': 0}]])
+
+    def test_frames_are_capped(self):
+        """Many updated posts are split into frames of at most max_batch deltas"""
+        for post_id in range(5):
+            self.aggregator.record(make_post(post_id))
+
+        self.assertEqual(self.aggregator.flush(), 5)
+        self.assertEqual([len(frame) for frame in self.frames], [2, 2, 1])
+
+    def test_window_flushes_automatically(self):
+        """Pending updates are emitted once the window elapses"""
+        self.aggregator.record(make_post(1, likes=1))
+        deadline = time.time() + 2
+        while not self.frames and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(self.frames), 1)
+
+    def test_zero_window_emits_immediately(self):
+        """A zero window disables coalescing"""
+        aggregator = EngagementAggregator(self.frames.append, window=0)
+        aggregator.record(make_post(1))
+
+        self.assertEqual(len(self.frames), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
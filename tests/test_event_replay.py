@@ -0,0 +1,147 @@
+import unittest
+from app.controllers.event_replay import InMemoryReplayBuffer, RedisReplayBuffer
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """The Redis commands the replay buffer uses, with key expiry triggered by hand"""
+
+    def __init__(self):
+        self.values = {}
+        self.sorted_sets = {}
+        self.expiring = set()
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyrank(self, key, start, stop):
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda item: item[1])
+        for member, _ in members[start:len(members) + stop + 1]:
+            del self.sorted_sets[key][member]
+
+    def zrangebyscore(self, key, minimum, maximum):
+        minimum = float(minimum.lstrip('('))
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda item: item[1])
+        return [member for member, score in members if score > minimum]
+
+    def expire(self, key, seconds):
+        self.expiring.add(key)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def expire_keys(self):
+        """Delete every key that was given a TTL, as if it had run out"""
+        for key in self.expiring:
+            self.values.pop(key, None)
+            self.sorted_sets.pop(key, None)
+        self.expiring.clear()
+
+
+class FakePipeline:
+    """Queues FakeRedis calls until execute()"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((getattr(self.client, name), args))
+
+    def execute(self):
+        return [method(*args) for method, args in self.calls]
+
+
+class EventReplayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small buffer with a controllable clock"""
+        self.clock = FakeClock()
+        self.buffer = InMemoryReplayBuffer(capacity=3, ttl=60, clock=self.clock)
+
+    def test_sequence_numbers_are_per_user(self):
+        """Each user has their own increasing sequence"""
+        self.assertEqual(self.buffer.append(1, 'new_message', {}), 1)
+        self.assertEqual(self.buffer.append(1, 'new_message', {}), 2)
+        self.assertEqual(self.buffer.append(2, 'new_message', {}), 1)
+        self.assertEqual(self.buffer.current_seq(1), 2)
+
+    def test_replays_only_missed_events(self):
+        """Resuming returns the events after last_seq"""
+        for i in range(3):
+            self.buffer.append(1, 'new_notification', {'n': i})
+
+        events, complete, seq = self.buffer.since(1, 1)
+
+        self.assertTrue(complete)
+        self.assertEqual(seq, 3)
+        self.assertEqual([event['data']['n'] for event in events], [1, 2])
+
+    def test_nothing_missed(self):
+        """A client that saw everything gets an empty, complete replay"""
+        self.buffer.append(1, 'new_message', {})
+
+        self.assertEqual(self.buffer.since(1, 1), ([], True, 1))
+
+    def test_overflow_requires_refetch(self):
+        """Events pushed out of the ring buffer make the replay incomplete"""
+        for i in range(5):
+            self.buffer.append(1, 'new_message', {'n': i})
+
+        events, complete, seq = self.buffer.since(1, 1)
+
+        self.assertFalse(complete)
+        self.assertEqual(seq, 5)
+
+    def test_expired_events_require_refetch(self):
+        """Events of idle users expire but their sequence continues"""
+        self.buffer.append(1, 'new_message', {})
+        self.clock.now += 61
+
+        self.assertFalse(self.buffer.since(1, 0)[1])
+        self.assertEqual(self.buffer.append(1, 'new_message', {}), 2)
+
+    def test_sequence_reset_requires_refetch(self):
+        """A client ahead of the server's sequence can't resume"""
+        self.buffer.append(1, 'new_message', {})
+
+        self.assertFalse(self.buffer.since(1, 7)[1])
+
+
+class RedisReplayBufferTestCase(unittest.TestCase):
+
+    def test_sequence_survives_expiry(self):
+        """After an idle user's keys expire, numbering continues past what clients saw"""
+        client = FakeRedis()
+        buffer = RedisReplayBuffer(None, capacity=3, ttl=60, client=client)
+        for _ in range(3):
+            buffer.append(1, 'new_message', {})
+
+        client.expire_keys()
+
+        self.assertEqual(buffer.current_seq(1), 3)
+        self.assertFalse(buffer.since(1, 0)[1])
+        self.assertEqual(buffer.append(1, 'new_message', {}), 4)
+        events, complete, seq = buffer.since(1, 3)
+        self.assertTrue(complete)
+        self.assertEqual([event['seq'] for event in events], [4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from flask import Flask
+from app import create_app, db
+from app.config import Config
+from app.models import User
+from app.models.user import LastSeenTracker, last_seen_tracker
+from app.controllers.background_tasks import PeriodicFlush, flush_periodically
+
+
+class LastSeenTrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an in-memory database with two users"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.long_ago = datetime.utcnow() - timedelta(days=7)
+        for handle in ('user1', 'user2'):
+            db.session.add(User(
+                handle=handle,
+                email=f'{handle}@example.com',
+                first_name='Test',
+                last_name='User',
+                password_hash='x',
+                last_seen=self.long_ago
+            ))
+        db.session.commit()
+        self.user_ids = [user.id for user in User.query.order_by(User.id)]
+
+        self.tracker = LastSeenTracker(min_interval=60, flush_interval=3600)
+
+    def tearDown(self):
+        """Drop the database"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_updates_are_buffered_then_flushed_in_one_batch(self):
+        """Recording does not write until the tracker flushes"""
+        for user_id in self.user_ids:
+            self.tracker.record(user_id)
+
+        self.assertEqual(User.query.filter(User.last_seen > self.long_ago).count(), 0)
+
+        self.assertEqual(self.tracker.flush(), 2)
+        self.assertEqual(User.query.filter(User.last_seen > self.long_ago).count(), 2)
+
+    def test_reconnect_storm_is_throttled_per_user(self):
+        """Repeated connects within the interval are recorded once"""
+        for _ in range(50):
+            self.tracker.record(self.user_ids[0])
+
+        self.assertEqual(self.tracker.flush(), 1)
+
+        # Still inside the interval after the flush, so nothing new to write
+        self.tracker.record(self.user_ids[0])
+        self.assertEqual(self.tracker.flush(), 0)
+
+    def test_buffered_value_is_visible_before_flush(self):
+        """Pending timestamps can be read back before they are written"""
+        self.tracker.record(self.user_ids[0])
+
+        self.assertGreater(self.tracker.get(self.user_ids[0]), self.long_ago)
+        self.assertIsNone(self.tracker.get(self.user_ids[1]))
+
+    def stored_last_seen(self, user_id):
+        db.session.expire_all()
+        return db.session.get(User, user_id).last_seen
+
+    def test_latest_timestamp_is_kept_within_the_throttle_window(self):
+        """A disconnect soon after a connect still ends up as the stored last_seen"""
+        user_id = self.user_ids[0]
+        self.tracker.record(user_id)
+        self.assertEqual(self.tracker.flush(), 1)
+        connected_at = self.stored_last_seen(user_id)
+
+        self.tracker.record(user_id)
+        disconnected_at = self.tracker.get(user_id)
+        self.assertGreater(disconnected_at, connected_at)
+
+        # Throttled, but kept for the final flush
+        self.assertEqual(self.tracker.flush(), 0)
+        self.assertEqual(self.tracker.flush(force=True), 1)
+        self.assertEqual(self.stored_last_seen(user_id), disconnected_at)
+
+    def test_periodic_flush_writes_without_further_activity(self):
+        """Buffered timestamps reach the database on the timer and when stopped"""
+        periodic = PeriodicFlush(self.tracker.flush, 0.05,
+                                 final_flush=lambda: self.tracker.flush(force=True), name='last_seen_test')
+        periodic.start(self.app)
+        try:
+            self.tracker.record(self.user_ids[0])
+            deadline = time.monotonic() + 5
+            while self.stored_last_seen(self.user_ids[0]) == self.long_ago:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+
+            self.tracker.record(self.user_ids[0])
+            disconnected_at = self.tracker.get(self.user_ids[0])
+        finally:
+            periodic.stop()
+
+        self.assertEqual(self.stored_last_seen(self.user_ids[0]), disconnected_at)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class LastSeenConfigTestCase(unittest.TestCase):
+
+    def test_intervals_come_from_config(self):
+        """create_app applies the configured intervals to the tracker and its periodic flush"""
+        with patch.object(Config, 'LAST_SEEN_MIN_INTERVAL', 5), patch.object(Config, 'LAST_SEEN_FLUSH_INTERVAL', 7):
+            app = create_app()
+
+        self.assertEqual(last_seen_tracker.min_interval, 5)
+        self.assertEqual(last_seen_tracker.flush_interval, 7)
+        periodic = flush_periodically(app, 'last_seen', last_seen_tracker.flush, last_seen_tracker.flush_interval)
+        self.assertEqual(periodic.interval, 7)
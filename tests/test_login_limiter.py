@@ -0,0 +1,81 @@
+import unittest
+from app.controllers.login_limiter import InMemoryLoginLimiter, backoff_delay
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LoginLimiterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a limiter with small buckets and a controllable clock"""
+        self.clock = FakeClock()
+        self.limiter = InMemoryLoginLimiter(
+            ip_rate=1, ip_burst=5, login_rate=0.5, login_burst=3,
+            backoff_after=3, backoff_base=2, backoff_max=60, clock=self.clock
+        )
+
+    def test_identifier_bucket_limits_attempts_on_one_account(self):
+        """Attempts beyond the burst wait for the bucket to refill"""
+        for _ in range(3):
+            self.assertIsNone(self.limiter.check('10.0.0.1', 'Alice'))
+
+        self.assertAlmostEqual(self.limiter.check('10.0.0.2', 'alice'), 2.0)
+        self.assertIsNone(self.limiter.check('10.0.0.2', 'bob'))
+
+        self.clock.now += 2
+        self.assertIsNone(self.limiter.check('10.0.0.2', 'alice'))
+        self.assertEqual(self.limiter.get_stats()['rejected']['login'], 1)
+
+    def test_ip_bucket_limits_attempts_across_accounts(self):
+        """One client spraying many accounts runs out of attempts"""
+        for i in range(5):
+            self.assertIsNone(self.limiter.check('10.0.0.1', f'user{i}'))
+
+        self.assertIsNotNone(self.limiter.check('10.0.0.1', 'user5'))
+        self.assertIsNone(self.limiter.check('10.0.0.2', 'user5'))
+        self.assertEqual(self.limiter.get_stats()['rejected']['ip'], 1)
+
+    def test_successful_logins_refund_their_tokens(self):
+        """Only failed attempts count against the buckets"""
+        for _ in range(10):
+            self.assertIsNone(self.limiter.check('10.0.0.1', 'alice'))
+            self.limiter.record_success('10.0.0.1', 'alice')
+
+    def test_consecutive_failures_lock_the_account_exponentially(self):
+        """Each failure past the threshold doubles the lockout, and success clears it"""
+        self.assertEqual([backoff_delay(n, 3, 2, 60) for n in range(1, 8)], [0, 0, 2, 4, 8, 16, 32])
+
+        for _ in range(3):
+            self.limiter.record_failure('alice')
+        self.assertEqual(self.limiter.check('10.0.0.1', 'alice'), 2)
+
+        self.clock.now += 2
+        self.limiter.record_failure('alice')
+        self.assertEqual(self.limiter.check('10.0.0.1', 'alice'), 4)
+        self.assertEqual(self.limiter.get_stats()['locked_logins'], 1)
+
+        self.clock.now += 4
+        self.assertIsNone(self.limiter.check('10.0.0.1', 'alice'))
+        self.limiter.record_success('10.0.0.1', 'alice')
+        self.limiter.record_failure('alice')
+        self.assertIsNone(self.limiter.check('10.0.0.1', 'alice'))
+
+    def test_failures_are_forgotten_after_the_backoff_window(self):
+        """An old run of failures doesn't count towards a new lockout"""
+        for _ in range(2):
+            self.limiter.record_failure('alice')
+
+        self.clock.now += 61
+        self.limiter.record_failure('alice')
+        self.assertIsNone(self.limiter.check('10.0.0.1', 'alice'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import json
+import os
+import tempfile
+from app import create_app, db
+from app.models import User
+from manage_users import import_users, export_users
+
+class ManageUsersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an empty database and a scratch directory"""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.directory = tempfile.TemporaryDirectory()
+
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.directory.cleanup()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_import_then_export_round_trips(self):
+        """Imported users can log in, and an export re-imports as duplicates only"""
+        with open(self.path('users.jsonl'), 'w') as stream:
+            for i in range(5):
+                stream.write(json.dumps({
+                    'handle': f'User{i}',
+                    'email': f'user{i}@example.com',
+                    'first_name': 'Test',
+                    'last_name': 'User',
+                    'password': 'password123'
+                }) + '\n')
+            stream.write(json.dumps({'handle': 'incomplete'}) + '\n')
+
+        counts = import_users(self.path('users.jsonl'), batch_size=2, workers=0, rounds=4, app=self.app)
+        self.assertEqual(counts, {'imported': 5, 'skipped': 1})
+
+        self.assertEqual(export_users(self.path('users.csv'), batch_size=2, app=self.app), 5)
+        counts = import_users(self.path('users.csv'), workers=0, rounds=4, skip_existing=True, app=self.app)
+        self.assertEqual(counts, {'imported': 0, 'skipped': 5})
+
+        with self.app.app_context():
+            self.assertEqual(User.query.count(), 5)
+            user = User.query.filter_by(handle='user3').first()
+            self.assertTrue(user.check_password('password123'))
+            self.assertTrue(user.is_active)
+
+if __name__ == '__main__':
+    unittest.main()
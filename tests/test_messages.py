@@ -0,0 +1,278 @@
+import unittest
+import json
+from sqlalchemy import event
+from app import create_app, db, socketio
+from app.models import User, Message, Conversation, MessageStats
+# Register the socket handlers before the first create_app so every app gets them
+from app.controllers import socketio_controller  # noqa: F401
+
+class MessagesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up two users"""
+        self.socket_clients = []
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+
+        with self.app.app_context():
+            db.create_all()
+
+            for handle in ('user1', 'user2'):
+                user = User(
+                    handle=handle,
+                    email=f'{handle}@example.com',
+                    first_name='Test',
+                    last_name='User'
+                )
+                user.set_password('password123')
+                db.session.add(user)
+            db.session.commit()
+
+            self.user1_id = User.query.filter_by(handle='user1').first().id
+            self.user2_id = User.query.filter_by(handle='user2').first().id
+
+    def tearDown(self):
+        """Clean up after tests"""
+        for socket_client in self.socket_clients:
+            if socket_client.is_connected():
+                socket_client.disconnect()
+
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def login(self, handle):
+        """Log in over HTTP and return the client"""
+        client = self.app.test_client()
+        client.post('/auth/login',
+            data=json.dumps({
+                'login': handle,
+                'password': 'password123'
+            }),
+            content_type='application/json'
+        )
+        return client
+
+    def connect_as(self, handle):
+        """Open a Socket.IO connection with a logged in session"""
+        socket_client = socketio.test_client(self.app, flask_test_client=self.login(handle))
+        socket_client.get_received()
+        self.socket_clients.append(socket_client)
+        return socket_client
+
+    def send(self, client, content):
+        """Send a message to user2 over HTTP"""
+        return client.post('/messages/',
+            data=json.dumps({
+                'recipient_id': self.user2_id,
+                'content': content
+            }),
+            content_type='application/json'
+        )
+
+    def test_sends_share_one_conversation(self):
+        """Each send updates the same conversation's last message"""
+        client = self.login('user1')
+
+        first = self.send(client, 'Hello')
+        second = self.send(client, 'Are you there?')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(first.get_json()['conversation_id'], second.get_json()['conversation_id'])
+
+        with self.app.app_context():
+            self.assertEqual(Conversation.query.count(), 1)
+            conversation = Conversation.query.first()
+            self.assertEqual(conversation.last_message_id, second.get_json()['message_data']['id'])
+            self.assertEqual(Message.query.count(), 2)
+
+    def test_send_is_delivered_to_both_participants(self):
+        """A message sent over a socket reaches both users with the same payload"""
+        sender = self.connect_as('user1')
+        recipient = self.connect_as('user2')
+
+        sender.emit('send_message', {'recipient_id': self.user2_id, 'content': 'Hello'})
+
+        sender_events = {event['name']: event['args'][0] for event in sender.get_received()}
+        recipient_events = {event['name']: event['args'][0] for event in recipient.get_received()}
+
+        self.assertEqual(sender_events['new_message']['message'], recipient_events['new_message']['message'])
+        self.assertEqual(sender_events['message_sent']['message']['content'], 'Hello')
+        self.assertEqual(recipient_events['message_notification']['sender_id'], self.user1_id)
+        self.assertEqual(
+            sorted(author['handle'] for author in recipient_events['new_message']['authors']),
+            ['user1', 'user2']
+        )
+
+    def test_messages_page_backwards_with_before(self):
+        """Pages walk from the newest message back to the oldest without overlap"""
+        client = self.login('user1')
+        for i in range(5):
+            conversation_id = self.send(client, f'Message {i}').get_json()['conversation_id']
+
+        url = f'/messages/conversations/{conversation_id}?per_page=2'
+        seen = []
+        page = client.get(url).get_json()
+        while True:
+            seen = [message['content'] for message in page['messages']] + seen
+            if not page['pagination']['has_more']:
+                break
+            page = client.get(f"{url}&before={page['pagination']['before']}").get_json()
+
+        self.assertEqual(seen, [f'Message {i}' for i in range(5)])
+
+    def test_search_skips_deleted_messages_and_highlights_matches(self):
+        """Search totals only count visible messages, with the matching words located"""
+        sender = self.login('user1')
+        ids = [self.send(sender, content).get_json()['message_data']['id']
+               for content in ('Lunch tomorrow?', 'Dinner tonight', 'lunch at noon then')]
+
+        recipient = self.login('user2')
+        recipient.delete(f'/messages/{ids[0]}')
+
+        results = recipient.get('/messages/search?q=LUNCH').get_json()
+        self.assertEqual(results['pagination']['total'], 1)
+        self.assertEqual([message['id'] for message in results['messages']], [ids[2]])
+        self.assertEqual(results['messages'][0]['highlights'], [[0, 5]])
+
+        self.assertEqual(sender.get('/messages/search?q=lunch').get_json()['pagination']['total'], 2)
+
+    def test_search_matches_word_prefixes(self):
+        """Partial words find messages, and highlights mark the start of matching words only"""
+        sender = self.login('user1')
+        message_id = self.send(sender, 'Brunch or lunch_time?').get_json()['message_data']['id']
+
+        results = sender.get('/messages/search?q=lun').get_json()
+        self.assertEqual([message['id'] for message in results['messages']], [message_id])
+        self.assertEqual(results['messages'][0]['highlights'], [[10, 13]])
+
+        self.assertEqual(Message.search_terms('lunch_time'), ['lunch', 'time'])
+        self.assertEqual(Message.highlight('Brunch or lunch_time?', 'time'), [[16, 20]])
+
+    def test_unread_counts_follow_sends_and_reads(self):
+        """The recipient's counter grows with each send and resets when read"""
+        sender = self.login('user1')
+        self.send(sender, 'One')
+        conversation_id = self.send(sender, 'Two').get_json()['conversation_id']
+
+        with self.app.app_context():
+            conversation = db.session.get(Conversation, conversation_id)
+            self.assertEqual(conversation.get_unread_count(self.user2_id), 2)
+            self.assertEqual(conversation.get_unread_count(self.user1_id), 0)
+            self.assertEqual(db.session.get(User, self.user2_id).get_unread_message_count(), 2)
+
+        response = self.login('user2').post(f'/messages/conversations/{conversation_id}/read')
+        self.assertEqual(response.get_json()['count'], 2)
+
+        with self.app.app_context():
+            conversation = db.session.get(Conversation, conversation_id)
+            self.assertEqual(conversation.get_unread_count(self.user2_id), 0)
+            self.assertEqual(Message.query.filter_by(is_read=False).count(), 0)
+
+    def test_logout_removes_ephemeral_messages(self):
+        """Unsaved messages disappear once both participants logged out; saved ones stay"""
+        sender = self.login('user1')
+        kept_id = self.send(sender, 'Keep me').get_json()['message_data']['id']
+        self.send(sender, 'Ephemeral one')
+        conversation_id = self.send(sender, 'Ephemeral two').get_json()['conversation_id']
+
+        recipient = self.login('user2')
+        recipient.post(f'/messages/{kept_id}/save')
+
+        sender.post('/auth/logout')
+        with self.app.app_context():
+            self.assertEqual(Message.query.count(), 3)
+            self.assertEqual(Message.query.filter_by(is_deleted_by_sender=True).count(), 2)
+
+        recipient.post('/auth/logout')
+        with self.app.app_context():
+            self.assertEqual([message.id for message in Message.query], [kept_id])
+            conversation = db.session.get(Conversation, conversation_id)
+            self.assertEqual(conversation.last_message_id, kept_id)
+            self.assertEqual(conversation.get_unread_count(self.user2_id), 1)
+            self.assertEqual(MessageStats.reconcile(), 0)
+
+    def test_late_cleanup_spares_messages_sent_after_logout(self):
+        """A deferred cleanup only hides what existed when the user logged out"""
+        sender = self.login('user1')
+        self.send(sender, 'Before logout')
+        with self.app.app_context():
+            logged_out_at = db.session.query(db.func.max(Message.created_at)).scalar()
+
+        after_id = self.send(sender, 'Next session').get_json()['message_data']['id']
+
+        with self.app.app_context():
+            Message.cleanup_ephemeral_messages(self.user1_id, before=logged_out_at)
+            self.assertEqual(
+                [message.id for message in Message.query.filter_by(is_deleted_by_sender=False)], [after_id]
+            )
+
+    def test_stats_follow_sends_reads_and_deletes(self):
+        """Counters served from the stats row match what COUNT queries would return"""
+        sender = self.login('user1')
+        ids = [self.send(sender, f'Message {i}').get_json()['message_data']['id'] for i in range(3)]
+
+        recipient = self.login('user2')
+        self.assertEqual(recipient.get('/messages/stats').get_json()['stats'], {
+            'total_sent': 0, 'total_received': 3, 'unread_count': 3, 'active_conversations': 1
+        })
+
+        recipient.delete(f'/messages/{ids[0]}')
+        sender.delete(f'/messages/{ids[0]}')
+        recipient.post(f"/messages/conversations/{self.send(sender, 'Last').get_json()['conversation_id']}/read")
+
+        self.assertEqual(sender.get('/messages/stats').get_json()['stats'], {
+            'total_sent': 3, 'total_received': 0, 'unread_count': 0, 'active_conversations': 1
+        })
+        self.assertEqual(recipient.get('/messages/stats').get_json()['stats']['total_received'], 3)
+        self.assertEqual(recipient.get('/messages/stats').get_json()['stats']['unread_count'], 0)
+
+        with self.app.app_context():
+            self.assertEqual(MessageStats.reconcile(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        """Reconciliation rewrites counters that no longer match the messages"""
+        self.send(self.login('user1'), 'Hello')
+
+        with self.app.app_context():
+            db.session.get(MessageStats, self.user2_id).unread_count = 42
+            db.session.commit()
+
+            self.assertEqual(MessageStats.reconcile(batch_size=1), 1)
+            self.assertEqual(MessageStats.get_for_user(self.user2_id)['unread_count'], 1)
+
+    def test_inbox_query_count_does_not_grow_with_conversations(self):
+        """Listing conversations costs the same number of queries for one or many"""
+        with self.app.app_context():
+            for i in range(5):
+                user = User(handle=f'friend{i}', email=f'friend{i}@example.com', first_name='Test', last_name='User')
+                user.set_password('password123')
+                db.session.add(user)
+            db.session.commit()
+            friend_ids = [user.id for user in User.query.filter(User.handle.like('friend%'))]
+
+        client = self.login('user2')
+        for friend_id in friend_ids:
+            client.post('/messages/', data=json.dumps({'recipient_id': friend_id, 'content': 'Hi'}),
+                        content_type='application/json')
+
+        statements = []
+        def count_statement(*args):
+            statements.append(args)
+
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', count_statement)
+            try:
+                response = client.get('/messages/conversations')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        self.assertEqual(len(response.get_json()['conversations']), 5)
+        # Session user, page count and the joined page itself
+        self.assertLessEqual(len(statements), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from flask import Flask
+from app.controllers.ollama_pool import OllamaPool, OllamaBackend, parse_endpoints
+from app.controllers.translation_service import TranslationService
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers like Ollama, or with 500s when the server is marked unhealthy"""
+
+    def _reply(self, body):
+        if not self.server.healthy:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply({'models': []})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.server.hits += 1
+        self._reply({'response': 'Bonjour', 'done': True})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OllamaPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Start two stub Ollama servers"""
+        self.servers = []
+        for _ in range(2):
+            server = HTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+            server.healthy = True
+            server.hits = 0
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+
+        self.pool = OllamaPool(
+            [('127.0.0.1', server.server_port) for server in self.servers],
+            health_interval=0,
+            min_requests=2,
+            cooldown_seconds=60
+        )
+
+        self.app = Flask(__name__)
+        self.app.config['OLLAMA_HEALTH_INTERVAL'] = 0
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.service = TranslationService()
+        self.service.ollama_pool = self.pool
+        self.service._get_cached_translations = lambda *args, **kwargs: {}
+        self.service._cache_translations = lambda *args, **kwargs: None
+
+    def tearDown(self):
+        """Stop the stub servers"""
+        self.app_context.pop()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def test_least_outstanding_routing(self):
+        """A busy backend is skipped in favour of an idle one"""
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.assertIsNot(first, second)
+
+        self.pool.release(first, True, 10)
+        self.assertIs(self.pool.acquire(), first)
+
+    def test_breaker_opens_and_fails_fast(self):
+        """Failing backends are taken out of rotation and translation returns the original text"""
+        for server in self.servers:
+            server.healthy = False
+
+        for _ in range(4):
+            self.service.translate_content('Hello', 'en', 'fr')
+
+        self.assertTrue(all(b.state == OllamaBackend.OPEN for b in self.pool.backends))
+        hits_before = sum(server.hits for server in self.servers)
+
+        result = self.service.translate_content('Hello', 'en', 'fr')
+        self.assertFalse(result['success'])
+        self.assertEqual(result['translated_content'], 'Hello')
+        self.assertEqual(sum(server.hits for server in self.servers), hits_before)
+
+    def test_slow_backend_trips_breaker(self):
+        """Average latency above the threshold opens the breaker"""
+        backend = self.pool.backends[0]
+        backend.latency_threshold_ms = 100
+
+        for _ in range(2):
+            self.pool.release(self.pool.acquire(), True, 500)
+
+        self.assertEqual(backend.state, OllamaBackend.OPEN)
+
+    def test_half_open_recovery(self):
+        """After the cooldown a single trial call closes the breaker on success"""
+        backend = self.pool.backends[0]
+        self.pool.backends = [backend]
+        backend.cooldown_seconds = 0
+        backend.trip()
+
+        trial = self.pool.acquire()
+        self.assertIs(trial, backend)
+        self.assertEqual(backend.state, OllamaBackend.HALF_OPEN)
+        self.assertIsNone(self.pool.acquire())
+
+        self.pool.release(trial, True, 10)
+        self.assertEqual(backend.state, OllamaBackend.CLOSED)
+
+    def test_health_probe_trips_unhealthy_backend(self):
+        """Health probes open the breaker of a backend that stops answering"""
+        self.servers[1].healthy = False
+        results = self.pool.probe_all()
+
+        self.assertEqual(list(results.values()), [True, False])
+        self.assertEqual(self.pool.backends[0].state, OllamaBackend.CLOSED)
+        self.assertEqual(self.pool.backends[1].state, OllamaBackend.OPEN)
+
+    def test_parse_endpoints(self):
+        """Endpoint lists accept bare hosts, host:port and http:// prefixes"""
+        self.assertEqual(
+            parse_endpoints('10.0.0.1, 10.0.0.2:11435,http://gpu:8080/', 11434),
+            [('10.0.0.1', 11434), ('10.0.0.2', 11435), ('gpu', 8080)]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
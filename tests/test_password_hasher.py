@@ -0,0 +1,100 @@
+import unittest
+import threading
+import time
+from app.controllers.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+class PasswordHasherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a one-process hasher with a cheap cost factor"""
+        self.hasher = PasswordHasher(max_workers=1, max_queue=1, rounds=4)
+
+    def tearDown(self):
+        """Stop the worker process"""
+        self.hasher.shutdown()
+
+    def test_hash_and_check_run_on_the_pool(self):
+        """Hashes made in the worker process verify, wrong passwords don't"""
+        password_hash = self.hasher.hash('password123')
+
+        self.assertTrue(password_hash.startswith('$2b$04$'))
+        self.assertTrue(self.hasher.check('password123', password_hash))
+        self.assertFalse(self.hasher.check('wrong', password_hash))
+        self.assertFalse(self.hasher.check('password123', 'not a hash'))
+
+    def test_needs_rehash_when_cost_changes(self):
+        """Only hashes made with another cost factor need re-hashing"""
+        password_hash = self.hasher.hash('password123')
+        self.assertFalse(self.hasher.needs_rehash(password_hash))
+
+        stronger = PasswordHasher(max_workers=0, rounds=5)
+        self.assertTrue(stronger.needs_rehash(password_hash))
+        self.assertTrue(stronger.check('password123', password_hash))
+
+    def test_full_queue_rejects_new_work(self):
+        """Calls beyond the queue limit raise instead of piling up"""
+        password_hash = PasswordHasher(max_workers=0, rounds=12).hash('password123')
+        started = threading.Event()
+
+        def slow_check():
+            started.set()
+            self.hasher.check('password123', password_hash)
+
+        thread = threading.Thread(target=slow_check)
+        thread.start()
+        started.wait(5)
+        while self.hasher.get_stats()['pending'] == 0:
+            pass
+
+        with self.assertRaises(PasswordHasherBusy):
+            self.hasher.check('password123', password_hash)
+        thread.join()
+        self.assertEqual(self.hasher.get_stats()['rejected'], 1)
+
+    def wait_for(self, condition, timeout=10):
+        """Poll until condition() is true"""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_timeout_raises_busy(self):
+        """A call that takes longer than the timeout is reported as busy"""
+        password_hash = PasswordHasher(max_workers=0, rounds=12).hash('password123')
+        self.hasher.timeout = 0.01
+
+        with self.assertRaises(PasswordHasherBusy):
+            self.hasher.check('password123', password_hash)
+        self.assertEqual(self.hasher.get_stats()['timed_out'], 1)
+
+    def test_timed_out_call_keeps_its_slot_until_the_worker_finishes(self):
+        """Abandoned work still counts against the queue while bcrypt runs"""
+        password_hash = PasswordHasher(max_workers=0, rounds=12).hash('password123')
+        self.hasher.timeout = 0.01
+
+        with self.assertRaises(PasswordHasherBusy):
+            self.hasher.check('password123', password_hash)
+        self.assertEqual(self.hasher.get_stats()['pending'], 1)
+        with self.assertRaises(PasswordHasherBusy):
+            self.hasher.check('password123', password_hash)
+        self.assertEqual(self.hasher.get_stats()['rejected'], 1)
+
+        self.wait_for(lambda: self.hasher.get_stats()['pending'] == 0)
+        self.hasher.timeout = 10
+        self.assertTrue(self.hasher.check('password123', password_hash))
+
+    def test_crashed_worker_pool_is_replaced(self):
+        """Once a worker dies, later calls run on a new pool"""
+        password_hash = self.hasher.hash('password123')
+        broken = self.hasher._executor
+        for process in list(broken._processes.values()):
+            process.kill()
+        self.wait_for(lambda: broken._broken)
+
+        self.assertTrue(self.hasher.check('password123', password_hash))
+        self.assertIsNot(self.hasher._executor, broken)
+        self.assertEqual(self.hasher.get_stats()['pending'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from app.controllers.presence_service import InMemoryPresence, PresenceBroadcaster
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class PresenceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a registry with a controllable clock"""
+        self.clock = FakeClock()
+        self.presence = InMemoryPresence(ttl=60, clock=self.clock)
+
+    def test_multiple_tabs(self):
+        """A user stays online until their last session disconnects"""
+        self.assertTrue(self.presence.add(1, 'tab-a'))
+        self.assertFalse(self.presence.add(1, 'tab-b'))
+        self.assertEqual(self.presence.get_sids(1), {'tab-a', 'tab-b'})
+
+        self.assertFalse(self.presence.remove(1, 'tab-a'))
+        self.assertTrue(self.presence.is_online(1))
+
+        self.assertTrue(self.presence.remove(1, 'tab-b'))
+        self.assertFalse(self.presence.is_online(1))
+
+    def test_sessions_expire_without_heartbeat(self):
+        """Sessions that stop sending heartbeats expire"""
+        self.presence.add(1, 'tab-a')
+        self.presence.add(2, 'tab-b')
+
+        self.clock.now += 45
+        self.presence.heartbeat(2, 'tab-b')
+
+        self.clock.now += 30
+        self.assertFalse(self.presence.is_online(1))
+        self.assertTrue(self.presence.is_online(2))
+        self.assertEqual(self.presence.online_user_ids(), {2})
+
+    def test_reconnect_after_expiry_counts_as_online_again(self):
+        """A user whose sessions expired comes back online on the next connect"""
+        self.presence.add(1, 'tab-a')
+        self.clock.now += 61
+
+        self.assertTrue(self.presence.add(1, 'tab-b'))
+
+    def test_removing_unknown_session(self):
+        """Removing a session that was never registered is harmless"""
+        self.assertFalse(self.presence.remove(3, 'ghost'))
+
+
+class PresenceBroadcasterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a broadcaster that records emitted batches"""
+        self.batches = []
+        self.broadcaster = PresenceBroadcaster(self.batches.append, window=60)
+
+    def test_transitions_are_batched(self):
+        """Transitions within the window are emitted together"""
+        self.broadcaster.record(1, 'alice', online=True, follower_ids=[2])
+        self.broadcaster.record(3, 'carol', online=True, follower_ids=[2, 4])
+        self.assertEqual(self.batches, [])
+
+        self.assertEqual(self.broadcaster.flush(), 2)
+        self.assertEqual([change['user_id'] for change in self.batches[0]], [1, 3])
+
+    def test_flapping_user_is_not_announced(self):
+        """A user who goes offline and comes back within the window is not announced"""
+        self.broadcaster.record(1, 'alice', online=False, follower_ids=[2])
+        self.broadcaster.record(1, 'alice', online=True, follower_ids=[2])
+
+        self.assertEqual(self.broadcaster.flush(), 0)
+        self.assertEqual(self.batches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import unittest
+import json
+from app import create_app, db, socketio
+from app.models import User, Post
+from app.controllers.socketio_controller import (
+    emit_new_post, emit_post_update, emit_to_user, engagement_aggregator, presence_broadcaster
+)
+
+class SocketIOFanoutTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up three users where only user2 follows user1"""
+        self.socket_clients = []
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app.config['WTF_CSRF_ENABLED'] = False
+
+        with self.app.app_context():
+            db.create_all()
+
+            users = []
+            for handle in ('user1', 'user2', 'user3'):
+                user = User(
+                    handle=handle,
+                    email=f'{handle}@example.com',
+                    first_name='Test',
+                    last_name='User'
+                )
+                user.set_password('password123')
+                users.append(user)
+            db.session.add_all(users)
+            db.session.commit()
+
+            users[1].follow(users[0])
+            db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        for socket_client in self.socket_clients:
+            if socket_client.is_connected():
+                socket_client.disconnect()
+
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def connect_as(self, handle):
+        """Log in over HTTP and open a Socket.IO connection with that session"""
+        client = self.app.test_client()
+        client.post('/auth/login',
+            data=json.dumps({
+                'login': handle,
+                'password': 'password123'
+            }),
+            content_type='application/json'
+        )
+        socket_client = socketio.test_client(self.app, flask_test_client=client)
+        socket_client.get_received()
+        self.socket_clients.append(socket_client)
+        return socket_client
+
+    def received_events(self, socket_client):
+        """Get the names of the events a client received since the last call"""
+        return [event['name'] for event in socket_client.get_received()]
+
+    def test_server_uses_configured_async_mode(self):
+        """The server runs in the configured mode rather than whichever async library is installed"""
+        self.assertEqual(socketio.server.async_mode, self.app.config['SOCKETIO_ASYNC_MODE'])
+
+    def test_new_post_goes_to_followers_only(self):
+        """New posts reach the author's followers but not other users"""
+        author = self.connect_as('user1')
+        follower = self.connect_as('user2')
+        stranger = self.connect_as('user3')
+
+        with self.app.app_context():
+            user1 = User.query.filter_by(handle='user1').first()
+            post = Post(content='Hello followers', user_id=user1.id)
+            db.session.add(post)
+            db.session.commit()
+            emit_new_post(post)
+
+        self.assertIn('new_post', self.received_events(author))
+        self.assertIn('new_post', self.received_events(follower))
+        self.assertNotIn('new_post', self.received_events(stranger))
+
+    def test_new_post_references_its_author(self):
+        """New posts carry the author once as a compact summary instead of embedding the full user"""
+        follower = self.connect_as('user2')
+
+        with self.app.app_context():
+            user1 = User.query.filter_by(handle='user1').first()
+            post = Post(content='Hello followers', user_id=user1.id)
+            db.session.add(post)
+            db.session.commit()
+            emit_new_post(post)
+
+        frame = next(event for event in follower.get_received() if event['name'] == 'new_post')
+        data = frame['args'][0]
+        self.assertNotIn('author', data['post'])
+        self.assertEqual([author['handle'] for author in data['authors']], ['user1'])
+        self.assertNotIn('followers_count', data['authors'][0])
+
+    def test_post_updates_go_to_subscribers_only(self):
+        """Engagement updates reach only the clients viewing the post"""
+        viewer = self.connect_as('user2')
+        other = self.connect_as('user3')
+        guest = socketio.test_client(self.app)
+        guest.get_received()
+        self.socket_clients.append(guest)
+
+        with self.app.app_context():
+            user1 = User.query.filter_by(handle='user1').first()
+            post = Post(content='Like me', user_id=user1.id)
+            db.session.add(post)
+            db.session.commit()
+            post_id = post.id
+
+        viewer.emit('subscribe_posts', {'post_ids': [post_id]})
+        guest.emit('subscribe_posts', {'post_ids': [post_id]})
+
+        # Subscribing sends the current counters right away
+        self.assertIn('post_engagement', self.received_events(guest))
+        viewer.get_received()
+
+        with self.app.app_context():
+            emit_post_update(Post.query.get(post_id))
+            engagement_aggregator().flush()
+
+        self.assertIn('post_engagement', self.received_events(viewer))
+        self.assertIn('post_engagement', self.received_events(guest))
+        self.assertNotIn('post_engagement', self.received_events(other))
+
+        viewer.emit('unsubscribe_posts', {'post_ids': [post_id]})
+        with self.app.app_context():
+            emit_post_update(Post.query.get(post_id))
+            engagement_aggregator().flush()
+
+        self.assertNotIn('post_engagement', self.received_events(viewer))
+
+    def test_engagement_updates_are_coalesced(self):
+        """Several likes within the window arrive as one compact delta"""
+        viewer = self.connect_as('user2')
+
+        with self.app.app_context():
+            user1 = User.query.filter_by(handle='user1').first()
+            post = Post(content='Hot post', user_id=user1.id)
+            db.session.add(post)
+            db.session.commit()
+            post_id = post.id
+
+        viewer.emit('subscribe_posts', {'post_ids': [post_id]})
+        viewer.get_received()
+
+        with self.app.app_context():
+            post = Post.query.get(post_id)
+            for likes in range(1, 4):
+                post.likes_count = likes
+                emit_post_update(post)
+            engagement_aggregator().flush()
+
+        frames = [event for event in viewer.get_received() if event['name'] == 'post_engagement']
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]['args'][0]['updates'], [
+            {'id': post_id, 'likes_count': 3, 'replies_count': 0, 'shares_count': 0}
+        ])
+
+    def test_engagement_batch_only_carries_subscribed_posts(self):
+        """A viewer of one post doesn't receive deltas for other posts in the same batch"""
+        viewer = self.connect_as('user2')
+        other_viewer = self.connect_as('user3')
+
+        with self.app.app_context():
+            user1 = User.query.filter_by(handle='user1').first()
+            posts = [Post(content=f'Post {i}', user_id=user1.id) for i in range(2)]
+            db.session.add_all(posts)
+            db.session.commit()
+            post_ids = [post.id for post in posts]
+
+        viewer.emit('subscribe_posts', {'post_ids': [post_ids[0]]})
+        other_viewer.emit('subscribe_posts', {'post_ids': [post_ids[1]]})
+        viewer.get_received()
+        other_viewer.get_received()
+
+        with self.app.app_context():
+            for post_id in post_ids:
+                post = Post.query.get(post_id)
+                post.likes_count = 1
+                emit_post_update(post)
+            engagement_aggregator().flush()
+
+        for client, post_id in ((viewer, post_ids[0]), (other_viewer, post_ids[1])):
+            frames = [event for event in client.get_received() if event['name'] == 'post_engagement']
+            self.assertEqual([update['id'] for frame in frames for update in frame['args'][0]['updates']], [post_id])
+
+    def test_presence_goes_to_followers_only(self):
+        """Online status is only announced to followers"""
+        follower = self.connect_as('user2')
+        stranger = self.connect_as('user3')
+
+        self.connect_as('user1')
+        with self.app.app_context():
+            presence_broadcaster().flush()
+
+        self.assertIn('presence_changed', self.received_events(follower))
+        self.assertNotIn('presence_changed', self.received_events(stranger))
+
+    def test_typing_reports_are_rate_limited(self):
+        """A burst of keystrokes reaches the other participant as one typing event"""
+        with self.app.app_context():
+            user1_id = User.query.filter_by(handle='user1').first().id
+            user2_id = User.query.filter_by(handle='user2').first().id
+
+        typist = self.connect_as('user1')
+        reader = self.connect_as('user2')
+        typist.emit('join_conversation', {'user_id': user2_id})
+        reader.emit('join_conversation', {'user_id': user1_id})
+        reader.get_received()
+
+        for _ in range(10):
+            typist.emit('typing_start', {'user_id': user2_id})
+        typist.emit('typing_stop', {'user_id': user2_id})
+
+        typing = [event['args'][0]['typing'] for event in reader.get_received() if event['name'] == 'user_typing']
+        self.assertEqual(typing, [True, False])
+
+    def test_resume_replays_missed_events(self):
+        """A reconnecting client gets only the events sent while it was away"""
+        with self.app.app_context():
+            user2_id = User.query.filter_by(handle='user2').first().id
+
+        client = self.connect_as('user2')
+        with self.app.app_context():
+            emit_to_user(user2_id, 'new_notification', {'notification': {'id': 1}})
+        last_seq = client.get_received()[0]['args'][0]['seq']
+        client.disconnect()
+
+        with self.app.app_context():
+            emit_to_user(user2_id, 'new_notification', {'notification': {'id': 2}})
+            emit_to_user(user2_id, 'new_notification', {'notification': {'id': 3}})
+
+        client = self.connect_as('user2')
+        client.emit('resume', {'last_seq': last_seq})
+        resumed = [event['args'][0] for event in client.get_received() if event['name'] == 'resumed'][0]
+
+        self.assertTrue(resumed['complete'])
+        self.assertEqual([event['notification']['id'] for event in resumed['events']], [2, 3])
+        self.assertEqual(resumed['last_seq'], last_seq + 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from app import db
+from app.models import TranslationCache
+from app.models.translation_cache import access_tracker
+from app.controllers.background_tasks import PeriodicFlush
+
+
+class TranslationCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an in-memory database with a few cache entries"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        TranslationCache.cache_translations({'Hello': 'Bonjour', 'Thanks': 'Merci'}, 'en', 'fr', 100)
+        TranslationCache.cache_translations({'Hello': 'Hallo'}, 'en', 'de', 300)
+
+    def tearDown(self):
+        """Drop the database"""
+        access_tracker.flush()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_hits_are_buffered_then_flushed(self):
+        """Cache hits are written in a batch, not on every read"""
+        TranslationCache.get_cached_translations(['Hello', 'Thanks'], 'en', 'fr')
+        TranslationCache.get_cached_translations(['Hello'], 'en', 'fr')
+
+        entry = TranslationCache.query.filter_by(original_content='Hello', target_language='fr').first()
+        self.assertEqual(entry.hit_count, 0)
+
+        self.assertEqual(access_tracker.flush(), 2)
+        db.session.refresh(entry)
+        self.assertEqual(entry.hit_count, 2)
+
+    def test_hits_are_flushed_without_further_reads(self):
+        """Buffered hits reach the database from the periodic flush when reads stop"""
+        entry = TranslationCache.query.filter_by(original_content='Hello', target_language='fr').first()
+        periodic = PeriodicFlush(access_tracker.flush, 0.05, name='translation_cache_hits_test')
+        periodic.start(self.app)
+        try:
+            TranslationCache.get_cached_translations(['Hello'], 'en', 'fr')
+            deadline = time.monotonic() + 5
+            while True:
+                db.session.refresh(entry)
+                if entry.hit_count == 1:
+                    break
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+        finally:
+            periodic.stop()
+
+    def test_stats_per_language_pair(self):
+        """Stats report hit ratio and average translation time per pair"""
+        TranslationCache.get_cached_translations(['Hello', 'Thanks'], 'en', 'fr')
+        stats = TranslationCache.get_cache_stats()
+
+        self.assertEqual(stats['total_entries'], 3)
+        self.assertEqual(stats['total_hits'], 2)
+        self.assertEqual(stats['recent_entries_24h'], 3)
+
+        pairs = {(pair['source'], pair['target']): pair for pair in stats['language_pairs']}
+        self.assertEqual(pairs[('en', 'fr')]['hit_ratio'], 0.5)
+        self.assertEqual(pairs[('en', 'fr')]['avg_translation_time_ms'], 100.0)
+        self.assertEqual(pairs[('en', 'de')]['hits'], 0)
+
+    def test_stats_count_each_translation_once(self):
+        """Segments stored with a translation add neither misses nor time samples, and only the requested text is hit"""
+        TranslationCache.cache_translations(
+            {'Hi. Bye.': 'Hola. Adiós.', 'Hi.': 'Hola.', 'Bye.': 'Adiós.'}, 'en', 'es', 400, primary='Hi. Bye.'
+        )
+        TranslationCache.get_cached_translations(['Hi. Bye.', 'Hi.', 'Bye.'], 'en', 'es', primary='Hi. Bye.')
+        # Answered by stitching cached segments: one hit on the new entry, no miss
+        TranslationCache.cache_translations({'Bye. Hi.': 'Adiós. Hola.'}, 'en', 'es', primary='Bye. Hi.', hit=True)
+
+        stats = TranslationCache.get_cache_stats()
+        pair = next(pair for pair in stats['language_pairs'] if pair['target'] == 'es')
+
+        self.assertEqual(pair['count'], 4)
+        self.assertEqual(pair['hits'], 2)
+        self.assertEqual(pair['misses'], 1)
+        self.assertEqual(pair['hit_ratio'], round(2 / 3, 4))
+        self.assertEqual(pair['avg_translation_time_ms'], 400.0)
+
+    def test_cleanup_evicts_by_last_access(self):
+        """Old entries that are still being read survive cleanup"""
+        old_date = datetime.utcnow() - timedelta(days=60)
+        TranslationCache.query.update({'created_at': old_date, 'last_accessed': old_date})
+        db.session.commit()
+
+        TranslationCache.get_cached_translations(['Hello'], 'en', 'fr')
+        removed = TranslationCache.cleanup_old_entries(days_old=30)
+
+        self.assertEqual(removed, 2)
+        self.assertEqual([entry.original_content for entry in TranslationCache.query.all()], ['Hello'])
+
+    def test_cleanup_caps_entry_count(self):
+        """max_entries keeps only the most recently used entries"""
+        TranslationCache.query.filter_by(target_language='de').update(
+            {'last_accessed': datetime.utcnow() - timedelta(days=1)}
+        )
+        db.session.commit()
+
+        removed = TranslationCache.cleanup_old_entries(days_old=30, max_entries=2)
+
+        self.assertEqual(removed, 1)
+        self.assertIsNone(TranslationCache.query.filter_by(target_language='de').first())
+
+
+if __name__ == '__main__':
+    unittest.main()
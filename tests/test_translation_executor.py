@@ -0,0 +1,75 @@
+import unittest
+import threading
+from flask import Flask, current_app
+from app.controllers.translation_executor import TranslationExecutor, TranslationJob
+
+
+class TranslationExecutorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small executor and a minimal app"""
+        self.app = Flask(__name__)
+        self.app.config['MARKER'] = 'translation-app'
+        self.executor = TranslationExecutor(max_workers=1, max_queue=2, job_ttl=60)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        """Release blocked jobs and stop the executor"""
+        self.release.set()
+        self.executor.shutdown()
+
+    def _blocking_job(self, value):
+        self.release.wait(5)
+        return {'value': value, 'marker': current_app.config['MARKER']}
+
+    def test_job_runs_in_app_context(self):
+        """Jobs run inside the submitting app's context and can be polled"""
+        job = self.executor.submit(self.app, self._blocking_job, 1)
+
+        self.release.set()
+        self.assertTrue(job.done.wait(5))
+
+        polled = self.executor.get_job(job.id)
+        self.assertEqual(polled.to_dict(), {
+            'job_id': job.id,
+            'status': TranslationJob.COMPLETED,
+            'result': {'value': 1, 'marker': 'translation-app'}
+        })
+
+    def test_queue_limit_rejects_new_jobs(self):
+        """Submissions beyond the queue limit are refused"""
+        self.assertIsNotNone(self.executor.submit(self.app, self._blocking_job, 1))
+        self.assertIsNotNone(self.executor.submit(self.app, self._blocking_job, 2))
+        self.assertIsNone(self.executor.submit(self.app, self._blocking_job, 3))
+        self.assertEqual(self.executor.get_stats()['rejected'], 1)
+
+    def test_identical_requests_share_a_job(self):
+        """Pending jobs with the same key are shared between users"""
+        first = self.executor.submit(self.app, self._blocking_job, 1, user_id=1, dedupe_key='post-1-fr')
+        second = self.executor.submit(self.app, self._blocking_job, 1, user_id=2, dedupe_key='post-1-fr')
+
+        self.assertIs(first, second)
+        self.assertEqual(first.user_ids, {1, 2})
+        self.assertEqual(self.executor.get_stats()['pending'], 1)
+
+    def test_private_job_visibility(self):
+        """Private jobs are hidden from users that did not request them"""
+        job = self.executor.submit(self.app, self._blocking_job, 1, user_id=1, private=True)
+
+        self.assertTrue(job.is_visible_to_user(1))
+        self.assertFalse(job.is_visible_to_user(2))
+        self.assertFalse(job.is_visible_to_user(None))
+
+    def test_failed_job_reports_error(self):
+        """Exceptions inside a job mark it failed"""
+        def failing_job():
+            raise RuntimeError('boom')
+
+        job = self.executor.submit(self.app, failing_job)
+        self.assertTrue(job.done.wait(5))
+        self.assertEqual(job.status, TranslationJob.FAILED)
+        self.assertIn('error', job.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from flask import Flask
+from app.controllers.translation_service import TranslationService
+from app.controllers.ollama_pool import OllamaPool
+
+
+class TranslationMemoryTestCase(unittest.TestCase):
+
+    # Canned LLM output keyed on the normalized text sent for translation
+    llm_translations = {
+        'Good morning __MENTION_0__! See you at __HASHTAG_0__.':
+            'Bonjour __MENTION_0__ ! À bientôt à __HASHTAG_0__.',
+        'Good morning __MENTION_0__!': 'Bonjour __MENTION_0__ !',
+        'Coffee is ready.': 'Le café est prêt.',
+    }
+
+    def setUp(self):
+        """Set up a translation service backed by an in-memory cache and a fake LLM"""
+        self.app = Flask(__name__)
+        self.app.config['OLLAMA_HEALTH_INTERVAL'] = 0
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.cache = {}
+        self.llm_inputs = []
+
+        self.service = TranslationService()
+        self.service.ollama_pool = OllamaPool([('127.0.0.1', 1)], health_interval=0)
+        self.service._get_cached_translations = lambda contents, *args, **kwargs: {
+            content: self.cache[content] for content in contents if content in self.cache
+        }
+        self.service._cache_translations = lambda entries, *args, **kwargs: self.cache.update(entries)
+        self.service._translate_normalized = self._fake_translate
+
+    def tearDown(self):
+        """Pop the app context"""
+        self.app_context.pop()
+
+    def _fake_translate(self, normalized_content, source_lang, target_lang, context=None):
+        self.llm_inputs.append(normalized_content)
+        return self.llm_translations.get(normalized_content)
+
+    def test_reposts_with_different_mentions_share_cache(self):
+        """Content differing only in mentions and hashtags is a cache hit"""
+        first = self.service.translate_content('Good morning @alice! See you at #pycon.', 'en', 'fr')
+        second = self.service.translate_content('Good morning @bob! See you at #djangocon.', 'en', 'fr')
+
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['translated_content'], 'Bonjour @bob ! À bientôt à #djangocon.')
+        self.assertEqual(len(self.llm_inputs), 1)
+
+    def test_full_translation_populates_segments(self):
+        """Aligned sentences of a full translation are stored individually"""
+        self.service.translate_content('Good morning @alice! See you at #pycon.', 'en', 'fr')
+
+        self.assertEqual(self.cache['Good morning __MENTION_0__!'], 'Bonjour __MENTION_0__ !')
+        self.assertEqual(self.cache['See you at __HASHTAG_0__.'], 'À bientôt à __HASHTAG_0__.')
+
+    def test_only_unseen_segments_reach_llm(self):
+        """Cached sentences are stitched back and only new ones are translated"""
+        self.service.translate_content('Good morning @alice! See you at #pycon.', 'en', 'fr')
+        self.llm_inputs.clear()
+
+        result = self.service.translate_content('Coffee is ready. Good morning @carol!', 'en', 'fr')
+
+        self.assertEqual(self.llm_inputs, ['Coffee is ready.'])
+        self.assertEqual(result['translated_content'], 'Le café est prêt. Bonjour @carol !')
+        self.assertEqual(result['segments_cached'], 1)
+        self.assertEqual(result['segments_total'], 2)
+
+    def test_immediate_result_from_segments(self):
+        """Content whose sentences are all cached needs no LLM call"""
+        self.service.translate_content('Good morning @alice! See you at #pycon.', 'en', 'fr')
+        self.llm_inputs.clear()
+
+        result = self.service.get_immediate_result('See you at #rome.\nGood morning @dan!', 'en', 'fr')
+
+        self.assertTrue(result['cached'])
+        self.assertEqual(result['translated_content'], 'À bientôt à #rome.\nBonjour @dan !')
+        self.assertEqual(self.llm_inputs, [])
+
+    def test_placeholders_renumbered_per_segment(self):
+        """A sentence matches regardless of where its placeholders fall in the post"""
+        localized, mapping = self.service._localize_placeholders('Thanks __MENTION_2__ and __MENTION_3__!')
+
+        self.assertEqual(localized, 'Thanks __MENTION_0__ and __MENTION_1__!')
+        self.assertEqual(
+            self.service._globalize_placeholders('Merci __MENTION_0__ et __MENTION_1__ !', mapping),
+            'Merci __MENTION_2__ et __MENTION_3__ !'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from flask import Flask
+from app import create_app, db, socketio
+from app.controllers.translation_service import TranslationService
+from app.controllers.translation_executor import get_translation_executor
+from app.controllers.ollama_pool import OllamaPool
+# Register the socket handlers before the first create_app so every app gets them
+from app.controllers import socketio_controller  # noqa: F401
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate with a canned NDJSON token stream"""
+    tokens = ['Bonjour ', '__MENTION_0__', ', ça ', 'va ?']
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.last_payload = json.loads(self.rfile.read(length))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        for token in self.tokens:
+            self.wfile.write((json.dumps({'response': token, 'done': False}) + '\n').encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write((json.dumps({'response': '', 'done': True}) + '\n').encode('utf-8'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TranslationStreamingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a stub Ollama server and a minimal app context"""
+        self.server = HTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        self.app = Flask(__name__)
+        self.app.config['OLLAMA_HEALTH_INTERVAL'] = 0
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.service = TranslationService()
+        self.service.ollama_pool = OllamaPool([('127.0.0.1', self.server.server_port)], health_interval=0)
+        self.service._get_cached_translations = lambda *args, **kwargs: {}
+        self.cached = []
+        self.service._cache_translations = lambda entries, *args, **kwargs: self.cached.append(entries)
+
+    def tearDown(self):
+        """Shut down the stub server"""
+        self.app_context.pop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_stream_reports_partials_and_caches_final(self):
+        """Partial translations arrive in order and the final text is cached"""
+        partials = []
+        result = self.service.translate_content_stream(
+            'Hello @alice, how are you?', 'en', 'fr', on_partial=partials.append
+        )
+
+        self.assertTrue(self.server.last_payload['stream'])
+        self.assertTrue(result['success'])
+        self.assertEqual(result['translated_content'], 'Bonjour @alice, ça va ?')
+        self.assertEqual(partials[0], 'Bonjour ')
+        self.assertEqual(partials[-1], 'Bonjour @alice, ça va ?')
+        self.assertEqual(self.cached, [
+            {'Hello __MENTION_0__, how are you?': 'Bonjour __MENTION_0__, ça va ?'}
+        ])
+
+    def test_cached_translation_skips_stream(self):
+        """A cache hit is returned without calling back or contacting the LLM"""
+        self.service._get_cached_translations = lambda contents, *args, **kwargs: {content: 'Salut' for content in contents}
+        partials = []
+        result = self.service.translate_content_stream('Hi', 'en', 'fr', on_partial=partials.append)
+
+        self.assertTrue(result['cached'])
+        self.assertEqual(result['translated_content'], 'Salut')
+        self.assertEqual(partials, [])
+
+
+class TranslationStreamingAdmissionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the app and a guest socket"""
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        with self.app.app_context():
+            db.create_all()
+        self.socket_client = socketio.test_client(self.app)
+        self.socket_client.get_received()
+
+    def tearDown(self):
+        """Disconnect and clean up"""
+        self.socket_client.disconnect()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_stream_is_refused_when_the_executor_is_full(self):
+        """Streams share the translation executor's queue limit instead of running on the socket worker"""
+        executor = get_translation_executor(self.app.config)
+        release = threading.Event()
+        blockers = []
+        while True:
+            job = executor.submit(self.app, lambda: release.wait(5) and {})
+            if job is None:
+                break
+            blockers.append(job)
+
+        try:
+            self.socket_client.emit('translate_stream', {'request_id': 'r1', 'content': 'Hello', 'target_lang': 'fr'})
+            events = self.socket_client.get_received()
+        finally:
+            release.set()
+            for job in blockers:
+                job.done.wait(5)
+
+        self.assertEqual([event['name'] for event in events], ['translation_error'])
+        self.assertEqual(events[0]['args'][0]['request_id'], 'r1')
+        self.assertIn('busy', events[0]['args'][0]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from app.controllers.typing_tracker import TypingTracker
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TypingTrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a tracker with a controllable clock that records expired typing"""
+        self.clock = FakeClock()
+        self.stopped = []
+        self.tracker = TypingTracker(
+            lambda user_id, handle, room: self.stopped.append((user_id, room)),
+            ttl=5, min_interval=2, sweep_interval=3600, clock=self.clock
+        )
+
+    def test_keystrokes_are_rate_limited(self):
+        """Only the first report and one refresh per interval are forwarded"""
+        forwarded = []
+        for _ in range(30):
+            forwarded.append(self.tracker.start(1, 'alice', 'conversation_1_2'))
+            self.clock.now += 0.1
+
+        self.assertEqual(forwarded.count(True), 2)
+
+    def test_typing_expires_without_stop(self):
+        """Typing state expires after the ttl and the stop is announced"""
+        self.tracker.start(1, 'alice', 'conversation_1_2')
+
+        self.clock.now += 4
+        self.assertEqual(self.tracker.expire(), 0)
+
+        self.clock.now += 2
+        self.assertEqual(self.tracker.expire(), 1)
+        self.assertEqual(self.stopped, [(1, 'conversation_1_2')])
+
+    def test_keystrokes_keep_typing_alive(self):
+        """Suppressed reports still extend the typing state"""
+        self.tracker.start(1, 'alice', 'conversation_1_2')
+        self.clock.now += 1
+        self.tracker.start(1, 'alice', 'conversation_1_2')
+
+        self.clock.now += 4.5
+        self.assertEqual(self.tracker.expire(), 0)
+
+    def test_explicit_stop(self):
+        """Stopping is forwarded only if the user was typing"""
+        self.tracker.start(1, 'alice', 'conversation_1_2')
+
+        self.assertTrue(self.tracker.stop(1, 'conversation_1_2'))
+        self.assertFalse(self.tracker.stop(1, 'conversation_1_2'))
+
+    def test_clear_user(self):
+        """Disconnecting clears typing in every room"""
+        self.tracker.start(1, 'alice', 'conversation_1_2')
+        self.tracker.start(1, 'alice', 'conversation_1_3')
+        self.tracker.start(2, 'bob', 'conversation_1_2')
+
+        self.assertEqual(sorted(self.tracker.clear_user(1)), ['conversation_1_2', 'conversation_1_3'])
+
+
+if __name__ == '__main__':
+    unittest.main()